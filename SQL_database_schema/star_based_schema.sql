@@ -1,118 +1,119 @@
--- Cast the columns of the 'orders_table' to the intended data types
-ALTER TABLE orders_table
-ALTER COLUMN date_uuid TYPE UUID USING CAST(date_uuid as UUID),
-ALTER COLUMN user_uuid TYPE UUID USING CAST(user_uuid as UUID),
-ALTER COLUMN card_number TYPE VARCHAR(19),
-ALTER COLUMN store_code TYPE VARCHAR(12),
-ALTER COLUMN product_code TYPE VARCHAR(11),
-ALTER COLUMN product_quantity TYPE smallint USING product_quantity::smallint;
+-- The columns of every table are created with their intended data types at load (STAR_SCHEMA_TYPES in
+-- data_handling/database_utils.py), the '£' of 'product_price', 'weight_class' and 'still_available' are set when cleaning
 
--- Cast the columns of the 'dim_users' to the intended data types
-ALTER TABLE dim_users
-ALTER COLUMN first_name TYPE varchar(255),
-ALTER COLUMN last_name TYPE varchar(255),
-ALTER COLUMN date_of_birth TYPE date USING date_of_birth::date,
-ALTER COLUMN country_CODE TYPE varchar(2),
-ALTER COLUMN user_uuid TYPE UUID USING CAST(user_uuid as UUID),
-ALTER COLUMN join_date TYPE date
-USING join_date::date;
-
--- Cast the columns of the 'dim_store_details' to the intended data types
-ALTER TABLE dim_store_details
-ALTER COLUMN longitude TYPE float
-USING CASE WHEN longitude = 'N/A' THEN NULL ELSE longitude::float END,
-ALTER COLUMN locality TYPE varchar(255),
-ALTER COLUMN store_code TYPE varchar(12),
-ALTER COLUMN staff_numbers TYPE smallint USING staff_numbers::smallint,
-ALTER COLUMN opening_date TYPE date
-USING opening_date::date,
-ALTER COLUMN store_type TYPE varchar(255),
-ALTER COLUMN latitude TYPE float
-USING latitude::float,
-ALTER COLUMN country_code TYPE varchar(2),
-ALTER COLUMN continent TYPE varchar(255);
-
--- Remove '£' from 'product_price' and create 'weight_class' column based on weight range
-UPDATE dim_products
-SET product_price = REPLACE(product_price, '£', '');
-
-ALTER TABLE dim_products ADD COLUMN weight_class varchar(14);
-
-UPDATE dim_products
-SET weight_class = CASE
-    WHEN weight < 2 THEN 'Light'
-    WHEN weight >= 2 AND weight < 40 THEN 'Mid_Sized'
-	WHEN weight >= 40 AND weight < 140 THEN 'Heavy'
-    ELSE 'Truck_Required'
-END;
-
--- Modidy and cast the columns of the 'dim_products' to the intended names and data types
-
-ALTER TABLE dim_products
-    RENAME removed TO still_available;
-
-UPDATE dim_products
-SET still_available = CASE
-    WHEN still_available = 'Still_avaliable' THEN TRUE
-    WHEN still_available = 'Removed' THEN FALSE
-END;
-
-ALTER TABLE dim_products
-ALTER COLUMN product_price  TYPE float
-USING product_price::float,
-ALTER COLUMN weight  TYPE float
-USING weight::float,
-ALTER COLUMN "EAN" TYPE varchar(13),
-ALTER COLUMN product_code TYPE varchar(11),
-ALTER COLUMN date_added TYPE date USING date_added::date,
-ALTER COLUMN "uuid" TYPE UUID USING CAST("uuid" as UUID),
-ALTER COLUMN still_available TYPE bool
-USING (still_available::bool),
-ALTER COLUMN weight_class type varchar(14);
-
--- Cast the columns of the 'dim_date_times' to the intended data types
-ALTER TABLE dim_date_times
-ALTER COLUMN "month" TYPE varchar(2),
-ALTER COLUMN "year" TYPE varchar(4),
-ALTER COLUMN "day" TYPE varchar(2),
-ALTER COLUMN "time_period" TYPE varchar(10),
-ALTER COLUMN date_uuid TYPE UUID USING CAST(date_uuid as UUID);
-
--- Cast the columns of the 'dim_card_details' to the intended data types
-ALTER TABLE dim_card_details
-ALTER COLUMN card_number TYPE varchar(19),
-ALTER COLUMN expiry_date TYPE varchar(5),
-ALTER COLUMN date_payment_confirmed TYPE date;
+-- Every statement is skipped when its key already exists, so the script can run after every load: tables replaced
+-- by a reload come without their primary key, and the foreign keys referencing them are dropped by the reload.
+-- The foreign keys are added back NOT VALID, without scanning 'orders_table', and only the orders loaded since
+-- the last run are checked (see 'orders_table_checked'), so a nightly run costs the new orders, not the whole table
 
 -- Create primary keys on all available tables starting with 'dim'
-ALTER TABLE dim_users ADD PRIMARY KEY (user_uuid);
-ALTER TABLE dim_store_details ADD PRIMARY KEY (store_code);
-ALTER TABLE dim_products ADD PRIMARY KEY (product_code);
-ALTER TABLE dim_date_times ADD PRIMARY KEY (date_uuid);
-ALTER TABLE dim_card_details ADD PRIMARY KEY (card_number);
-
--- Create foreign keys in 'orders_table'
-ALTER TABLE orders_table
-ADD CONSTRAINT fk_order_card_number
-FOREIGN KEY (card_number)
-REFERENCES dim_card_details (card_number);
-
-ALTER TABLE orders_table
-ADD CONSTRAINT fk_order_date_uuid
-FOREIGN KEY (date_uuid)
-REFERENCES dim_date_times(date_uuid);
-
-ALTER TABLE orders_table
-ADD CONSTRAINT fk_order_product_code
-FOREIGN KEY (product_code)
-REFERENCES dim_products (product_code);
-
-ALTER TABLE orders_table
-ADD CONSTRAINT fk_order_store_code
-FOREIGN KEY (store_code)
-REFERENCES dim_store_details (store_code);
-
-ALTER TABLE orders_table
-ADD CONSTRAINT fk_order_user_uuid
-FOREIGN KEY (user_uuid)
-REFERENCES dim_users(user_uuid);
\ No newline at end of file
+DO $$
+BEGIN
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'dim_users'::regclass AND contype = 'p') THEN
+		ALTER TABLE dim_users ADD PRIMARY KEY (user_uuid);
+	END IF;
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'dim_store_details'::regclass AND contype = 'p') THEN
+		ALTER TABLE dim_store_details ADD PRIMARY KEY (store_code);
+	END IF;
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'dim_products'::regclass AND contype = 'p') THEN
+		ALTER TABLE dim_products ADD PRIMARY KEY (product_code);
+	END IF;
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'dim_date_times'::regclass AND contype = 'p') THEN
+		ALTER TABLE dim_date_times ADD PRIMARY KEY (date_uuid);
+	END IF;
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'dim_card_details'::regclass AND contype = 'p') THEN
+		ALTER TABLE dim_card_details ADD PRIMARY KEY (card_number);
+	END IF;
+END
+$$;
+
+-- Create foreign keys in 'orders_table', checked below
+DO $$
+BEGIN
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'orders_table'::regclass AND conname = 'fk_order_card_number') THEN
+		ALTER TABLE orders_table
+		ADD CONSTRAINT fk_order_card_number
+		FOREIGN KEY (card_number)
+		REFERENCES dim_card_details (card_number) NOT VALID;
+	END IF;
+
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'orders_table'::regclass AND conname = 'fk_order_date_uuid') THEN
+		ALTER TABLE orders_table
+		ADD CONSTRAINT fk_order_date_uuid
+		FOREIGN KEY (date_uuid)
+		REFERENCES dim_date_times(date_uuid) NOT VALID;
+	END IF;
+
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'orders_table'::regclass AND conname = 'fk_order_product_code') THEN
+		ALTER TABLE orders_table
+		ADD CONSTRAINT fk_order_product_code
+		FOREIGN KEY (product_code)
+		REFERENCES dim_products (product_code) NOT VALID;
+	END IF;
+
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'orders_table'::regclass AND conname = 'fk_order_store_code') THEN
+		ALTER TABLE orders_table
+		ADD CONSTRAINT fk_order_store_code
+		FOREIGN KEY (store_code)
+		REFERENCES dim_store_details (store_code) NOT VALID;
+	END IF;
+
+	IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = 'orders_table'::regclass AND conname = 'fk_order_user_uuid') THEN
+		ALTER TABLE orders_table
+		ADD CONSTRAINT fk_order_user_uuid
+		FOREIGN KEY (user_uuid)
+		REFERENCES dim_users(user_uuid) NOT VALID;
+	END IF;
+END
+$$;
+
+-- Index the foreign keys of 'orders_table' for the joins, and 'index' for the incremental loads and rollup refresh
+CREATE INDEX IF NOT EXISTS ix_orders_table_card_number ON orders_table (card_number);
+CREATE INDEX IF NOT EXISTS ix_orders_table_date_uuid ON orders_table (date_uuid);
+CREATE INDEX IF NOT EXISTS ix_orders_table_product_code ON orders_table (product_code);
+CREATE INDEX IF NOT EXISTS ix_orders_table_store_code ON orders_table (store_code);
+CREATE INDEX IF NOT EXISTS ix_orders_table_user_uuid ON orders_table (user_uuid);
+CREATE UNIQUE INDEX IF NOT EXISTS "ux_orders_table_index" ON orders_table ("index");
+
+-- Highest 'index' of 'orders_table' whose foreign keys were checked, with the table checked: a reload makes a new table
+CREATE TABLE IF NOT EXISTS orders_table_checked (
+	table_oid oid NOT NULL,
+	last_order_index bigint NOT NULL
+);
+
+-- Validate every order of a new 'orders_table', otherwise check only the orders past 'last_order_index', failing
+-- like VALIDATE CONSTRAINT would. The orders already checked are not checked again against a reloaded dimension:
+-- the integrity checks of the load (--integrity) report the orphans a reload makes
+DO $$
+DECLARE
+	checked_index bigint;
+	orphans bigint;
+BEGIN
+	SELECT last_order_index INTO checked_index FROM orders_table_checked WHERE table_oid = 'orders_table'::regclass;
+	IF checked_index IS NULL THEN
+		ALTER TABLE orders_table VALIDATE CONSTRAINT fk_order_card_number;
+		ALTER TABLE orders_table VALIDATE CONSTRAINT fk_order_date_uuid;
+		ALTER TABLE orders_table VALIDATE CONSTRAINT fk_order_product_code;
+		ALTER TABLE orders_table VALIDATE CONSTRAINT fk_order_store_code;
+		ALTER TABLE orders_table VALIDATE CONSTRAINT fk_order_user_uuid;
+	ELSE
+		SELECT COUNT(*) INTO orphans
+		FROM orders_table
+		WHERE orders_table."index" > checked_index
+			AND ((card_number IS NOT NULL AND NOT EXISTS (SELECT 1 FROM dim_card_details WHERE dim_card_details.card_number = orders_table.card_number))
+				OR (date_uuid IS NOT NULL AND NOT EXISTS (SELECT 1 FROM dim_date_times WHERE dim_date_times.date_uuid = orders_table.date_uuid))
+				OR (product_code IS NOT NULL AND NOT EXISTS (SELECT 1 FROM dim_products WHERE dim_products.product_code = orders_table.product_code))
+				OR (store_code IS NOT NULL AND NOT EXISTS (SELECT 1 FROM dim_store_details WHERE dim_store_details.store_code = orders_table.store_code))
+				OR (user_uuid IS NOT NULL AND NOT EXISTS (SELECT 1 FROM dim_users WHERE dim_users.user_uuid = orders_table.user_uuid)));
+		IF orphans > 0 THEN
+			-- The message is built by concatenation, a placeholder would be read as a bind parameter by the driver
+			RAISE EXCEPTION USING ERRCODE = 'foreign_key_violation',
+				MESSAGE = 'insert or update on table "orders_table" violates foreign key constraints: ' || orphans || ' new orders reference missing dimension rows';
+		END IF;
+	END IF;
+
+	DELETE FROM orders_table_checked;
+	INSERT INTO orders_table_checked (table_oid, last_order_index)
+	SELECT 'orders_table'::regclass, COALESCE(MAX("index"), -1) FROM orders_table;
+END
+$$;
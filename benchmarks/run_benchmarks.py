@@ -0,0 +1,146 @@
+import argparse
+import copy
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_data import SyntheticDataGenerator
+from data_handling.data_cleaning import DataCleaning
+from data_handling.integrity import ORDERS_FOREIGN_KEYS, IntegrityChecker
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def build_benchmarks(generator: SyntheticDataGenerator) -> dict[str, tuple[object, Callable]]:
+    """
+    Return the input and the cleaning call of every benchmark, inputs are generated before timing
+
+    Keyword arguments:
+        'generator': SyntheticDataGenerator -- Generator of the synthetic inputs;
+
+    Returns:
+        'benchmarks': dict[str, tuple] -- Input and function called with a fresh copy of it, per benchmark name;
+    """
+    users_df = generator.legacy_users()
+    products_df = generator.products()
+    converted_products_df = DataCleaning(products_df.copy()).convert_product_weights()
+    orders_df = generator.orders()
+    # Dimension keys of the orders, without one key per dimension so each check finds orphans
+    dimension_keys = {dimension: orders_df[column].drop_duplicates().iloc[:-1] for column, dimension in ORDERS_FOREIGN_KEYS.items()}
+    return {
+        'clean_user_data': (users_df, lambda df: DataCleaning(df).clean_user_data()),
+        'clean_card_data': (generator.card_pages(), lambda pages: DataCleaning(pages).clean_card_data()),
+        'clean_store_data': (generator.stores(), lambda df: DataCleaning(df).clean_store_data()),
+        'convert_product_weights': (products_df, lambda df: DataCleaning(df).convert_product_weights()),
+        'clean_products_data': (converted_products_df, lambda df: DataCleaning().clean_products_data(df)),
+        'clean_orders_data': (orders_df, lambda df: DataCleaning(df).clean_orders_data()),
+        'clean_date_events_data': (generator.date_events(), lambda df: DataCleaning(df).clean_date_events_data()),
+        'check_foreign_keys': (orders_df, lambda df: IntegrityChecker(key_loader=lambda table, key: dimension_keys[table])
+                               .check_foreign_keys('orders_table', df)),
+        'convert_to_datetime': (users_df[['date_of_birth', 'join_date']],
+                                lambda df: DataCleaning().convert_to_datetime(df, 'date_of_birth', 'join_date')),
+    }
+
+
+def run_benchmark(data: object, function: Callable, repeat: int = 3) -> dict[str, float]:
+    """
+    Time a cleaning call (best of 'repeat') and measure its peak memory in a separate traced run
+
+    Keyword arguments:
+        'data': object -- Input of the call, copied before each run as cleaners modify their input;
+        'function': Callable -- Cleaning call;
+        'repeat': int -- Number of timed runs;
+
+    Returns:
+        'result': dict[str, float] -- 'seconds' and 'peak_bytes' of the call;
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        data_copy = copy.deepcopy(data) if isinstance(data, list) else data.copy()
+        gc.collect()
+        start = time.perf_counter()
+        function(data_copy)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    data_copy = copy.deepcopy(data) if isinstance(data, list) else data.copy()
+    gc.collect()
+    tracemalloc.start()
+    function(data_copy)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': seconds, 'peak_bytes': peak_bytes}
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """
+    Return the benchmarks slower or using more memory than the baseline times the tolerance
+
+    Keyword arguments:
+        'results': dict[str, dict] -- Results of this run, keyed by '<benchmark>@<rows>';
+        'baseline': dict[str, dict] -- Stored baseline, keyed the same way;
+        'tolerance': float -- Allowed ratio over the baseline;
+
+    Returns:
+        'regressions': list[str] -- Description of each regression;
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if result[metric] > baseline[key][metric] * tolerance:
+                regressions.append(f"{key} {metric}: {result[metric]:.4g} > {baseline[key][metric]:.4g} x {tolerance}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the DataCleaning methods and the integrity checks on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000], help='Scale factors, in rows (e.g. 10000 1000000 10000000)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs of each benchmark')
+    parser.add_argument('--only', nargs='+', help='Benchmarks to run (all when not given)')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='Allowed ratio over the baseline before flagging a regression')
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.rows:
+        benchmarks = build_benchmarks(SyntheticDataGenerator(rows=rows, seed=args.seed))
+        for name, (data, function) in benchmarks.items():
+            if args.only and name not in args.only:
+                continue
+            result = run_benchmark(data, function, args.repeat)
+            results[f'{name}@{rows}'] = result
+            print(f"{name:<25} {rows:>10} rows  {result['seconds']:9.4f}s  {result['peak_bytes'] / 1024 ** 2:9.1f} MiB")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline stored, run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, 'r') as file:
+        regressions = compare(results, json.load(file), args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time budget of each entry point and the backends it must not load at import, 1.6 to 2 times the time
+# measured on a development machine (main 75 ms, data_extraction 450 ms, database_utils 290 ms) to absorb timing
+# noise, while a backend imported again at top level (e.g. pandas by main, about 600 ms) goes over the budget
+STARTUP_BUDGETS = {
+    'main': {
+        'budget_ms': 150,
+        'forbidden': ('pandas', 'numpy', 'pyarrow', 'sqlalchemy', 'boto3', 'botocore', 'requests', 'tabula', 'jpype'),
+    },
+    'data_handling.data_extraction': {
+        'budget_ms': 750,
+        'forbidden': ('boto3', 'botocore', 'requests', 'tabula', 'jpype', 'sqlalchemy'),
+    },
+    'data_handling.database_utils': {
+        'budget_ms': 500,
+        'forbidden': ('pandas', 'numpy', 'boto3', 'botocore', 'requests', 'tabula', 'jpype'),
+    },
+}
+
+
+def measure_import(module: str) -> tuple[float, set[str]]:
+    """
+    Import a module in a fresh interpreter under 'python -X importtime'
+
+    Keyword arguments:
+        'module': str -- Name of the module to import;
+
+    Returns:
+        'result': tuple[float, set[str]] -- Cumulative import time in ms and top-level packages loaded;
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    milliseconds, packages = None, set()
+    # Lines read 'import time: <self us> | <cumulative us> | <indented module name>'
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('imported package'):
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        packages.add(name.strip().split('.')[0])
+        if name.strip() == module and name.startswith(' ' + module):
+            milliseconds = int(cumulative) / 1000
+    return milliseconds, packages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measure the import time of the pipeline entry points against a budget')
+    parser.add_argument('--only', nargs='+', help='Entry points to measure (all when not given)')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per entry point, the fastest counts')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiplier of every budget (e.g. 2 on a slow machine)')
+    args = parser.parse_args()
+
+    failures = []
+    for module, settings in STARTUP_BUDGETS.items():
+        if args.only and module not in args.only:
+            continue
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        milliseconds = min(run[0] for run in runs)
+        packages = set.union(*(run[1] for run in runs))
+        budget = settings['budget_ms'] * args.budget_scale
+        print(f"{module:<32} {milliseconds:9.1f} ms  (budget {budget:.0f} ms)")
+
+        if milliseconds > budget:
+            failures.append(f"{module} imports in {milliseconds:.1f} ms > {budget:.0f} ms")
+        loaded = sorted(set(settings['forbidden']) & packages)
+        if loaded:
+            failures.append(f"{module} loads {', '.join(loaded)} at import")
+
+    for failure in failures:
+        print(f"Regression: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import string
+import numpy as np
+import pandas as pd
+
+
+class SyntheticDataGenerator:
+    def __init__(self, rows: int = 10000, seed: int = 0, dirty_fraction: float = 0.01) -> None:
+        """
+        This class generates seeded synthetic frames with the shape and dirt of each data source, fully offline.
+        Values are drawn from small pools of formatted strings, so 10M rows are generated in seconds.
+
+        Keyword arguments:
+            'rows': int -- Number of rows of each generated frame;
+            'seed': int -- Seed of the random generator;
+            'dirty_fraction': float -- Fraction of rows filled with NULL or gibberish values;
+        """
+        self.rows = rows
+        self.seed = seed
+        self.dirty_fraction = dirty_fraction
+        self.rng = np.random.default_rng(seed)
+
+    def choice(self, pool: list, rows: int = None) -> np.ndarray:
+        """
+        Draw values from a pool
+
+        Keyword arguments:
+            'pool': list -- Values to draw from;
+            'rows': int -- Number of values (defaults to self.rows);
+
+        Returns:
+            'values': np.ndarray -- Drawn values;
+        """
+        return np.asarray(pool, dtype=object)[self.rng.integers(0, len(pool), rows or self.rows)]
+
+    def gibberish(self, size: int, length: int = 10) -> list[str]:
+        """
+        Return random upper case and digit strings, like the corrupted rows of the sources
+
+        Keyword arguments:
+            'size': int -- Number of strings;
+            'length': int -- Length of each string;
+
+        Returns:
+            'strings': list[str] -- Gibberish strings;
+        """
+        characters = np.array(list(string.ascii_uppercase + string.digits))
+        return [''.join(word) for word in characters[self.rng.integers(0, len(characters), (size, length))]]
+
+    def dirty_mask(self, rows: int = None) -> np.ndarray:
+        """
+        Return a mask of the rows to corrupt
+
+        Keyword arguments:
+            'rows': int -- Number of rows (defaults to self.rows);
+
+        Returns:
+            'mask': np.ndarray -- True for the rows to corrupt;
+        """
+        return self.rng.random(rows or self.rows) < self.dirty_fraction
+
+    def corrupt(self, dataframe: pd.DataFrame, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Replace the dirty rows of a frame with 'NULL' or a gibberish row
+
+        Keyword arguments:
+            'dataframe': pd.DataFrame -- Frame to corrupt;
+            'columns': list[str] -- Columns overwritten (defaults to every column);
+
+        Returns:
+            'dataframe': pd.DataFrame -- Corrupted frame;
+        """
+        columns = list(dataframe.columns) if columns is None else columns
+        mask = self.dirty_mask(len(dataframe))
+        null_rows = mask & (self.rng.random(len(dataframe)) < 0.5)
+        gibberish_rows = mask & ~null_rows
+        dataframe.loc[null_rows, columns] = 'NULL'
+        gibberish_pool = self.gibberish(1000)
+        for column in columns:
+            dataframe.loc[gibberish_rows, column] = self.choice(gibberish_pool, int(gibberish_rows.sum()))
+        return dataframe
+
+    def uuids(self, size: int) -> list[str]:
+        """
+        Return random UUID strings
+
+        Keyword arguments:
+            'size': int -- Number of UUIDs;
+
+        Returns:
+            'uuids': list[str] -- UUID strings (36 characters);
+        """
+        raw = np.frombuffer(self.rng.bytes(16 * size), dtype=np.uint8).reshape(size, 16)
+        hex_strings = [bytes(row).hex() for row in raw]
+        return [f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}' for h in hex_strings]
+
+    def dates(self, size: int) -> list[str]:
+        """
+        Return random dates written in the mixed formats found in the sources
+
+        Keyword arguments:
+            'size': int -- Number of dates in the pool;
+
+        Returns:
+            'dates': list[str] -- Date strings;
+        """
+        days = pd.Timestamp('1940-01-01') + pd.to_timedelta(self.rng.integers(0, 30000, size), unit='D')
+        formats = np.array(['%Y-%m-%d', '%Y/%m/%d', '%Y %B %d', '%B %Y %d'])
+        weights = [0.97, 0.01, 0.01, 0.01]
+        return [day.strftime(date_format) for day, date_format in zip(days, self.rng.choice(formats, size, p=weights))]
+
+    def legacy_users(self) -> pd.DataFrame:
+        """
+        Return a legacy_users frame with bad uuids, mixed phone formats, 'GGB' country codes and '@@' emails
+
+        Returns:
+            'users_df': pd.DataFrame -- Synthetic users frame;
+        """
+        pool_size = min(self.rows, 100000)
+        country_code = self.choice(['GB', 'GB', 'GB', 'DE', 'US', 'GGB'])
+        local_numbers = [f'{number:010d}' for number in self.rng.integers(10 ** 9, 10 ** 10, pool_size)]
+        phone_formats = {
+            'GB': ['+44(0){0} {1}', '0{0} {1}', '(0{0}) {1}', '+44{0}{1}'],
+            'DE': ['+49(0){0} {1}', '0{0}{1}', '+49{0}-{1}'],
+            'US': ['+1-{0}-{1}', '({0}) {1}', '001-{0}-{1}x{2}', '{0}.{1}'],
+        }
+        phone_number = np.empty(self.rows, dtype=object)
+        for country, formats in phone_formats.items():
+            mask = (country_code == country) | ((country_code == 'GGB') & (country == 'GB'))
+            format_index = self.rng.integers(0, len(formats), pool_size)
+            pool = [formats[i].format(number[:4], number[4:], number[:3]) for i, number in zip(format_index, local_numbers)]
+            phone_number[mask] = self.choice(pool, int(mask.sum()))
+
+        users_df = pd.DataFrame({
+            'index': np.arange(self.rows),
+            'first_name': self.choice(['Sigfried', 'Guy', 'Harry', 'Andreas', 'Lilli', 'Emily']),
+            'last_name': self.choice(['Noack', 'Allen', 'Lawrence', 'Junk', 'Geisler', 'Smith']),
+            'date_of_birth': self.choice(self.dates(pool_size)),
+            'company': self.choice(['Heydrich Junk', 'Fox Ltd', 'Johnson Inc']),
+            'email_address': self.choice(['user@example.com', 'user@@example.com', 'other@example.org']),
+            'address': self.choice(['Zimmerstr. 1/0\n59015 Gießen', '2 Stanley Road\nLondon', '14 Elm St\nBoston']),
+            'country': self.choice(['United Kingdom', 'Germany', 'United States']),
+            'country_code': country_code,
+            'phone_number': phone_number,
+            'join_date': self.choice(self.dates(pool_size)),
+            'user_uuid': self.choice(self.uuids(pool_size)),
+        })
+        return self.corrupt(users_df, [column for column in users_df.columns if column != 'index'])
+
+    def card_pages(self, rows_per_page: int = 50) -> list[pd.DataFrame]:
+        """
+        Return the card details as a list of page frames (like tabula), with '?' in card numbers and NULL rows
+
+        Keyword arguments:
+            'rows_per_page': int -- Number of rows of each page frame;
+
+        Returns:
+            'card_pages': list[pd.DataFrame] -- Synthetic card page frames;
+        """
+        pool_size = min(self.rows, 100000)
+        card_numbers = [str(number) for number in self.rng.integers(10 ** 11, 10 ** 16, pool_size)]
+        card_numbers = [f'??{number}' if index % 50 == 0 else number for index, number in enumerate(card_numbers)]
+        cards_df = pd.DataFrame({
+            'card_number': self.choice(card_numbers),
+            'expiry_date': self.choice([f'{month:02d}/{year}' for month in range(1, 13) for year in range(22, 32)]),
+            'card_provider': self.choice(['VISA 16 digit', 'JCB 16 digit', 'Diners Club / Carte Blanche', 'Maestro']),
+            'date_payment_confirmed': self.choice(self.dates(pool_size)),
+        })
+        cards_df = self.corrupt(cards_df)
+        return [cards_df.iloc[start:start + rows_per_page] for start in range(0, self.rows, rows_per_page)]
+
+    def stores(self) -> pd.DataFrame:
+        """
+        Return a stores frame with misspelled continents, letters in staff_numbers and gibberish rows
+
+        Returns:
+            'stores_df': pd.DataFrame -- Synthetic stores frame;
+        """
+        stores_df = pd.DataFrame({
+            'index': np.arange(self.rows),
+            'address': self.choice(['Flat 72W\nSally isle\nEast Deantown', 'Heckerstraße 4/5\n50491 Säckingen']),
+            'longitude': self.choice(['-0.02', '13.37', 'N/A']),
+            'lat': None,
+            'locality': self.choice(['High Wycombe', 'Landshut', 'Lancaster', 'N/A']),
+            'store_code': [f'XX-{code:08X}' for code in self.rng.integers(0, 2 ** 32, self.rows)],
+            'staff_numbers': self.choice(['34', '12', 'J78', '30e', '3n9', '80']),
+            'opening_date': self.choice(self.dates(min(self.rows, 10000))),
+            'store_type': self.choice(['Local', 'Super Store', 'Mall Kiosk', 'Outlet', 'Web Portal']),
+            'latitude': self.choice(['51.62', '48.52', 'N/A']),
+            'country_code': self.choice(['GB', 'DE', 'US']),
+            'continent': self.choice(['Europe', 'Europe', 'America', 'eeEurope', 'eeAmerica']),
+        })
+        return self.corrupt(stores_df, ['continent', 'country_code', 'store_type'])
+
+    def products(self) -> pd.DataFrame:
+        """
+        Return a products frame with weights in mixed units, multipacks and junk weight values
+
+        Returns:
+            'products_df': pd.DataFrame -- Synthetic products frame;
+        """
+        pool_size = min(self.rows, 100000)
+        weights = [f'{value}kg' for value in np.round(self.rng.uniform(0.1, 50, 200), 2)]
+        weights += [f'{value}g' for value in self.rng.integers(10, 2000, 200)]
+        weights += [f'{value}ml' for value in self.rng.integers(50, 2000, 100)]
+        weights += [f'{value}oz' for value in self.rng.integers(1, 40, 20)]
+        weights += [f'{count} x {value}g' for count, value in zip(self.rng.integers(2, 16, 50), self.rng.integers(10, 500, 50))]
+        weights += ['77g .', '1160kg', '2 x 1.5kg']
+        products_df = pd.DataFrame({
+            'Unnamed: 0': np.arange(self.rows),
+            'product_name': self.choice(['FurReal Dazzlin Dimples', 'Tiffany Rose Gold Bracelet', 'Sea Salt Chocolate']),
+            'product_price': self.choice([f'£{price:.2f}' for price in self.rng.uniform(1, 500, 500)]),
+            'weight': self.choice(weights),
+            'category': self.choice(['toys-and-games', 'sports-and-leisure', 'pets', 'homeware', 'health-and-beauty']),
+            'EAN': self.choice([str(number) for number in self.rng.integers(10 ** 10, 10 ** 13, pool_size)]),
+            'date_added': self.choice(self.dates(min(self.rows, 10000))),
+            'uuid': self.choice(self.uuids(pool_size)),
+            'removed': self.choice(['Still_avaliable', 'Removed']),
+            'product_code': [f'A{code % 10}-{code:07d}P' for code in self.rng.integers(0, 10 ** 7, self.rows)],
+        })
+        products_df = self.corrupt(products_df, ['weight', 'category', 'removed'])
+        products_df.loc[self.dirty_mask(), 'weight'] = np.nan
+        return products_df
+
+    def orders(self) -> pd.DataFrame:
+        """
+        Return an orders frame with the 'first_name', 'last_name' and '1' columns of the RDS table
+
+        Returns:
+            'orders_df': pd.DataFrame -- Synthetic orders frame;
+        """
+        pool_size = min(self.rows, 100000)
+        return pd.DataFrame({
+            'level_0': np.arange(self.rows),
+            'index': np.arange(self.rows),
+            'date_uuid': self.choice(self.uuids(pool_size)),
+            'first_name': None,
+            'last_name': None,
+            'user_uuid': self.choice(self.uuids(pool_size)),
+            'card_number': self.choice([str(number) for number in self.rng.integers(10 ** 11, 10 ** 16, pool_size)]),
+            'store_code': self.choice([f'XX-{code:08X}' for code in self.rng.integers(0, 2 ** 32, 500)]),
+            'product_code': self.choice([f'A{code % 10}-{code:07d}P' for code in self.rng.integers(0, 10 ** 7, 2000)]),
+            '1': np.nan,
+            'product_quantity': self.rng.integers(1, 14, self.rows),
+        })
+
+    def date_events(self) -> pd.DataFrame:
+        """
+        Return a date events frame with NULL and gibberish months
+
+        Returns:
+            'date_events_df': pd.DataFrame -- Synthetic date events frame;
+        """
+        pool_size = min(self.rows, 100000)
+        date_events_df = pd.DataFrame({
+            'timestamp': self.choice([f'{h:02d}:{m:02d}:{s:02d}' for h in range(24) for m in range(0, 60, 7) for s in range(0, 60, 11)]),
+            'month': self.choice([str(month) for month in range(1, 13)]),
+            'year': self.choice([str(year) for year in range(1992, 2023)]),
+            'day': self.choice([str(day) for day in range(1, 29)]),
+            'time_period': self.choice(['Morning', 'Midday', 'Evening', 'Late_Hours']),
+            'date_uuid': self.choice(self.uuids(pool_size)),
+        })
+        return self.corrupt(date_events_df)
@@ -1,6 +1,104 @@
 import re
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from dateutil.parser import parse
+from data_handling.instrumentation import instrumented
+
+
+# Explicit formats tried, in order, before falling back to dateutil
+DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%Y %B %d',
+    '%B %Y %d',
+    '%Y-%m-%d %H:%M:%S',
+)
+DATE_CACHE_SIZE = 65536
+
+
+# Divisor to convert each weight (or volume) unit into kg
+WEIGHT_UNIT_RULES = {
+    'kg': 1,
+    'g': 1000,
+    'ml': 1000,
+    'oz': 35.274,
+}
+
+# Known wrong values in the products source, corrected before conversion
+WEIGHT_JUNK_VALUES = {
+    '1160kg': '1160g',
+}
+
+# Store cleaning rules: regex scrubs, allowed values and columns coerced to numbers (with their dtype)
+STORE_DATA_RULES = {
+    'scrub': {
+        'continent': {'ee': ''},
+        'staff_numbers': {r'\D+': ''},
+    },
+    'allowed': {
+        'continent': ('Europe', 'America'),
+    },
+    'numeric': {
+        'staff_numbers': 'Int64',
+        'longitude': 'float64',
+        'latitude': 'float64',
+    },
+}
+
+# Date events cleaning rules: values each column must fully match and allowed values
+DATE_EVENTS_RULES = {
+    'pattern': {
+        'month': r'\d{1,2}',
+        'year': r'\d{4}',
+        'day': r'\d{1,2}',
+    },
+    'allowed': {
+        'time_period': ('Morning', 'Midday', 'Evening', 'Late_Hours'),
+    },
+}
+
+# Upper bound (exclusive) of the weight in kg of each weight class, heavier or missing weights are 'Truck_Required'
+WEIGHT_CLASSES = {
+    'Light': 2,
+    'Mid_Sized': 40,
+    'Heavy': 140,
+}
+
+# Value of the 'removed' column of the products mapped to 'still_available'
+PRODUCT_AVAILABILITY = {
+    'Still_avaliable': True,
+    'Removed': False,
+}
+
+# Digits kept (after the international code) and trunk prefix added, per country code
+PHONE_NUMBER_RULES = {
+    'GB': {'digits': 10, 'trunk_prefix': '0'},
+    'DE': {'digits': 10, 'trunk_prefix': ''},
+    'US': {'digits': 10, 'trunk_prefix': ''},
+}
+DEFAULT_PHONE_NUMBER_RULE = {'digits': 10, 'trunk_prefix': ''}
+
+# Office extensions (e.g. 'x123' on US numbers) and punctuation removed from phone numbers
+PHONE_JUNK_PATTERN = re.compile(r'x.*$|[+().\- ]')
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date(value: str):
+    """
+    Parse a date string with dateutil, returning None when the value can't be parsed
+
+    Keyword arguments:
+        'value': str -- Date string to parse;
+
+    Returns:
+        'date': datetime -- Parsed date, or None;
+    """
+    try:
+        return parse(value)
+    except (ValueError, OverflowError):
+        return None
 
 
 class DataCleaning: 
@@ -12,11 +110,17 @@ class DataCleaning:
             'dataframe': pd.DataFrame -- DataFrame to be cleaned;
         """
         self.dataframe = dataframe
+        self.dropped_rows = {}
+        self.date_parse_stats = {}
         
     # Auxuliary function to convert a column to type datetime
+    @instrumented
     def convert_to_datetime(self, dataframe: pd.DataFrame, *columns: str) -> pd.DataFrame:
         """
         Function receives a dataframe and a column(s) name(s) to convert to type datetime.
+        Values are parsed with the explicit DATE_FORMATS first, values that fail every format fall back
+        to dateutil once per unique string. Values that can't be parsed become NaT.
+        The number of values parsed by each path is recorded in 'self.date_parse_stats'.
 
         Keyword arguments:
             'dataframe': pd.DataFrame -- DataFrame to be modified;
@@ -26,11 +130,52 @@ class DataCleaning:
             'dataframe': pd.DataFrame -- Dataframe with columns in timedate format;
         """
         for column in columns:
-            dataframe[column] = dataframe[column].apply(parse)
-            dataframe[column] = pd.to_datetime(dataframe[column], errors='coerce')
+            values = dataframe[column]
+            stats = {}
+            converted = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+            remaining = values.notna().to_numpy(copy=True)  # Writable, pandas 3 returns a read-only view
+
+            # Fast paths, positions are used as indexes may be duplicated (e.g. concatenated PDF pages)
+            for date_format in DATE_FORMATS:
+                positions = np.flatnonzero(remaining)
+                if len(positions) == 0:
+                    break
+                attempt = pd.to_datetime(values.iloc[positions], format=date_format, errors='coerce')
+                matched = attempt.notna().to_numpy()
+                converted[positions[matched]] = attempt.to_numpy()[matched]
+                remaining[positions[matched]] = False
+                stats[date_format] = int(matched.sum())
+
+            # Fallback to dateutil once per unique value left
+            positions = np.flatnonzero(remaining)
+            codes, uniques = pd.factorize(values.iloc[positions].astype(str))
+            parsed = pd.to_datetime([_parse_date(value) for value in uniques], errors='coerce')
+            converted[positions] = np.asarray(parsed, dtype='datetime64[ns]')[codes]
+            stats['dateutil'] = int(pd.notna(converted[positions]).sum())
+            stats['unparsed'] = len(positions) - stats['dateutil']
+
+            dataframe[column] = converted
+            self.date_parse_stats[column] = stats
         return dataframe
 
+    def clean_chunks(self, chunks: Iterable[pd.DataFrame], method: str) -> Iterator[pd.DataFrame]:
+        """
+        Apply a row-local cleaning method (e.g. 'clean_user_data', 'clean_orders_data') to each chunk
+
+        Keyword arguments:
+            'chunks': Iterable[pd.DataFrame] -- DataFrames to be cleaned, consumed one at a time;
+            'method': str -- Name of the cleaning method to apply;
+
+        Returns:
+            'clean_chunks': Iterator[pd.DataFrame] -- Clean DataFrames, one per chunk;
+        """
+        clean_method = getattr(self, method)
+        for chunk in chunks:
+            self.dataframe = chunk
+            yield clean_method()
+
     # Clean Nulls, correct date values, incorrectly typed values and rows filled with the wrong information
+    @instrumented
     def clean_user_data(self) -> pd.DataFrame:
         """
         Retrieves user data, cleans the data and upload to database with table name 'dim_users'
@@ -39,35 +184,53 @@ class DataCleaning:
             'users_df': pd.DataFrame -- Clean users dataframe;
         """      
         # Clean NULL and gibberish by length of user_uuid (fixed 36 char code)
-        users_df = self.dataframe[self.dataframe['user_uuid'].str.len()==36]
+        valid_uuid = self.dataframe['user_uuid'].str.len()==36
+        self.dropped_rows['user_uuid'] = int((~valid_uuid).sum())
+        users_df = self.dataframe[valid_uuid]
 
         # Correct date_of_birth and join_date format
         users_df = self.convert_to_datetime(users_df, 'date_of_birth','join_date')
 
         # Clean phone numbers
         # Fix mispelling on country code
-        users_df.loc[users_df['country_code']=='GGB', 'country_code'] = 'GB'
-        # Clean plus sign, characters and spaces
-        users_df['phone_number'] = users_df['phone_number'].replace({r'\+': '', r'\(': '', r'\)': '', r'-': '', r' ': '',r'\.': ''}, regex=True)
-        # Clean office extension on US numbers
-        users_df['phone_number'] = users_df['phone_number'].str.split('x').str[0]
-        # Clean international code from numbers
-        for index in users_df.index:
-            # DE, US have 10 digits. GB have 11 digits (1st digit is always 0)
-            # Cleaning country code from the phone number, when present
-            users_df.at[index, 'phone_number'] = users_df['phone_number'][index][-10:]
-            # Adding 0 to the start of GB numbers
-            GB_number = False
-            GB_number = users_df['country_code'][index]=='GB'
-            if GB_number is True:
-                users_df.loc[users_df['phone_number']==users_df['phone_number'][index][-10:], 'phone_number'] = '0' + users_df['phone_number'][index]
-                
+        users_df['country_code'] = users_df['country_code'].replace({'GGB': 'GB'})
+        # Clean plus sign, characters, spaces, office extensions and international code
+        users_df = self.normalise_phone_numbers(users_df)
+
         # Clean email mispelling
         users_df["email_address"] = users_df["email_address"].str.replace('@@','@')
 
         return users_df
 
 
+    def normalise_phone_numbers(self, dataframe: pd.DataFrame, phone_rules: dict[str, dict] = None) -> pd.DataFrame:
+        """
+        Normalise column 'phone_number' using the rule of each row's 'country_code'
+
+        Keyword arguments:
+            'dataframe': pd.DataFrame -- DataFrame with 'phone_number' and 'country_code' columns;
+            'phone_rules': dict[str, dict] -- 'digits' and 'trunk_prefix' per country code (defaults to PHONE_NUMBER_RULES);
+
+        Returns:
+            'dataframe': pd.DataFrame -- DataFrame with normalised phone numbers;
+        """
+        phone_rules = PHONE_NUMBER_RULES if phone_rules is None else phone_rules
+        phone_numbers = dataframe['phone_number'].str.replace(PHONE_JUNK_PATTERN, '', regex=True)
+        normalised = pd.Series(pd.NA, index=phone_numbers.index, dtype='object')
+
+        # Countries without a rule use the default one
+        known_country = dataframe['country_code'].isin(list(phone_rules))
+        masks = [(dataframe['country_code'] == country, rule) for country, rule in phone_rules.items()]
+        masks.append((~known_country, DEFAULT_PHONE_NUMBER_RULE))
+        for mask, rule in masks:
+            if mask.any():
+                # Cleaning country code from the phone number, when present, and adding the trunk prefix
+                normalised[mask] = rule['trunk_prefix'] + phone_numbers[mask].str[-rule['digits']:]
+
+        dataframe['phone_number'] = normalised
+        return dataframe
+
+    @instrumented
     def clean_card_data(self) -> pd.DataFrame:
         """
         Retrieves card data, cleans the data and upload to database with table name 'dim_card_details'
@@ -78,10 +241,14 @@ class DataCleaning:
         cards_df = pd.concat(self.dataframe)
 
         # Clean NULL values
+        rows = len(cards_df)
         cards_df = cards_df.loc[cards_df['card_number'] != 'NULL']
+        self.dropped_rows['card_number'] = rows - len(cards_df)
 
         # Clean gibberish by length of expiry_date
+        rows = len(cards_df)
         cards_df = cards_df[cards_df['expiry_date'].str.len()==5]
+        self.dropped_rows['expiry_date'] = rows - len(cards_df)
         
         # Correct date_payment_confirmed and card_number format
         cards_df = self.convert_to_datetime(cards_df, 'date_payment_confirmed')
@@ -93,6 +260,48 @@ class DataCleaning:
         return cards_df
 
 
+    def apply_rules(self, dataframe: pd.DataFrame, rules: dict[str, dict]) -> pd.DataFrame:
+        """
+        Apply a declarative rule set in one pass: regex scrubs, full-match patterns and allowed values per column
+        and numeric coercion. Rows dropped by each pattern and allowed-values rule are recorded in 'self.dropped_rows'.
+
+        Keyword arguments:
+            'dataframe': pd.DataFrame -- DataFrame to be cleaned;
+            'rules': dict[str, dict] -- Rule set with 'scrub', 'pattern', 'allowed' and 'numeric' entries (see STORE_DATA_RULES);
+
+        Returns:
+            'dataframe': pd.DataFrame -- DataFrame with the rules applied;
+        """
+        # Regex scrubs are computed on the columns, the source frame is not modified
+        columns = {}
+        for column, replacements in rules.get('scrub', {}).items():
+            values = dataframe[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Regex replace ignores categoricals, the categories are scrubbed and mapped back instead
+                categories = values.cat.categories
+                values = values.map(dict(zip(categories, categories.to_series().replace(replacements, regex=True))))
+            else:
+                values = values.replace(replacements, regex=True)
+            columns[column] = values
+
+        # Combine the pattern and allowed values masks, counting rows dropped by each rule
+        keep = pd.Series(True, index=dataframe.index)
+        for column, pattern in rules.get('pattern', {}).items():
+            matches = columns.get(column, dataframe[column]).astype('string').str.fullmatch(pattern).fillna(False).astype(bool)
+            self.dropped_rows[column] = int((keep & ~matches).sum())
+            keep &= matches
+        for column, allowed_values in rules.get('allowed', {}).items():
+            allowed = columns.get(column, dataframe[column]).isin(allowed_values)
+            self.dropped_rows[column] = int((keep & ~allowed).sum())
+            keep &= allowed
+
+        for column, dtype in rules.get('numeric', {}).items():
+            columns[column] = pd.to_numeric(columns.get(column, dataframe[column]), errors='coerce').astype(dtype)
+
+        dataframe = dataframe.loc[keep].assign(**{column: values[keep] for column, values in columns.items()})
+        return dataframe
+
+    @instrumented
     def clean_store_data(self) -> pd.DataFrame:
         """
         Retrieves store data, cleans the data and upload to database with table name 'dim_store_details'
@@ -100,83 +309,66 @@ class DataCleaning:
         Returns:
             'store_data_df': pd.DataFrame -- Clean stores dataframe;
         """
-        store_data_df = self.dataframe
-
-        # Clean continent mispelling
-        store_data_df["continent"] = store_data_df["continent"].str.replace('ee','')
-
-        #Clean gibberish values.
-        for index in store_data_df.index:
-            Europe_continent = False
-            America_continent = False
-            Europe_continent = store_data_df['continent'][index]=='Europe'
-            America_continent = store_data_df['continent'][index]=='America'
-            if Europe_continent is False and America_continent is False:
-                store_data_df = store_data_df.drop([index])
+        # Clean continent mispelling and gibberish values, correct staff_numbers numbers
+        store_data_df = self.apply_rules(self.dataframe, STORE_DATA_RULES)
 
         # Correct opening_date format
         store_data_df = self.convert_to_datetime(store_data_df, 'opening_date')
 
-        # Correct staff_numbers numbers
-        store_data_df['staff_numbers'].replace('\D+', '', regex=True, inplace=True)
-
         return store_data_df
 
-    def convert_product_weights(self) -> pd.DataFrame:
+    @instrumented
+    def convert_product_weights(self, unit_rules: dict[str, float] = None) -> pd.DataFrame:
         """
         Returns converted dataframe with column 'weight' in kg, with one decimal
-       
+
+        Keyword arguments:
+            'unit_rules': dict[str, float] -- Divisor to convert each unit into kg (defaults to WEIGHT_UNIT_RULES);
+
         Returns:
             'products_df': pd.DataFrame -- Products dataframe with weight units in kg;
         """
+        unit_rules = WEIGHT_UNIT_RULES if unit_rules is None else unit_rules
         products_df = self.dataframe
-        products_df["weight"] = products_df["weight"].str.replace('1160kg','1160g')
-        
-        for index in products_df.index:
-            if type(products_df['weight'][index]) == str:  # Skip empty cells
-
-                # Operations when value in kilograms
-                if products_df['weight'][index].find('kg')>0:  # String in kg
-
-                    # When multiplication is required
-                    if products_df['weight'][index].find('x')>0: # Returns >0 when 'x' is found
-                        numbers = re.findall(r'-?\d+\.?\d*', products_df['weight'][index])  # Extracts the numbers from the match
-                        total_weight = float((numbers[0]*numbers[1])) # Convert to float
-                        products_df.loc[products_df['weight'] == products_df['weight'][index],'weight'] = round(total_weight, 1) # Replace the string with the float
-                    
-                    # When multiplication is not required
-                    else:
-                        number = re.findall(r'-?\d+\.?\d*', products_df['weight'][index])  # Extracts the numbers from the match   
-                        total_weight = float(number[0]) # Convert to float
-                        products_df.loc[products_df['weight'] == products_df['weight'][index],'weight'] = round(total_weight, 1) # Replace the string with the float
-
-                # Operations when value in g or ml        
-                elif (products_df['weight'][index].find('g')>0 or 
-                      products_df['weight'][index].find('ml')>0): # Returns >0 when 'g' or 'ml' is found
-                    
-                    # When multiplication is required
-                    if products_df['weight'][index].find('x')>0:   # Returns >0 when 'x' is found
-                        numbers = re.findall(r'-?\d+\.?\d*', products_df['weight'][index])  # Extracts the numbers from the string
-                        total_weight = (float(numbers[0])*float(numbers[1])/1000)   # Convert to float in kg
-                        products_df.loc[products_df['weight'] == products_df['weight'][index],'weight'] = round(total_weight, 1) # Replace the string with the float
-                    
-                    # When multiplication is not required   
-                    else:
-                        number = re.findall(r'-?\d+\.?\d*', products_df['weight'][index]) # Extracts the number from the string
-                        total_weight = (float(number[0])/1000) # Convert to float
-                        products_df.loc[products_df['weight'] == products_df['weight'][index],'weight'] = round(total_weight, 1) # Replace the string with the float
-
-                # Operations when value in oz
-                elif products_df['weight'][index].find('oz')>0: # Returns >0 when 'oz' is found
-                    numbers = re.findall(r'-?\d+\.?\d*', products_df['weight'][index])  # Extracts the number from the string
-                    total_weight = (float(numbers[0])/35.274)   # Convert to float
-                    products_df.loc[products_df['weight'] == products_df['weight'][index],'weight'] = round(total_weight, 1) # Replace the string with the float
-
-        products_df = products_df[pd.to_numeric(products_df['weight'], errors='coerce').notnull()] # Eliminate NULL and gibberish values
-        products_df['weight'] = pd.to_numeric(products_df['weight'], errors='coerce') # Convert column to float64
+        weights = products_df['weight'].replace(WEIGHT_JUNK_VALUES)
+
+        # Split every value into multipack count, number and unit in a single pass
+        parts = weights.str.extract(self._weight_pattern(tuple(unit_rules)))
+        count = pd.to_numeric(parts['count'], errors='coerce').fillna(1)
+        value = pd.to_numeric(parts['value'], errors='coerce')
+        divisor = parts['unit'].map(unit_rules)
+        # Python round() on each distinct weight, as the row loop did: numpy rounds the scaled value half to even
+        # (1.95 -> 2.0 where round() gives 1.9), the rounded uniques are broadcast back with the codes, -1 (NaN) stays NaN
+        codes, unique_weights = pd.factorize(count * value / divisor)
+        rounded_weights = np.array([round(weight, 1) for weight in unique_weights], dtype='float64')
+        total_weight = pd.Series(np.append(rounded_weights, np.nan)[codes], index=products_df.index)
+
+        # Values without a unit are kept when already numeric, NULL and gibberish values are eliminated
+        total_weight = total_weight.fillna(pd.to_numeric(weights, errors='coerce'))
+        valid = total_weight.notnull()
+        self.dropped_rows['weight'] = int((~valid).sum())
+        products_df = products_df.loc[valid].assign(weight=total_weight[valid].astype('float64'))
 
         return products_df
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _weight_pattern(units: tuple[str]) -> re.Pattern:
+        """
+        Compile the weight pattern for the given units, longest unit first so 'kg' is not read as 'g'
+
+        Keyword arguments:
+            'units': tuple[str] -- Units accepted by the pattern;
+
+        Returns:
+            'pattern': re.Pattern -- Pattern with 'count', 'value' and 'unit' groups;
+        """
+        unit_group = '|'.join(re.escape(unit) for unit in sorted(units, key=len, reverse=True))
+        return re.compile(
+            r'^\s*(?:(?P<count>\d+(?:\.\d+)?)\s*x\s*)?(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>' + unit_group + r')(?![A-Za-z])'
+        )
     
+    @instrumented
     def clean_products_data(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         """
         Clean products dataframe (with 'weight' column in kg, 1 decimal) and returns dataframe
@@ -200,9 +392,32 @@ class DataCleaning:
         # Correct date_added format
         products_kg_df = self.convert_to_datetime(products_kg_df, 'date_added')
 
+        # Final column types: price without '£', weight class and availability as boolean
+        product_price = pd.to_numeric(products_kg_df['product_price'].astype('string').str.replace('£', '', regex=False),
+                                      errors='coerce').astype('float64')
+        weight_class = pd.cut(products_kg_df['weight'], bins=[-np.inf, *WEIGHT_CLASSES.values(), np.inf],
+                              labels=[*WEIGHT_CLASSES, 'Truck_Required'], right=False)
+        weight_class = weight_class.astype('string').fillna('Truck_Required')
+        still_available = products_kg_df['removed'].astype('object').map(PRODUCT_AVAILABILITY).astype('boolean')
+        products_kg_df = products_kg_df.rename(columns={'removed': 'still_available'}).assign(
+            product_price=product_price, still_available=still_available, weight_class=weight_class)
+
         return products_kg_df
     
 
+    @instrumented
+    def clean_date_events_data(self) -> pd.DataFrame:
+        """
+        Returns date events dataframe without the NULL and gibberish rows (month, year, day and time_period checked)
+
+        Returns:
+            'date_events_df': pd.DataFrame -- Clean date events dataframe;
+        """
+        date_events_df = self.apply_rules(self.dataframe, DATE_EVENTS_RULES)
+
+        return date_events_df
+
+    @instrumented
     def clean_orders_data(self) -> pd.DataFrame:
         """
         Returns orders dataframe with columns 'first_name', 'last_name' and '1' removed
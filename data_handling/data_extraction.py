@@ -1,25 +1,302 @@
+import gzip
+import hashlib
+import io
+import json
 import os
-import requests
-from io import StringIO
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, closing, contextmanager
+from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO
 import pandas as pd
-import boto3
-import tabula
-from sqlalchemy import engine
+from data_handling.instrumentation import instrumentation, instrumented
+
+# requests, boto3, tabula and sqlalchemy are imported by the methods using them, so that importing the pipelines
+# does not load the HTTP, S3 and PDF backends (and the JVM bridge of tabula) a run may never use
+if TYPE_CHECKING:
+    import botocore.client  # Annotations only
+    import sqlalchemy
+
+# HTTP status codes of transient store API failures, retried with backoff along with connection errors and timeouts
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Number of characters decoded at a time from JSON streams
+JSON_BLOCK_SIZE = 1024 ** 2
+
+# JVM options tabula.read_pdf starts its JVM with, so it does not warn about different options in the PDF workers
+TABULA_JAVA_OPTIONS = ('-Djava.awt.headless=true', '-Dfile.encoding=UTF8')
+
+# Page object of a PDF file ('/Type /Pages' is the page tree)
+PDF_PAGE_OBJECT = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# One '"key": scalar' entry of a column object followed by its separator
+JSON_ENTRY = re.compile(r'''
+    [ \t\n\r]*("[^"\\]*(?:\\.[^"\\]*)*")[ \t\n\r]*:[ \t\n\r]*
+    ("[^"\\]*(?:\\.[^"\\]*)*"|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)
+    [ \t\n\r]*([,}])
+''', re.VERBOSE)
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """
+    Return the number of pages of a PDF file by counting its page objects. The count can't be trusted when page
+    objects are hidden in compressed object streams or left behind by incremental updates, a ValueError is raised then.
+
+    Keyword arguments:
+        'pdf_path': str -- Path of the PDF file;
+
+    Returns:
+        'number_of_pages': int -- Number of pages;
+    """
+    with open(pdf_path, 'rb') as file:
+        content = file.read()
+    number_of_pages = len(PDF_PAGE_OBJECT.findall(content))
+    if number_of_pages == 0 or b'/ObjStm' in content or content.count(b'%%EOF') > 1:
+        raise ValueError(f"Can't count the pages of {pdf_path} from its page objects")
+    return number_of_pages
+
+
+def _count_worker_pdf_pages(pdf_path: str) -> int:
+    """
+    Count the pages of a PDF file in a PDF worker process, with the PDFBox library of the worker's tabula JVM when
+    the page objects can't be counted
+
+    Keyword arguments:
+        'pdf_path': str -- Path of the PDF file;
+
+    Returns:
+        'number_of_pages': int -- Number of pages;
+    """
+    try:
+        return count_pdf_pages(pdf_path)
+    except ValueError:
+        jpype = sys.modules.get('jpype')  # Loaded by tabula when it started the worker's JVM
+        if jpype is None or not jpype.isJVMStarted():
+            raise
+    document = jpype.JClass('org.apache.pdfbox.pdmodel.PDDocument').load(jpype.JClass('java.io.File')(pdf_path))
+    try:
+        number_of_pages = int(document.getNumberOfPages())
+    finally:
+        document.close()
+    if number_of_pages == 0:
+        raise ValueError(f"{pdf_path} has no pages")
+    return number_of_pages
+
+
+def _start_tabula_worker() -> None:
+    """
+    Start the JVM of a PDF worker process once, later tabula calls in the process reuse it
+    """
+    from tabula.backend import TabulaVm
+    TabulaVm(java_options=list(TABULA_JAVA_OPTIONS), silent=True)
+
+
+def _extract_pdf_pages(pdf_path: str, pages: list[int], cache_dir: str, document_hash: str) -> list[pd.DataFrame]:
+    """
+    Extract the tables of a range of pages, reading and filling the per-page cache
+
+    Keyword arguments:
+        'pdf_path': str -- Path of the PDF file;
+        'pages': list[int] -- Page numbers to extract;
+        'cache_dir': str -- Directory of the per-page cache (no cache when None);
+        'document_hash': str -- Hash of the PDF file content;
+
+    Returns:
+        'page_dfs': list[pd.DataFrame] -- Table of each page holding one;
+    """
+    import tabula
+    page_dfs = []
+    for page in pages:
+        cache_path = os.path.join(cache_dir, document_hash, f'{page}.parquet') if cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            page_df = pd.read_parquet(cache_path)
+        else:
+            tables = tabula.read_pdf(input_path=pdf_path, pages=page)
+            page_df = pd.concat(tables) if tables else pd.DataFrame()
+            if cache_path:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                try:
+                    page_df.to_parquet(cache_path + '.tmp')
+                    os.replace(cache_path + '.tmp', cache_path)
+                except (TypeError, ValueError):  # Mixed type columns can't be cached
+                    pass
+        if not page_df.empty:
+            page_dfs.append(page_df)
+    return page_dfs
+
+
+class RateLimiter:
+    def __init__(self, calls_per_second: float = None) -> None:
+        """
+        Thread-safe client-side rate limiter, spacing calls evenly
+
+        Keyword arguments:
+            'calls_per_second': float -- Maximum number of calls per second (no limit when None);
+        """
+        self.interval = 1 / calls_per_second if calls_per_second else 0
+        self.next_call = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        """
+        Block until the next call is allowed
+        """
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class JsonStreamDecoder:
+    def __init__(self, stream: BinaryIO, block_size: int = JSON_BLOCK_SIZE) -> None:
+        """
+        Incremental decoder of a column-oriented JSON document ({column: {index: value}}), reading the stream
+        block by block so the document text and its nested dictionaries are never held in memory
+
+        Keyword arguments:
+            'stream': file-like -- Binary stream of the UTF-8 JSON document;
+            'block_size': int -- Number of characters read at a time;
+        """
+        self.text = io.TextIOWrapper(stream, encoding='utf-8')
+        self.block_size = block_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+
+    def iter_columns(self) -> Iterator[tuple[str, list, list]]:
+        """
+        Decode the document one column at a time
+
+        Returns:
+            'columns': Iterator[tuple[str, list, list]] -- Name, index keys and values of each column;
+        """
+        self.expect('{')
+        if self.skip('}'):
+            return
+        while True:
+            column = self.value()
+            self.expect(':')
+            self.expect('{')
+            keys, values = self.entries()
+            yield column, keys, values
+            if self.expect(',}') == '}':
+                return
+
+    def entries(self) -> tuple[list, list]:
+        """
+        Decode the scalar entries of the current column object up to its closing brace. Entries are matched as raw
+        tokens block by block and decoded with a single json.loads call per column instead of one call per value.
+
+        Returns:
+            'entries': tuple[list, list] -- Keys and values of the column;
+        """
+        keys, values = [], []
+        if self.skip('}'):
+            return keys, values
+        while True:
+            # Consecutive complete entries of the buffer, the last one may be cut and is matched after the next read
+            scanner = JSON_ENTRY.scanner(self.buffer, self.position)
+            for match in iter(scanner.match, None):
+                key, value, separator = match.groups()
+                keys.append(key)
+                values.append(value)
+                self.position = match.end()
+                if separator == '}':
+                    return json.loads('[' + ','.join(keys) + ']'), json.loads('[' + ','.join(values) + ']')
+            if not self.fill():
+                raise ValueError("Invalid JSON document: column values must be strings, numbers, booleans or null")
+
+    def value(self) -> object:
+        """
+        Decode the next JSON value, reading more of the stream while it is cut at the end of the buffer
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next block
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.position = end
+            return value
+
+    def expect(self, characters: str) -> str:
+        """
+        Consume the next structural character, which must be one of 'characters'
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Invalid JSON document: expected one of {characters!r}, found {character or 'end of file'!r}")
+        self.position += 1
+        return character
+
+    def skip(self, character: str) -> bool:
+        """
+        Consume the next structural character when it is 'character'
+        """
+        if self.peek() != character:
+            return False
+        self.position += 1
+        return True
+
+    def peek(self) -> str:
+        """
+        Return the next non-whitespace character without consuming it, or '' at the end of the stream
+        """
+        while True:
+            self.position = JSON_WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return ''
+
+    def fill(self) -> bool:
+        """
+        Append the next block of the stream to the unread part of the buffer, False at the end of the stream
+        """
+        block = self.text.read(self.block_size)
+        if not block:
+            return False
+        self.buffer = self.buffer[self.position:] + block
+        self.position = 0
+        return True
 
 
 class DataExtractor:
-    def __init__(self, engine: engine = None, table_name: str = None, header: dict[str, str] = None) -> None:
+    s3_clients = {}
+    s3_client_lock = threading.Lock()
+
+    def __init__(self, engine: 'sqlalchemy.engine.Engine' = None, table_name: str = None, header: dict[str, str] = None,
+                 credentials: dict[str, str] = None) -> None:
         """
         This class provides functionality for extracting data from databases and return it in a structured format
         
         Keyword arguments:
             'engine': engine -- Engine object that allows connection to the database;
             'table_name': str -- Name of the table to be read from the RDS database;
+            'credentials': dict[str, str] -- S3 'key' and 'secret' (the AWS_* environment variables when None);
         """ 
         self.engine = engine
         self.table_name = table_name
         self.header = header
+        self.credentials = credentials
     
+    @instrumented
     def read_rds_table(self) -> pd.DataFrame:
         """
         Read RDS table using the instance table name and engine to connect
@@ -29,8 +306,78 @@ class DataExtractor:
         """
         rds_df = pd.read_sql_table(table_name=self.table_name, con=self.engine)
         return rds_df
+
+    def rds_fingerprint(self, key_column: str = 'index') -> str:
+        """
+        Return a cheap fingerprint of the RDS table: row count and largest key
+
+        Keyword arguments:
+            'key_column': str -- Column used as key;
+
+        Returns:
+            'fingerprint': str -- Fingerprint of the table content;
+        """
+        import sqlalchemy
+        query = sqlalchemy.select(sqlalchemy.func.count(), sqlalchemy.func.max(sqlalchemy.column(key_column))).select_from(sqlalchemy.table(self.table_name))
+        with self.engine.connect() as connection:
+            row_count, max_key = connection.execute(query).one()
+        return f'{row_count}:{max_key}'
+
+    @instrumented
+    def read_rds_table_since(self, key_column: str, watermark: any = None) -> pd.DataFrame:
+        """
+        Read only the RDS table rows with a key past the high-water mark
+
+        Keyword arguments:
+            'key_column': str -- Column used as incremental key (e.g. 'index');
+            'watermark': any -- Largest key already loaded, every row is read when None;
+
+        Returns:
+            'rds_df': pd.DataFrame -- DataFrame with the new rows, ordered by key;
+        """
+        rds_df = pd.read_sql_query(self.rows_since_query(key_column, watermark), con=self.engine)
+        return rds_df
+
+    def rows_since_query(self, key_column: str, watermark: any = None) -> 'sqlalchemy.Select':
+        """
+        Return the query of the RDS table rows with a key past the high-water mark, ordered by key
+
+        Keyword arguments:
+            'key_column': str -- Column used as incremental key (e.g. 'index');
+            'watermark': any -- Largest key already loaded, every row is selected when None;
+
+        Returns:
+            'query': sqlalchemy.Select -- Query of the new rows;
+        """
+        import sqlalchemy
+        query = sqlalchemy.select(sqlalchemy.text('*')).select_from(sqlalchemy.table(self.table_name))
+        if watermark is not None:
+            query = query.where(sqlalchemy.column(key_column) > watermark)
+        query = query.order_by(sqlalchemy.column(key_column))
+        return query
+
+    def read_rds_table_chunks(self, chunksize: int = 50000, key_column: str = None, watermark: any = None) -> Iterator[pd.DataFrame]:
+        """
+        Read RDS table in chunks through a server-side cursor, so memory is bounded by the chunk size
+
+        Keyword arguments:
+            'chunksize': int -- Number of rows per chunk;
+            'key_column': str -- Column used as incremental key, only rows past the watermark are read in key order when set;
+            'watermark': any -- Largest key already loaded, every row is read when None;
+
+        Returns:
+            'rds_chunks': Iterator[pd.DataFrame] -- DataFrames returned from RDS, one per chunk;
+        """
+        with self.engine.connect().execution_options(stream_results=True) as connection:
+            if key_column is None:
+                rds_chunks = pd.read_sql_table(table_name=self.table_name, con=connection, chunksize=chunksize)
+            else:
+                rds_chunks = pd.read_sql_query(self.rows_since_query(key_column, watermark), con=connection, chunksize=chunksize)
+            for rds_chunk in rds_chunks:
+                yield rds_chunk
     
     @staticmethod
+    @instrumented
     def retrieve_pdf_data(file_link: str) -> pd.DataFrame:
         """
         Retrieve all pages from PDF file
@@ -41,9 +388,56 @@ class DataExtractor:
         Returns : 
             'pdf_df': pd.DataFrame -- DataFrame from PDF file;
         """
+        import tabula
         pdf_df = tabula.read_pdf(input_path=file_link,pages='all')
         return pdf_df
     
+    @staticmethod
+    def retrieve_pdf_pages(file_link: str, max_workers: int = 4, pages_per_task: int = 10,
+                           cache_dir: str = '.pdf_page_cache') -> Iterator[pd.DataFrame]:
+        """
+        Retrieve the PDF tables page by page on a process pool, yielding each page's table as its range finishes.
+        Tables are cached per document hash and page number, the JVM is started once per worker.
+
+        Keyword arguments:
+            'file_link': str -- URL or local path of the PDF file;
+            'max_workers': int -- Number of worker processes;
+            'pages_per_task': int -- Number of pages extracted by each task;
+            'cache_dir': str -- Directory of the per-page cache (no cache when None);
+
+        Returns:
+            'pdf_pages': Iterator[pd.DataFrame] -- One DataFrame per page holding a table;
+        """
+        import requests
+        # Download the document once, hashing it on the way
+        with tempfile.TemporaryDirectory() as temporary_dir:
+            document_hash = hashlib.sha256()
+            if file_link.startswith(('http://', 'https://')):
+                pdf_path = os.path.join(temporary_dir, 'document.pdf')
+                with requests.get(file_link, stream=True) as response, open(pdf_path, 'wb') as file:
+                    response.raise_for_status()
+                    for block in response.iter_content(chunk_size=1024 ** 2):
+                        document_hash.update(block)
+                        file.write(block)
+            else:
+                pdf_path = file_link
+                with open(pdf_path, 'rb') as file:
+                    for block in iter(lambda: file.read(1024 ** 2), b''):
+                        document_hash.update(block)
+            instrumentation.add_bytes(os.path.getsize(pdf_path))
+
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_start_tabula_worker) as executor:
+                # Counted in a worker, whose JVM can read the pages the page objects don't reveal
+                number_of_pages = executor.submit(_count_worker_pdf_pages, pdf_path).result()
+                page_ranges = [range(start, min(start + pages_per_task, number_of_pages + 1))
+                               for start in range(1, number_of_pages + 1, pages_per_task)]
+                futures = [executor.submit(_extract_pdf_pages, pdf_path, list(pages), cache_dir, document_hash.hexdigest())
+                           for pages in page_ranges]
+                for future in as_completed(futures):
+                    for page_df in future.result():
+                        yield page_df
+
+    @instrumented
     def list_number_of_stores(self, endpoint: str) -> dict[str, int]:
         """
         Returns the number of stores
@@ -54,14 +448,17 @@ class DataExtractor:
         Returns:
             'number_stores': dict[str, int] -- Dictionary with operation status code and number of stores;
         """
+        import requests
         self.endpoint = endpoint
 
         try:
             response = requests.get(self.endpoint, headers=self.header)
             response.raise_for_status()
             number_stores = response.json()
+            instrumentation.add_bytes(len(response.content))
         except requests.exceptions.RequestException as exception:
             print(f"Request failed: {exception}")
+            instrumentation.add_error()
             number_stores = None
         finally:
             if response:
@@ -79,6 +476,7 @@ class DataExtractor:
         Returns:
             'stores_df': dict[*] -- Dictionary with complete data for a store;
         """
+        import requests
         self.endpoint = endpoint
 
         try:
@@ -94,33 +492,257 @@ class DataExtractor:
 
         return stores_df
     
-    def extract_from_s3(self, address: str) -> pd.DataFrame:
+    @instrumented
+    def retrieve_all_stores_data(self, endpoint: str, number_of_stores: int, max_workers: int = 8,
+                                 retries: int = 3, backoff: float = 0.5, calls_per_second: float = None) -> pd.DataFrame:
         """
-        Extract and returns dataframe from S3
-        
+        Retrieve the data of every store concurrently, using a pooled HTTP session
+
+        Keyword arguments:
+            'endpoint': str -- Store endpoint, formatted with the store number;
+            'number_of_stores': int -- Number of stores to retrieve;
+            'max_workers': int -- Maximum number of concurrent requests;
+            'retries': int -- Number of retries of a request failing with a connection error, timeout or RETRY_STATUS_CODES;
+            'backoff': float -- Seconds waited before the first retry, doubled on each retry;
+            'calls_per_second': float -- Client-side rate limit (no limit when None);
+
+        Returns:
+            'stores_df': pd.DataFrame -- DataFrame with one row per store retrieved;
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        rate_limiter = RateLimiter(calls_per_second)
+
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(self.header or {})
+
+            def retrieve_store(store: int) -> dict:
+                store_endpoint = endpoint.format(store)
+                for attempt in range(retries + 1):
+                    rate_limiter.wait()
+                    try:
+                        with session.get(store_endpoint) as response:
+                            response.raise_for_status()
+                            transferred.append(len(response.content))
+                            return response.json()
+                    except requests.exceptions.RequestException as exception:
+                        # Client errors (e.g. 404, 403) and invalid responses fail at once, they won't succeed later
+                        status_code = exception.response.status_code if exception.response is not None else None
+                        transient = (isinstance(exception, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                                     or status_code in RETRY_STATUS_CODES)
+                        if attempt == retries or not transient:
+                            print(f"Request failed: {exception}")
+                            failures.append(store)
+                            return None
+                        time.sleep(backoff * 2 ** attempt)
+
+            # Worker threads collect bytes and failures, recorded in the stage once all requests are done
+            transferred, failures = [], []
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                stores_data = list(executor.map(retrieve_store, range(number_of_stores)))
+            instrumentation.add_bytes(sum(transferred))
+            for _ in failures:
+                instrumentation.add_error()
+
+        # Build the DataFrame once from the collected records, skipping failed requests
+        stores_df = pd.DataFrame([store_data for store_data in stores_data if store_data is not None])
+        return stores_df
+
+    def source_fingerprint(self, address: str) -> str:
+        """
+        Return a fingerprint of a file source: the ETag for S3 and HTTP objects, otherwise a hash of the content
+
+        Keyword arguments:
+            'address': str -- S3 address, URL or local path of the source;
+
+        Returns:
+            'fingerprint': str -- Fingerprint of the source content;
+        """
+        if address.startswith('s3://'):
+            bucket, _, key = address.replace("s3://","").partition("/")
+            return self.get_s3_client(self.credentials).head_object(Bucket=bucket, Key=key)['ETag']
+
+        content_hash = hashlib.sha256()
+        if address.startswith(('http://', 'https://')):
+            import requests
+            with requests.head(address, headers=self.header, allow_redirects=True) as response:
+                if response.ok and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+                    return response.headers.get('ETag') or response.headers['Last-Modified']
+            with requests.get(address, headers=self.header, stream=True) as response:
+                response.raise_for_status()
+                for block in response.iter_content(chunk_size=1024 ** 2):
+                    content_hash.update(block)
+        else:
+            with open(address, 'rb') as file:
+                for block in iter(lambda: file.read(1024 ** 2), b''):
+                    content_hash.update(block)
+        return content_hash.hexdigest()
+
+    @classmethod
+    def get_s3_client(cls, credentials: dict[str, str] = None) -> 'botocore.client.BaseClient':
+        """
+        Return the S3 client of a set of credentials, created on first use and shared by every extractor
+
+        Keyword arguments:
+            'credentials': dict[str, str] -- S3 'key' and 'secret' (the AWS_* environment variables when None);
+
+        Returns:
+            's3_client': boto3.client -- S3 client (AWS_ENDPOINT_URL points it to a local S3 stand-in);
+        """
+        client_key = (credentials['key'], credentials['secret']) if credentials else None
+        with cls.s3_client_lock:
+            if client_key not in cls.s3_clients:
+                import boto3
+                if credentials:
+                    access_key, secret_key, session_token = credentials['key'], credentials['secret'], None
+                else:
+                    access_key, secret_key, session_token = (os.environ.get('AWS_ACCESS_KEY_ID'),
+                        os.environ.get('AWS_SECRET_ACCESS_KEY'), os.environ.get('AWS_SESSION_TOKEN'))
+                cls.s3_clients[client_key] = boto3.client('s3',
+                    aws_access_key_id=access_key,
+                    aws_secret_access_key=secret_key,
+                    aws_session_token=session_token,
+                    endpoint_url=os.environ.get('AWS_ENDPOINT_URL')
+                )
+        return cls.s3_clients[client_key]
+
+    @instrumented
+    def extract_from_s3(self, address: str, chunksize: int = None) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        """
+        Extract and returns dataframe from S3, streaming the object body straight into the parser.
+        CSV (default) and Parquet ('.parquet') objects are supported, optionally compressed ('.gz' or '.zst').
+
         Keyword arguments:
             'address': str -- Address to extract data from;
+            'chunksize': int -- Number of rows per DataFrame, the whole object is returned when None;
         
         Returns:
-            'products_df': pd.dataframe -- DataFrame from S3 address;
+            'products_df': pd.dataframe -- DataFrame from S3 address, or an iterator of DataFrames when chunksize is set;
         """
         self.address = address
-
-        # Connect to S3
-        client = boto3.client('s3',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY '),
-            aws_session_token=os.environ.get('AWS_SESSION_TOKEN ')
-        )
-
-        # Separate the bucket and key from address parameter
-        path_parts=address.replace("s3://","").split("/")
-        bucket=path_parts.pop(0)
-        key="/".join(path_parts)
-
-        # Download csv object
-        csv_obj = client.get_object(Bucket=bucket, Key=key)
-        body = csv_obj['Body']
-        csv_string = body.read().decode('utf-8')
-        products_df = pd.read_csv(StringIO(csv_string)) 
+        if chunksize:
+            return self.extract_chunks(address, chunksize)
+        with self.open_stream(address) as (body, extension):
+            if extension in ('.parquet', '.pq'):
+                return self.read_parquet(body)
+            products_df = pd.read_csv(body)
         return products_df
+
+    def extract_chunks(self, address: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Stream a CSV or Parquet source in DataFrames of 'chunksize' rows, the source is closed once the chunks
+        are consumed or the iterator is closed
+
+        Keyword arguments:
+            'address': str -- S3 address, URL or local path of the source;
+            'chunksize': int -- Number of rows per DataFrame;
+
+        Returns:
+            'chunks': Iterator[pd.DataFrame] -- DataFrames of the source, one per chunk;
+        """
+        with self.open_stream(address) as (body, extension):
+            if extension in ('.parquet', '.pq'):
+                yield from self.read_parquet(body, chunksize)
+                return
+            with pd.read_csv(body, chunksize=chunksize) as reader:
+                yield from reader
+
+    @contextmanager
+    def open_stream(self, address: str) -> Iterator[tuple[BinaryIO, str]]:
+        """
+        Open a binary stream of an S3 object, URL or local file, decompressing '.gz' and '.zst' sources on the fly.
+        The decompressor and the S3 body, response or file under it are closed on leaving the context.
+
+        Keyword arguments:
+            'address': str -- S3 address, URL or local path of the source;
+
+        Returns:
+            'stream': Iterator[tuple[BinaryIO, str]] -- Context of the decompressed stream and extension of its format
+                                                         (e.g. '.csv', '.json');
+        """
+        with ExitStack() as stack:
+            if address.startswith('s3://'):
+                # Separate the bucket and key from address parameter
+                bucket, _, key = address.replace("s3://","").partition("/")
+                s3_object = self.get_s3_client(self.credentials).get_object(Bucket=bucket, Key=key)
+                instrumentation.add_bytes(s3_object.get('ContentLength'))
+                body = stack.enter_context(closing(s3_object['Body']))
+            elif address.startswith(('http://', 'https://')):
+                import requests
+                response = stack.enter_context(requests.get(address, headers=self.header, stream=True))
+                response.raise_for_status()
+                instrumentation.add_bytes(response.headers.get('Content-Length'))
+                response.raw.decode_content = True  # Undo the transfer encoding (e.g. gzip) of the response
+                key, body = address.split('?')[0], response.raw
+            else:
+                key, body = address, stack.enter_context(open(address, 'rb'))
+
+            name, extension = os.path.splitext(key.lower())
+            if extension in ('.gz', '.gzip'):
+                body = stack.enter_context(gzip.GzipFile(fileobj=body, mode='rb'))
+                name, extension = os.path.splitext(name)
+            elif extension in ('.zst', '.zstd'):
+                import zstandard  # Optional dependency, only needed for zstd objects
+                body = stack.enter_context(zstandard.ZstdDecompressor().stream_reader(body))
+                name, extension = os.path.splitext(name)
+            yield body, extension
+
+    def extract_date_events(self, address: str, chunksize: int = 100000) -> Iterator[pd.DataFrame]:
+        """
+        Stream the date events JSON in DataFrames of 'chunksize' rows, with every value kept as read (no type inference).
+        Line-delimited documents ('.jsonl' or '.ndjson', one record per line) are read one chunk at a time;
+        column-oriented documents ({column: {index: value}}, like date_details.json) are decoded incrementally
+        into column arrays, without building the nested dictionaries of the whole document.
+
+        Keyword arguments:
+            'address': str -- S3 address, URL or local path of the JSON document;
+            'chunksize': int -- Number of rows per DataFrame;
+
+        Returns:
+            'date_events_chunks': Iterator[pd.DataFrame] -- Date events DataFrames, one per chunk;
+        """
+        with self.open_stream(address) as (stream, extension):
+            if extension in ('.jsonl', '.ndjson'):
+                with pd.read_json(stream, lines=True, chunksize=chunksize, dtype=False, convert_dates=False) as reader:
+                    yield from reader
+                return
+
+            columns, index = {}, None
+            for column, keys, values in JsonStreamDecoder(stream).iter_columns():
+                # The dtype of each column is inferred from all its values, like pd.read_json(dtype=False) does,
+                # so every chunk gets the dtype of the whole read (e.g. str on pandas 3), and NULLs are NaN like there
+                values = pd.Series(values, index=keys)
+                values = values.mask(values.isna())
+                if index is None:
+                    index = values.index
+                elif not values.index.equals(index):
+                    values = values.reindex(index)
+                columns[column] = values.array
+
+        rows = 0 if index is None else len(index)
+        for start in range(0, rows, chunksize):
+            yield pd.DataFrame({column: values[start:start + chunksize] for column, values in columns.items()},
+                               index=pd.RangeIndex(start, min(start + chunksize, rows)))
+
+    @staticmethod
+    def read_parquet(stream: BinaryIO, chunksize: int = None) -> pd.DataFrame | Iterator[pd.DataFrame]:
+        """
+        Read a Parquet stream, Parquet needs random access so the stream is buffered once
+
+        Keyword arguments:
+            'stream': file-like -- Parquet stream;
+            'chunksize': int -- Number of rows per DataFrame, the whole file is returned when None;
+
+        Returns:
+            'parquet_df': pd.DataFrame -- DataFrame from the stream, or an iterator of DataFrames when chunksize is set;
+        """
+        import pyarrow.parquet as pq  # Optional dependency, only needed for Parquet objects
+
+        parquet_file = pq.ParquetFile(BytesIO(stream.read()))
+        if chunksize:
+            return (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunksize))
+        parquet_df = parquet_file.read().to_pandas()
+        return parquet_df
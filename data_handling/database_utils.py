@@ -1,6 +1,245 @@
-import pandas as pd
+from __future__ import annotations
+
+import atexit
+import datetime
+import itertools
+import os
+import threading
+import time
+from collections.abc import Iterable
+from io import StringIO
+from typing import TYPE_CHECKING
 import yaml
 import sqlalchemy
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.pool import QueuePool
+from data_handling.instrumentation import instrumentation, instrumented
+
+if TYPE_CHECKING:
+    import pandas as pd  # Annotations only, pandas is loaded by the methods building frames (list_db_tables never does)
+
+
+# INSERT constructs supporting ON CONFLICT, per dialect
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+# UUID columns: native UUID on PostgreSQL, the dashed text elsewhere (sqlalchemy.Uuid stores dashless hex without native type)
+UUID_TYPE = sqlalchemy.VARCHAR(36).with_variant(sqlalchemy.Uuid(as_uuid=False), 'postgresql')
+
+# Final column types of the star-schema tables, tables are created with them before the bulk load
+STAR_SCHEMA_TYPES = {
+    'orders_table': {
+        'date_uuid': UUID_TYPE,
+        'user_uuid': UUID_TYPE,
+        'card_number': sqlalchemy.VARCHAR(19),
+        'store_code': sqlalchemy.VARCHAR(12),
+        'product_code': sqlalchemy.VARCHAR(11),
+        'product_quantity': sqlalchemy.SmallInteger(),
+    },
+    'dim_users': {
+        'first_name': sqlalchemy.VARCHAR(255),
+        'last_name': sqlalchemy.VARCHAR(255),
+        'date_of_birth': sqlalchemy.Date(),
+        'country_code': sqlalchemy.VARCHAR(2),
+        'user_uuid': UUID_TYPE,
+        'join_date': sqlalchemy.Date(),
+    },
+    'dim_store_details': {
+        'longitude': sqlalchemy.Float(),
+        'locality': sqlalchemy.VARCHAR(255),
+        'store_code': sqlalchemy.VARCHAR(12),
+        'staff_numbers': sqlalchemy.SmallInteger(),
+        'opening_date': sqlalchemy.Date(),
+        'store_type': sqlalchemy.VARCHAR(255),
+        'latitude': sqlalchemy.Float(),
+        'country_code': sqlalchemy.VARCHAR(2),
+        'continent': sqlalchemy.VARCHAR(255),
+    },
+    'dim_products': {
+        'product_price': sqlalchemy.Float(),
+        'weight': sqlalchemy.Float(),
+        'EAN': sqlalchemy.VARCHAR(13),
+        'product_code': sqlalchemy.VARCHAR(11),
+        'date_added': sqlalchemy.Date(),
+        'uuid': UUID_TYPE,
+        'still_available': sqlalchemy.Boolean(),
+        'weight_class': sqlalchemy.VARCHAR(14),
+    },
+    'dim_date_times': {
+        'month': sqlalchemy.VARCHAR(2),
+        'year': sqlalchemy.VARCHAR(4),
+        'day': sqlalchemy.VARCHAR(2),
+        'time_period': sqlalchemy.VARCHAR(10),
+        'date_uuid': UUID_TYPE,
+    },
+    'dim_card_details': {
+        'card_number': sqlalchemy.VARCHAR(19),
+        'expiry_date': sqlalchemy.VARCHAR(5),
+        'date_payment_confirmed': sqlalchemy.Date(),
+    },
+}
+
+# Maximum number of bound variables in one SQLite statement
+SQLITE_MAX_VARIABLES = 32766
+
+# pandas dtype of the empty columns standing for a SQL column, per Python type of its values (other types are object)
+EMPTY_COLUMN_DTYPES = {
+    int: 'int64',
+    float: 'float64',
+    bool: 'bool',
+    datetime.date: 'datetime64[ns]',
+    datetime.datetime: 'datetime64[ns]',
+}
+
+# Connection pool settings of the engines created by the registry (not applied to SQLite)
+POOL_SETTINGS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_recycle': 1800,
+}
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool measuring the time spent waiting for a connection on checkout
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_seconds = self.wait_seconds
+        return pool
+
+
+class EngineRegistry:
+    def __init__(self) -> None:
+        """
+        Process-wide registry of engines keyed by connection URL, with a cache of the parsed yaml files
+        """
+        self.engines = {}
+        self.checkouts = {}
+        self.emitted = {}
+        self.yaml_files = {}
+        self.lock = threading.Lock()
+
+    def read_yaml(self, filename: str) -> dict[str, any]:
+        """
+        Return the content of a yaml file, parsed only once per process
+
+        Keyword arguments:
+            'filename': str -- Path of the yaml file (e.g. db_creds.yaml, postgres_link.yaml);
+
+        Returns:
+            'data': dict -- Dictionary with the content of the yaml file;
+        """
+        path = os.path.abspath(filename)
+        with self.lock:
+            if path not in self.yaml_files:
+                with open(path, 'r') as file:
+                    self.yaml_files[path] = yaml.safe_load(file)
+            return self.yaml_files[path]
+
+    def get_engine(self, url: str | sqlalchemy.URL) -> sqlalchemy.Engine:
+        """
+        Return the shared engine for a URL, creating it with a tuned pool on first use
+
+        Keyword arguments:
+            'url': str | sqlalchemy.URL -- Connection URL;
+
+        Returns:
+            'engine': engine -- Engine object shared by every caller using the same URL;
+        """
+        url = sqlalchemy.make_url(url)
+        key = url.render_as_string(hide_password=False)
+        with self.lock:
+            if key not in self.engines:
+                if url.get_backend_name() == 'sqlite':
+                    engine = sqlalchemy.create_engine(url, pool_pre_ping=True)
+                else:
+                    engine = sqlalchemy.create_engine(url, poolclass=TimedQueuePool, pool_pre_ping=True, **POOL_SETTINGS)
+                self.checkouts[key] = 0
+                sqlalchemy.event.listen(engine, 'checkout', lambda *args, key=key: self._count_checkout(key))
+                self.engines[key] = engine
+            return self.engines[key]
+
+    def _count_checkout(self, key: str) -> None:
+        with self.lock:
+            self.checkouts[key] += 1
+
+    def pool_metrics(self) -> dict[str, dict]:
+        """
+        Return pool checkout and wait metrics of every engine, keyed by URL (password hidden)
+
+        Returns:
+            'metrics': dict[str, dict] -- Checkouts, connections checked out and seconds waited per engine;
+        """
+        with self.lock:
+            return {
+                engine.url.render_as_string(hide_password=True): {
+                    'checkouts': self.checkouts[key],
+                    'checked_out': engine.pool.checkedout() if hasattr(engine.pool, 'checkedout') else None,
+                    'wait_seconds': getattr(engine.pool, 'wait_seconds', None),
+                    'status': engine.pool.status(),
+                }
+                for key, engine in self.engines.items()
+            }
+
+    def emit_pool_metrics(self) -> None:
+        """
+        Emit a pool record per engine to the instrumentation: checkouts and seconds waited since the last emission
+        (so records from several emissions or processes add up) and connections still checked out
+        """
+        for url, metrics in self.pool_metrics().items():
+            checkouts, wait_seconds = self.emitted.get(url, (0, 0.0))
+            self.emitted[url] = (metrics['checkouts'], metrics['wait_seconds'] or 0.0)
+            instrumentation.emit({
+                'kind': 'pool',
+                'engine': url,
+                'checkouts': metrics['checkouts'] - checkouts,
+                'wait_seconds': None if metrics['wait_seconds'] is None else metrics['wait_seconds'] - wait_seconds,
+                'checked_out': metrics['checked_out'],
+            })
+
+    def dispose_all(self) -> None:
+        """
+        Close the connections of every engine and empty the registry
+        """
+        with self.lock:
+            for engine in self.engines.values():
+                engine.dispose()
+            self.engines.clear()
+            self.checkouts.clear()
+            self.emitted.clear()
+
+    def reset_after_fork(self) -> None:
+        """
+        Empty the registry of a forked process without closing the parent's connections: the child creates its own
+        engines, and its pool metrics only count its own checkouts
+        """
+        self.lock = threading.Lock()
+        for engine in self.engines.values():
+            engine.dispose(close=False)
+        self.engines.clear()
+        self.checkouts.clear()
+        self.emitted.clear()
+
+
+engine_registry = EngineRegistry()
+atexit.register(engine_registry.dispose_all)
+instrumentation.collectors.append(engine_registry.emit_pool_metrics)
+if hasattr(os, 'register_at_fork'):  # Not available on Windows, where worker processes are spawned
+    os.register_at_fork(after_in_child=engine_registry.reset_after_fork)
 
 
 class DatabaseConnector:
@@ -24,9 +263,8 @@ class DatabaseConnector:
         Returns:
             'data': dict -- Dictionary containing the credentials from yaml file;
         """
-        with open(self.filename, 'r') as file:
-            data = yaml.safe_load(file)
-            return data
+        data = engine_registry.read_yaml(self.filename)
+        return data
 
     def init_db_engine(self) -> sqlalchemy.engine:
         """
@@ -47,8 +285,19 @@ class DatabaseConnector:
             database=credentials['RDS_DATABASE'],
             )
         
-        # Create engine object
-        engine = sqlalchemy.create_engine(url_object)
+        # Get the shared engine object
+        engine = engine_registry.get_engine(url_object)
+        return engine
+
+    def init_link_engine(self) -> sqlalchemy.engine:
+        """
+        Return engine object for the database URL in the instance file (e.g. postgres_link.yaml)
+
+        Returns:
+            'engine': engine -- Engine object using the 'url' from the yaml file;
+        """
+        database_link = engine_registry.read_yaml(self.filename)
+        engine = engine_registry.get_engine(database_link['url'])
         return engine
 
     def list_db_tables(self) -> list[str]:
@@ -65,13 +314,300 @@ class DatabaseConnector:
         table_names = inspector.get_table_names()
         return table_names
 
-    def upload_to_db(self) -> None:
+    def column_types(self, dataframe: pd.DataFrame) -> dict[str, sqlalchemy.types.TypeEngine]:
+        """
+        Return the final star-schema type of each column of the DataFrame defined in STAR_SCHEMA_TYPES
+
+        Keyword arguments:
+            'dataframe': pd.DataFrame -- DataFrame to be uploaded to the instance table;
+
+        Returns:
+            'column_types': dict -- SQLAlchemy type per column, other columns keep the type inferred by pandas;
+        """
+        table_types = STAR_SCHEMA_TYPES.get(self.table_name, {})
+        column_types = {column: table_types[column] for column in dataframe.columns if column in table_types}
+        return column_types
+
+    def cast_to_schema(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast the values of the DataFrame to what the final column types store (e.g. dates without time)
+
+        Keyword arguments:
+            'dataframe': pd.DataFrame -- DataFrame to be uploaded to the instance table;
+
+        Returns:
+            'dataframe': pd.DataFrame -- DataFrame with the values cast;
+        """
+        import pandas as pd
+
+        date_columns = [column for column, column_type in self.column_types(dataframe).items()
+                        if isinstance(column_type, sqlalchemy.Date) and pd.api.types.is_datetime64_any_dtype(dataframe[column])]
+        if date_columns:
+            dataframe = dataframe.assign(**{column: dataframe[column].dt.normalize() for column in date_columns})
+        return dataframe
+
+    def run_sql_file(self, sql_filename: str) -> None:
+        """
+        Run the statements of a SQL file (e.g. star_based_schema.sql) inside a single transaction
+
+        Keyword arguments:
+            'sql_filename': str -- Path of the SQL file;
+        """
+        with open(sql_filename, 'r', encoding='utf-8') as file:
+            sql = file.read()
+        engine = self.init_link_engine()
+        with engine.begin() as connection:
+            connection.exec_driver_sql(sql)
+
+    def upload_to_db(self, batch_size: int = 10000, replace: bool = True) -> None:
         """
         Upload dataframe to database
+
+        Keyword arguments:
+            'batch_size': int -- Number of rows sent per COPY (PostgreSQL) or multi-row INSERT batch;
+            'replace': bool -- Replace the table, otherwise append the rows to it (creating it when missing);
+        """
+        self.upload_chunks_to_db([self.dataframe], batch_size=batch_size, replace=replace)
+
+    @instrumented
+    def upload_chunks_to_db(self, chunks: Iterable[pd.DataFrame], batch_size: int = 10000, replace: bool = True) -> int:
+        """
+        Upload DataFrame chunks to database inside a single transaction, replacing the table.
+        On PostgreSQL the chunks are streamed with COPY into a staging table that is swapped in at the end
+        (foreign keys of other tables referencing the table are dropped, star_schema adds them back),
+        other dialects use batched multi-row INSERTs. The load rate is kept in 'self.rows_per_second'.
+        With 'replace' False the rows are appended to the table instead, creating it when missing.
+        Without any chunk the table is still replaced, or created, empty (see empty_frame).
+
+        Keyword arguments:
+            'chunks': Iterable[pd.DataFrame] -- DataFrames to be uploaded, consumed one at a time;
+            'batch_size': int -- Number of rows sent per COPY or INSERT batch;
+            'replace': bool -- Replace the table, otherwise append the rows to it;
+
+        Returns:
+            'rows': int -- Number of rows uploaded;
         """
         # Connect to local database
-        with open(self.filename, 'r') as file:
-            database_link = yaml.safe_load(file)
-        engine = sqlalchemy.create_engine(database_link['url'])
-        
-        self.dataframe.to_sql(self.table_name,engine,if_exists='replace',index=False)
\ No newline at end of file
+        engine = self.init_link_engine()
+
+        chunks = iter(chunks)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            # No rows: the old rows must not be kept as if they had been loaded again
+            first_chunk = self.empty_frame(engine)
+        chunks = itertools.chain([first_chunk], chunks)
+
+        rows = 0
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            if connection.dialect.name == 'postgresql':
+                staging_table = f'{self.table_name}_staging' if replace else self.table_name
+                staging_created = False
+                for chunk in chunks:
+                    chunk = self.cast_to_schema(chunk)
+                    if not staging_created:
+                        # Create the staging table with the final column types
+                        chunk.head(0).to_sql(staging_table, connection, if_exists='replace' if replace else 'append',
+                                             index=False, dtype=self.column_types(chunk))
+                        staging_created = True
+                    self.copy_to_table(connection, chunk, staging_table, batch_size)
+                    rows += len(chunk)
+                    instrumentation.add_bytes(chunk.memory_usage(index=False).sum())
+                if staging_created and replace:
+                    # Swap the staging table in, atomically with the load
+                    self.drop_referencing_foreign_keys(connection)
+                    connection.execute(sqlalchemy.text(f'DROP TABLE IF EXISTS "{self.table_name}"'))
+                    connection.execute(sqlalchemy.text(f'ALTER TABLE "{staging_table}" RENAME TO "{self.table_name}"'))
+            else:
+                for index, chunk in enumerate(chunks):
+                    chunk = self.cast_to_schema(chunk)
+                    # Keep each INSERT under the SQLite limit of bound variables
+                    chunksize = batch_size
+                    if connection.dialect.name == 'sqlite':
+                        chunksize = max(1, min(batch_size, SQLITE_MAX_VARIABLES // max(1, len(chunk.columns))))
+                    chunk.to_sql(self.table_name, connection, if_exists='replace' if index == 0 and replace else 'append',
+                                 index=False, method='multi', chunksize=chunksize, dtype=self.column_types(chunk))
+                    rows += len(chunk)
+                    instrumentation.add_bytes(chunk.memory_usage(index=False).sum())
+
+        elapsed = time.perf_counter() - start
+        self.rows_per_second = rows / elapsed if elapsed else float('inf')
+        return rows
+
+    def empty_frame(self, engine: sqlalchemy.Engine) -> pd.DataFrame:
+        """
+        Return an empty DataFrame with the columns of the instance table, or of STAR_SCHEMA_TYPES when it is missing,
+        uploaded when there is no chunk to upload
+
+        Keyword arguments:
+            'engine': sqlalchemy.Engine -- Engine of the database;
+
+        Returns:
+            'empty_df': pd.DataFrame -- DataFrame without rows, its dtypes following the SQL column types;
+        """
+        import pandas as pd
+
+        inspector = sqlalchemy.inspect(engine)
+        if inspector.has_table(self.table_name):
+            columns = {column['name']: column['type'] for column in inspector.get_columns(self.table_name)}
+        else:
+            columns = STAR_SCHEMA_TYPES.get(self.table_name, {})
+        if not columns:
+            raise ValueError(f"No rows to upload to '{self.table_name}' and no known columns to create it with")
+
+        empty_df = pd.DataFrame({column: pd.Series(dtype=EMPTY_COLUMN_DTYPES.get(_python_type(column_type), object))
+                                 for column, column_type in columns.items()})
+        return empty_df
+
+    def drop_referencing_foreign_keys(self, connection: sqlalchemy.Connection) -> list[str]:
+        """
+        Drop the foreign keys of other tables referencing the instance table (PostgreSQL), so it can be replaced
+        by a reload (e.g. the keys of orders_table on dim_users). star_based_schema.sql adds them back.
+
+        Keyword arguments:
+            'connection': sqlalchemy.Connection -- Open connection to the PostgreSQL database, in the load transaction;
+
+        Returns:
+            'foreign_keys': list[str] -- Foreign keys dropped, as '<table>.<constraint>';
+        """
+        query = sqlalchemy.text(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = to_regclass(:table_name) AND conrelid <> confrelid"
+        )
+        foreign_keys = connection.execute(query, {'table_name': f'"{self.table_name}"'}).all()
+        for table_name, constraint_name in foreign_keys:
+            connection.execute(sqlalchemy.text(f'ALTER TABLE {table_name} DROP CONSTRAINT "{constraint_name}"'))
+        foreign_keys = [f'{table_name}.{constraint_name}' for table_name, constraint_name in foreign_keys]
+        instrumentation.add_metrics(foreign_keys_dropped=len(foreign_keys))
+        return foreign_keys
+
+    @staticmethod
+    def copy_to_table(connection: sqlalchemy.Connection, dataframe: pd.DataFrame, table_name: str, batch_size: int) -> None:
+        """
+        Stream a DataFrame as CSV into a PostgreSQL table with COPY FROM STDIN (psycopg2 or psycopg 3 driver)
+
+        Keyword arguments:
+            'connection': sqlalchemy.Connection -- Open connection to the PostgreSQL database;
+            'dataframe': pd.DataFrame -- DataFrame to be copied;
+            'table_name': str -- Name of the target table;
+            'batch_size': int -- Number of rows sent per COPY;
+        """
+        columns = ', '.join(f'"{column}"' for column in dataframe.columns)
+        copy_sql = f'COPY "{table_name}" ({columns}) FROM STDIN WITH (FORMAT csv)'
+        with connection.connection.cursor() as cursor:
+            for start in range(0, len(dataframe), batch_size):
+                buffer = StringIO()
+                dataframe.iloc[start:start + batch_size].to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+                if hasattr(cursor, 'copy_expert'):  # psycopg2
+                    cursor.copy_expert(copy_sql, buffer)
+                else:  # psycopg 3
+                    with cursor.copy(copy_sql) as copy:
+                        copy.write(buffer.getvalue())
+
+    def read_watermark(self, key_column: str) -> any:
+        """
+        Return the high-water mark of the instance table: the largest value of the key column already loaded
+
+        Keyword arguments:
+            'key_column': str -- Column used as incremental key (e.g. 'index');
+
+        Returns:
+            'watermark': any -- Largest key loaded, or None when the table is missing or empty;
+        """
+        engine = self.init_link_engine()
+        if not sqlalchemy.inspect(engine).has_table(self.table_name):
+            return None
+        query = sqlalchemy.select(sqlalchemy.func.max(sqlalchemy.column(key_column))).select_from(sqlalchemy.table(self.table_name))
+        with engine.connect() as connection:
+            watermark = connection.execute(query).scalar()
+        return watermark
+
+    def read_distinct(self, column: str) -> pd.Series:
+        """
+        Return the distinct values of a column of the instance table (e.g. the keys of a dimension), read with
+        the column type of STAR_SCHEMA_TYPES so UUIDs come back as text whatever the dialect stores
+
+        Keyword arguments:
+            'column': str -- Column to read;
+
+        Returns:
+            'values': pd.Series -- Distinct values, empty when the table is missing;
+        """
+        import pandas as pd
+
+        engine = self.init_link_engine()
+        if not sqlalchemy.inspect(engine).has_table(self.table_name):
+            return pd.Series([], name=column, dtype=object)
+        column_type = STAR_SCHEMA_TYPES.get(self.table_name, {}).get(column)
+        query = sqlalchemy.select(sqlalchemy.column(column, column_type)).select_from(sqlalchemy.table(self.table_name)).distinct()
+        with engine.connect() as connection:
+            values = pd.Series(connection.execute(query).scalars().all(), name=column, dtype=object)
+        return values
+
+    def upsert_to_db(self, key_column: str, batch_size: int = 10000) -> int:
+        """
+        Upsert dataframe into the instance table with INSERT ... ON CONFLICT on the key column (PostgreSQL or SQLite).
+        Existing rows with other keys and the table constraints are left untouched.
+
+        Keyword arguments:
+            'key_column': str -- Column identifying a row, a unique index is created on it when missing;
+            'batch_size': int -- Number of rows sent per INSERT;
+
+        Returns:
+            'rows': int -- Number of rows upserted;
+        """
+        return self.upsert_chunks_to_db([self.dataframe], key_column, batch_size=batch_size)
+
+    @instrumented
+    def upsert_chunks_to_db(self, chunks: Iterable[pd.DataFrame], key_column: str, batch_size: int = 10000) -> int:
+        """
+        Upsert DataFrame chunks into the instance table inside a single transaction (see upsert_to_db)
+
+        Keyword arguments:
+            'chunks': Iterable[pd.DataFrame] -- DataFrames to be upserted, consumed one at a time;
+            'key_column': str -- Column identifying a row, a unique index is created on it when missing;
+            'batch_size': int -- Number of rows sent per INSERT;
+
+        Returns:
+            'rows': int -- Number of rows upserted;
+        """
+        engine = self.init_link_engine()
+        dialect_insert = UPSERT_DIALECTS[engine.dialect.name]
+
+        def upsert(pd_table, connection, keys, data_iter):
+            rows = [dict(zip(keys, row)) for row in data_iter]
+            statement = dialect_insert(pd_table.table).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=[key_column],
+                set_={column: statement.excluded[column] for column in keys if column != key_column},
+            )
+            connection.execute(statement)
+
+        rows = 0
+        with engine.begin() as connection:
+            for index, chunk in enumerate(chunks):
+                chunk = self.cast_to_schema(chunk)
+                if index == 0:
+                    # Create the table when missing and the unique index ON CONFLICT relies on
+                    chunk.head(0).to_sql(self.table_name, connection, if_exists='append', index=False,
+                                         dtype=self.column_types(chunk))
+                    connection.execute(sqlalchemy.text(
+                        f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{self.table_name}_{key_column}" ON "{self.table_name}" ("{key_column}")'
+                    ))
+                chunksize = max(1, min(batch_size, SQLITE_MAX_VARIABLES // max(1, len(chunk.columns))))
+                chunk.to_sql(self.table_name, connection, if_exists='append', index=False,
+                             method=upsert, chunksize=chunksize, dtype=self.column_types(chunk))
+                rows += len(chunk)
+                instrumentation.add_bytes(chunk.memory_usage(index=False).sum())
+        return rows
+
+
+def _python_type(column_type: sqlalchemy.types.TypeEngine) -> type:
+    """
+    Return the Python type of the values of a SQL column type, or None when SQLAlchemy does not define it
+    """
+    try:
+        return column_type.python_type
+    except NotImplementedError:
+        return None
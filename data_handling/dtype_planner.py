@@ -0,0 +1,80 @@
+import pandas as pd
+from data_handling.instrumentation import instrumentation
+
+
+class DtypePlanner:
+    def __init__(self, max_category_ratio: float = 0.5, max_categories: int = 10000, arrow_strings: bool = True) -> None:
+        """
+        This class shrinks extracted DataFrames before cleaning and upload: low-cardinality strings become categoricals,
+        other strings (UUIDs, card numbers) use the compact Arrow string representation and integers are downcast.
+        The memory before and after of each frame is kept in 'self.report' and recorded as an instrumentation stage.
+
+        Keyword arguments:
+            'max_category_ratio': float -- Maximum ratio of unique values to rows for a categorical column;
+            'max_categories': int -- Maximum number of unique values for a categorical column;
+            'arrow_strings': bool -- Store the other string columns as 'string[pyarrow]' (requires pyarrow);
+        """
+        self.max_category_ratio = max_category_ratio
+        self.max_categories = max_categories
+        self.arrow_strings = arrow_strings and _has_pyarrow()
+        self.report = {}
+
+    def plan(self, dataframe: pd.DataFrame) -> dict[str, str]:
+        """
+        Return the compact dtype of each column that can be shrunk
+
+        Keyword arguments:
+            'dataframe': pd.DataFrame -- DataFrame to plan;
+
+        Returns:
+            'dtypes': dict[str, str] -- Target dtype per column;
+        """
+        dtypes = {}
+        for column in dataframe.columns:
+            values = dataframe[column]
+            if pd.api.types.is_integer_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype):
+                downcast = pd.to_numeric(values, downcast='unsigned' if len(values) and values.min() >= 0 else 'integer')
+                # uint64 saves nothing over int64 and turns sums with signed integers into floats, keep them signed
+                if downcast.dtype == 'uint64':
+                    downcast = pd.to_numeric(values, downcast='integer')
+                if downcast.dtype != values.dtype:
+                    dtypes[column] = str(downcast.dtype)
+            # Only columns holding strings only (and missing values), so values are not turned into text
+            elif values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) == 'string':
+                unique_values = values.nunique(dropna=True)
+                if unique_values <= self.max_categories and unique_values <= self.max_category_ratio * len(values):
+                    dtypes[column] = 'category'
+                elif self.arrow_strings:
+                    dtypes[column] = 'string[pyarrow]'
+        return dtypes
+
+    def apply(self, dataframe: pd.DataFrame, name: str = None) -> pd.DataFrame:
+        """
+        Return the DataFrame with compact dtypes, recording its memory before and after
+
+        Keyword arguments:
+            'dataframe': pd.DataFrame -- DataFrame to shrink;
+            'name': str -- Name of the frame in the report;
+
+        Returns:
+            'compact_df': pd.DataFrame -- DataFrame with compact dtypes;
+        """
+        name = name or f'frame_{len(self.report)}'
+        with instrumentation.span(f'DtypePlanner.apply[{name}]') as record:
+            record['rows_in'] = len(dataframe)
+            bytes_before = int(dataframe.memory_usage(deep=True).sum())
+            compact_df = dataframe.astype(self.plan(dataframe))
+            bytes_after = int(compact_df.memory_usage(deep=True).sum())
+            record['rows_out'] = len(compact_df)
+            instrumentation.add_metrics(memory_before_bytes=bytes_before, memory_after_bytes=bytes_after)
+
+        self.report[name] = {'bytes_before': bytes_before, 'bytes_after': bytes_after}
+        return compact_df
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401 -- Optional dependency of the Arrow string dtype
+    except ImportError:
+        return False
+    return True
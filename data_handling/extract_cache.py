@@ -0,0 +1,133 @@
+import hashlib
+import os
+import time
+from collections.abc import Callable
+import pandas as pd
+
+
+class ExtractCache:
+    def __init__(self, cache_dir: str = '.extract_cache', max_bytes: int = 2 * 1024 ** 3, enabled: bool = True) -> None:
+        """
+        This class provides a local Parquet cache of raw extracts, keyed by a fingerprint of their source.
+        Entries are evicted least recently used first once the cache is larger than 'max_bytes'. The modification
+        time of an entry is when it was written (used for 'max_age'), its access time when it was last used.
+
+        Keyword arguments:
+            'cache_dir': str -- Directory holding the cached extracts;
+            'max_bytes': int -- Maximum size of the cache on disk;
+            'enabled': bool -- When False every lookup misses and nothing is stored (--no-cache);
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+    def path(self, source: str, fingerprint: str) -> str:
+        """
+        Return the cache file path of a source at a given fingerprint
+
+        Keyword arguments:
+            'source': str -- Name of the source (e.g. table name or URL);
+            'fingerprint': str -- Fingerprint of the source content;
+
+        Returns:
+            'path': str -- Path of the Parquet file;
+        """
+        digest = hashlib.sha256(f'{source}\0{fingerprint}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.parquet')
+
+    def get(self, source: str, fingerprint: str, max_age: float = None) -> pd.DataFrame:
+        """
+        Return the cached extract, memory-mapped from disk, or None on a miss
+
+        Keyword arguments:
+            'source': str -- Name of the source;
+            'fingerprint': str -- Fingerprint of the source content;
+            'max_age': float -- Seconds after which an entry is stale and extracted again (no limit when None);
+
+        Returns:
+            'cached_df': pd.DataFrame -- Cached DataFrame, or None;
+        """
+        path = self.path(source, fingerprint)
+        if not self.enabled:
+            return None
+        try:
+            written = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        if max_age is not None and time.time() - written > max_age:
+            return None
+        import pyarrow.parquet as pq  # Optional dependency, only needed when the cache is used
+
+        try:
+            cached_df = pq.read_table(path, memory_map=True).to_pandas()
+            os.utime(path, (time.time(), written))  # Mark as recently used, keeping the time it was written
+        except FileNotFoundError:  # Evicted by another pipeline meanwhile
+            return None
+        return cached_df
+
+    def put(self, source: str, fingerprint: str, dataframe: pd.DataFrame) -> None:
+        """
+        Store an extract in the cache and evict the least recently used entries over the size bound.
+        Frames that can't be written as Parquet (e.g. mixed type columns) are not cached.
+
+        Keyword arguments:
+            'source': str -- Name of the source;
+            'fingerprint': str -- Fingerprint of the source content;
+            'dataframe': pd.DataFrame -- Extract to store;
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(source, fingerprint)
+        try:
+            dataframe.to_parquet(path + '.tmp')
+        except (TypeError, ValueError) as exception:
+            print(f"Extract of {source} not cached: {exception}")
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+            return
+        os.replace(path + '.tmp', path)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits in 'max_bytes'.
+        Entries removed meanwhile by another pipeline evicting the same directory are skipped.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.parquet'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, name))
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+    def cached(self, source: str, fingerprint: str, extract: Callable[[], pd.DataFrame], max_age: float = None) -> pd.DataFrame:
+        """
+        Return the cached extract of a source, calling 'extract' and storing its result on a miss
+
+        Keyword arguments:
+            'source': str -- Name of the source;
+            'fingerprint': str -- Fingerprint of the source content;
+            'extract': Callable -- Function extracting the DataFrame from the source;
+            'max_age': float -- Seconds after which the cached extract is stale, for sources whose fingerprint
+                                does not change with every content change (no limit when None);
+
+        Returns:
+            'extracted_df': pd.DataFrame -- Extracted DataFrame;
+        """
+        extracted_df = self.get(source, fingerprint, max_age)
+        if extracted_df is None:
+            extracted_df = extract()
+            self.put(source, fingerprint, extracted_df)
+        return extracted_df
@@ -0,0 +1,295 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+
+try:
+    import resource  # Not available on Windows, peak RSS is then not reported
+except ImportError:
+    resource = None
+
+
+class JsonLinesSink:
+    def __init__(self, filename: str) -> None:
+        """
+        Sink appending each stage record to a JSON-lines file
+
+        Keyword arguments:
+            'filename': str -- Path of the JSON-lines file;
+        """
+        self.filename = filename
+        self.lock = threading.Lock()
+
+    def __call__(self, record: dict) -> None:
+        with self.lock, open(self.filename, 'a') as file:
+            file.write(json.dumps(record, default=str) + '\n')
+
+
+class Instrumentation:
+    def __init__(self, sinks: list[Callable[[dict], None]] = None, profile_stages: set[str] = None, profile_dir: str = '.') -> None:
+        """
+        This class records a timing span per extract, clean and upload stage: rows in and out, rows dropped per rule,
+        bytes transferred, peak RSS and the metrics particular to the stage (e.g. integrity violations, memory saved
+        by the dtype planner). Each record is sent to the sinks and kept for the summary table.
+
+        Keyword arguments:
+            'sinks': list[Callable] -- Functions receiving each stage record (e.g. JsonLinesSink);
+            'profile_stages': set[str] -- Stages run under cProfile, stats are dumped to '<profile_dir>/<stage>.prof';
+            'profile_dir': str -- Directory of the cProfile stats;
+        """
+        self.sinks = sinks if sinks is not None else []
+        # Functions emitting process-wide records (e.g. connection pool metrics) when collect() is called
+        self.collectors = []
+        self.profile_stages = profile_stages if profile_stages is not None else set()
+        self.profile_dir = profile_dir
+        self.records = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @contextmanager
+    def span(self, stage: str):
+        """
+        Time a stage, yielding its record so the stage can fill 'rows_in', 'rows_out', 'dropped_rows', 'bytes'
+        and 'metrics'
+
+        Keyword arguments:
+            'stage': str -- Name of the stage;
+        """
+        record = {'stage': stage, 'thread': threading.current_thread().name, 'rows_in': None, 'rows_out': None,
+                  'dropped_rows': {}, 'bytes': 0, 'errors': 0, 'metrics': {}}
+        stack = self.local.__dict__.setdefault('stack', [])
+        stack.append(record)
+        profiler = cProfile.Profile() if stage in self.profile_stages else None
+        if profiler:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as exception:
+            record['errors'] += 1
+            record['exception'] = repr(exception)
+            raise
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(os.path.join(self.profile_dir, f'{stage}.prof'))
+            record['peak_rss_bytes'] = peak_rss_bytes()
+            stack.pop()
+            self.emit(record)
+
+    def current(self) -> dict:
+        """
+        Return the record of the innermost stage running in this thread, or None
+        """
+        stack = self.local.__dict__.get('stack')
+        return stack[-1] if stack else None
+
+    def add_bytes(self, number_of_bytes: int) -> None:
+        """
+        Add bytes transferred to the current stage
+        """
+        record = self.current()
+        if record is not None and number_of_bytes:
+            record['bytes'] += int(number_of_bytes)
+
+    def add_metrics(self, **metrics: float) -> None:
+        """
+        Add counts particular to the current stage (e.g. foreign_keys_dropped=2) to its record, summed per stage
+        in the summary
+        """
+        record = self.current()
+        if record is not None:
+            for name, value in metrics.items():
+                record['metrics'][name] = record['metrics'].get(name, 0) + value
+
+    def add_error(self) -> None:
+        """
+        Count a handled error (e.g. a failed request) in the current stage
+        """
+        record = self.current()
+        if record is not None:
+            record['errors'] += 1
+
+    def emit(self, record: dict) -> None:
+        with self.lock:
+            self.records.append(record)
+        for sink in self.sinks:
+            sink(record)
+
+    def collect(self) -> None:
+        """
+        Emit the process-wide records of every collector, at the end of a run or of a pipeline run in a worker process
+        """
+        for collector in self.collectors:
+            collector()
+
+    def print_summary(self) -> None:
+        """
+        Print one line per stage recorded, over every call of the stage: number of calls, total time, rows,
+        rows out per second, rows dropped, bytes, errors, the largest peak RSS and the stage metrics.
+        Pool records are printed per engine below.
+        """
+        with self.lock:
+            records = [record for record in self.records if record.get('kind') != 'pool']
+            pool_records = [record for record in self.records if record.get('kind') == 'pool']
+        if records:
+            self.print_stages(records)
+        if pool_records:
+            self.print_pools(pool_records)
+
+    @staticmethod
+    def print_stages(records: list[dict]) -> None:
+        """
+        Print the stage records aggregated per stage
+
+        Keyword arguments:
+            'records': list[dict] -- Stage records;
+        """
+        stages = {}
+        for record in records:
+            stage = stages.setdefault(record['stage'], {'calls': 0, 'seconds': 0.0, 'rows_in': None, 'rows_out': None,
+                                                        'dropped': 0, 'bytes': 0, 'errors': 0, 'peak_rss_bytes': None,
+                                                        'metrics': {}})
+            stage['calls'] += 1
+            stage['seconds'] += record['seconds']
+            stage['dropped'] += sum(record['dropped_rows'].values())
+            stage['bytes'] += record['bytes']
+            stage['errors'] += record['errors']
+            for key in ('rows_in', 'rows_out'):
+                if record[key] is not None:
+                    stage[key] = (stage[key] or 0) + record[key]
+            if record['peak_rss_bytes'] is not None:
+                stage['peak_rss_bytes'] = max(stage['peak_rss_bytes'] or 0, record['peak_rss_bytes'])
+            for name, value in record.get('metrics', {}).items():
+                stage['metrics'][name] = stage['metrics'].get(name, 0) + value
+
+        width = max(len(name) for name in stages)
+        print(f"{'stage'.ljust(width)}  {'calls':>6}  {'seconds':>8}  {'rows in':>10}  {'rows out':>10}  {'rows/s':>10}  "
+              f"{'dropped':>8}  {'MiB':>8}  {'errors':>6}  {'peak RSS MiB':>12}  metrics")
+        for name, stage in stages.items():
+            rows_per_second = stage['rows_out'] / stage['seconds'] if stage['rows_out'] and stage['seconds'] else None
+            metrics = ', '.join(f'{metric}={_format_metric(metric, value)}' for metric, value in stage['metrics'].items())
+            print(f"{name.ljust(width)}  {stage['calls']:>6}  {stage['seconds']:8.2f}  {_format(stage['rows_in']):>10}  "
+                  f"{_format(stage['rows_out']):>10}  {_format(rows_per_second):>10}  {stage['dropped']:>8}  "
+                  f"{stage['bytes'] / 1024 ** 2:8.1f}  {stage['errors']:>6}  {_format(stage['peak_rss_bytes'], 1024 ** 2):>12}  "
+                  f"{metrics}".rstrip())
+
+    @staticmethod
+    def print_pools(records: list[dict]) -> None:
+        """
+        Print the pool records aggregated per engine: checkouts and seconds waited, and the most connections
+        still checked out when the records were emitted
+
+        Keyword arguments:
+            'records': list[dict] -- Pool records;
+        """
+        pools = {}
+        for record in records:
+            pool = pools.setdefault(record['engine'], {'checkouts': 0, 'wait_seconds': None, 'checked_out': None})
+            pool['checkouts'] += record['checkouts']
+            if record['wait_seconds'] is not None:
+                pool['wait_seconds'] = (pool['wait_seconds'] or 0.0) + record['wait_seconds']
+            if record['checked_out'] is not None:
+                pool['checked_out'] = max(pool['checked_out'] or 0, record['checked_out'])
+
+        width = max(len(engine) for engine in pools)
+        print(f"\n{'engine'.ljust(width)}  {'checkouts':>9}  {'wait seconds':>12}  {'checked out':>11}")
+        for engine, pool in pools.items():
+            wait_seconds = '-' if pool['wait_seconds'] is None else f"{pool['wait_seconds']:.2f}"
+            print(f"{engine.ljust(width)}  {pool['checkouts']:>9}  {wait_seconds:>12}  {_format(pool['checked_out']):>11}")
+
+
+def peak_rss_bytes() -> int:
+    """
+    Return the peak resident set size of the process, or None when not available
+
+    Returns:
+        'peak_rss': int -- Peak RSS in bytes;
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak_rss if os.uname().sysname == 'Darwin' else peak_rss * 1024
+
+
+def count_rows(value: object) -> int:
+    """
+    Return the number of rows of a DataFrame, list of DataFrames or row count, None for anything else
+
+    Keyword arguments:
+        'value': object -- Value to count;
+
+    Returns:
+        'rows': int -- Number of rows;
+    """
+    if is_dataframe(value):
+        return len(value)
+    if isinstance(value, list) and value and all(is_dataframe(item) for item in value):
+        return sum(len(item) for item in value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def is_dataframe(value: object) -> bool:
+    """
+    Return True for a DataFrame, without importing pandas: a value can only be a DataFrame once pandas is loaded
+
+    Keyword arguments:
+        'value': object -- Value to check;
+
+    Returns:
+        'is_dataframe': bool -- Whether the value is a DataFrame;
+    """
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(value, pandas.DataFrame)
+
+
+def _format(value: int, unit: int = 1) -> str:
+    return '-' if value is None else f'{value / unit:.0f}'
+
+
+def _format_metric(name: str, value: float) -> str:
+    # Metrics named '*_bytes' are shown in MiB
+    return f'{value / 1024 ** 2:.1f}MiB' if name.endswith('_bytes') else f'{value:g}'
+
+
+instrumentation = Instrumentation()
+
+
+def instrumented(method: Callable) -> Callable:
+    """
+    Decorator recording a span for a DataExtractor, DataCleaning or DatabaseConnector method.
+    Rows in are read from the DataFrame argument or the instance 'dataframe', rows out from the result
+    and rows dropped from the rules the call set in the instance 'dropped_rows', which totals every call.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        owner = args[0] if args else None
+        with instrumentation.span(method.__qualname__) as record:
+            # Methods receiving the frame to clean as argument (e.g. clean_products_data) count it as rows in
+            frames = [count_rows(arg) for arg in args[1:] if is_dataframe(arg)]
+            record['rows_in'] = frames[0] if frames else count_rows(getattr(owner, 'dataframe', None))
+            # The rules set the rows they drop in the instance 'dropped_rows', it is emptied for this call so a
+            # rule dropping as many rows as in the previous chunk is still counted, and added up again afterwards
+            counts_dropped = isinstance(getattr(owner, 'dropped_rows', None), dict)
+            if counts_dropped:
+                dropped_before, owner.dropped_rows = owner.dropped_rows, {}
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                if counts_dropped:
+                    record['dropped_rows'] = {rule: rows for rule, rows in owner.dropped_rows.items() if rows}
+                    owner.dropped_rows = dict(dropped_before)
+                    for rule, rows in record['dropped_rows'].items():
+                        owner.dropped_rows[rule] = owner.dropped_rows.get(rule, 0) + rows
+            record['rows_out'] = count_rows(result)
+        return result
+    return wrapper
@@ -0,0 +1,244 @@
+import threading
+from collections.abc import Callable, Iterable, Iterator
+import numpy as np
+import pandas as pd
+from data_handling.instrumentation import instrumentation
+
+
+# Primary key of each dimension table
+DIMENSION_PRIMARY_KEYS = {
+    'dim_users': 'user_uuid',
+    'dim_card_details': 'card_number',
+    'dim_store_details': 'store_code',
+    'dim_products': 'product_code',
+    'dim_date_times': 'date_uuid',
+}
+
+# Dimension table referenced by each foreign key column of 'orders_table'
+ORDERS_FOREIGN_KEYS = {
+    'card_number': 'dim_card_details',
+    'date_uuid': 'dim_date_times',
+    'product_code': 'dim_products',
+    'store_code': 'dim_store_details',
+    'user_uuid': 'dim_users',
+}
+
+# Key columns holding UUIDs, compared in their canonical form (lowercase with dashes) whatever the source or database wrote
+UUID_KEY_COLUMNS = ('user_uuid', 'date_uuid')
+
+# Positions of the dashes and of the 32 hex digits in a canonical UUID
+UUID_DASH_POSITIONS = (8, 13, 18, 23)
+UUID_DIGIT_POSITIONS = np.array([position for position in range(36) if position not in UUID_DASH_POSITIONS])
+
+# Ways of writing a UUID accepted, by length: positions of its hex digits and separator expected at other positions
+UUID_LAYOUTS = {
+    32: (np.arange(32), {}),
+    36: (UUID_DIGIT_POSITIONS, dict.fromkeys(UUID_DASH_POSITIONS, '-')),
+    38: (UUID_DIGIT_POSITIONS + 1, {0: '{', 37: '}', **dict.fromkeys(np.add(UUID_DASH_POSITIONS, 1).tolist(), '-')}),
+}
+
+# Lowercase of each ASCII character code, and the codes of hex digits (either case) and of uppercase hex digits
+LOWERCASE_CODES = np.array([code + 32 if ord('A') <= code <= ord('Z') else code for code in range(128)], dtype=np.uint8)
+HEX_DIGIT_CODES = np.isin(np.arange(128), [ord(character) for character in '0123456789abcdefABCDEF'])
+UPPERCASE_HEX_DIGIT_CODES = np.isin(np.arange(128), [ord(character) for character in 'ABCDEF'])
+
+# 'report' only prints the violations, 'quarantine' also removes the rows from the upload
+INTEGRITY_MODES = ('report', 'quarantine')
+
+
+class IntegrityChecker:
+    def __init__(self, mode: str = 'quarantine', key_loader: Callable[[str, str], pd.Series] = None) -> None:
+        """
+        This class checks the cleaned frames against the keys of the star schema before upload: duplicate or NULL
+        primary keys in each dimension and orphaned foreign keys in the orders. The keys of each checked dimension
+        are kept as a hash index, the orders are factorized per key so only their unique values are looked up.
+        Rows removed in 'quarantine' mode are kept per table in 'self.quarantine'.
+
+        Keyword arguments:
+            'mode': str -- 'report' or 'quarantine' (see INTEGRITY_MODES);
+            'key_loader': Callable -- Function returning the keys of a (table, key column) not checked in this process,
+                                      e.g. read from the database loaded by another process;
+        """
+        if mode not in INTEGRITY_MODES:
+            raise ValueError(f"Unknown integrity mode '{mode}', expected one of {INTEGRITY_MODES}")
+        self.mode = mode
+        self.key_loader = key_loader
+        self.keys = {}
+        self.violations = {}
+        self.quarantine = {}
+        self.lock = threading.Lock()
+
+    def check_dimension(self, table: str, dataframe: pd.DataFrame, append: bool = False) -> pd.DataFrame:
+        """
+        Flag duplicate and NULL primary keys of a dimension and keep its keys for the foreign key checks
+
+        Keyword arguments:
+            'table': str -- Name of the dimension table (see DIMENSION_PRIMARY_KEYS);
+            'dataframe': pd.DataFrame -- Cleaned dimension frame;
+            'append': bool -- The frame is a chunk of the table, keys of the previous chunks count as duplicates;
+
+        Returns:
+            'dimension_df': pd.DataFrame -- Frame to upload, without the violations in 'quarantine' mode;
+        """
+        key = DIMENSION_PRIMARY_KEYS[table]
+        with instrumentation.span(f'IntegrityChecker.check_dimension[{table}]') as record:
+            record['rows_in'] = len(dataframe)
+            codes, uniques = _factorize(dataframe[key])
+            null_keys = codes < 0
+            # Codes of the canonical keys, so one key written two ways (e.g. UUID case) counts as a duplicate
+            key_codes, key_index = pd.factorize(canonical_keys(uniques, key))
+            row_keys = np.append(key_codes, -1)[codes]
+            duplicated = pd.Series(row_keys).duplicated().to_numpy() & ~null_keys
+            key_index = pd.Index(key_index)
+            previous_keys = self.keys.get(table) if append else None
+            if previous_keys is not None:
+                duplicated |= np.append(previous_keys.get_indexer(key_index) >= 0, False)[row_keys]
+                key_index = previous_keys.append(key_index.difference(previous_keys))
+            self.keys[table] = key_index
+
+            violations = {f'{key} duplicated': int(duplicated.sum()), f'{key} NULL': int(null_keys.sum())}
+            dimension_df = self._handle_violations(table, dataframe, duplicated | null_keys, violations, record)
+            record['rows_out'] = len(dimension_df)
+        return dimension_df
+
+    def check_foreign_keys(self, table: str, dataframe: pd.DataFrame,
+                           foreign_keys: dict[str, str] = None) -> pd.DataFrame:
+        """
+        Flag the rows whose foreign keys are not in the referenced dimension, NULL foreign keys are valid
+
+        Keyword arguments:
+            'table': str -- Name of the fact table;
+            'dataframe': pd.DataFrame -- Cleaned fact frame;
+            'foreign_keys': dict[str, str] -- Dimension referenced by each key column (defaults to ORDERS_FOREIGN_KEYS);
+
+        Returns:
+            'facts_df': pd.DataFrame -- Frame to upload, without the orphans in 'quarantine' mode;
+        """
+        foreign_keys = ORDERS_FOREIGN_KEYS if foreign_keys is None else foreign_keys
+        with instrumentation.span(f'IntegrityChecker.check_foreign_keys[{table}]') as record:
+            record['rows_in'] = len(dataframe)
+            orphans = np.zeros(len(dataframe), dtype=bool)
+            violations = {}
+            for column, dimension in foreign_keys.items():
+                dimension_keys = self.dimension_keys(dimension)
+                if column not in dataframe.columns or dimension_keys is None:
+                    instrumentation.add_metrics(**{f'{column} not checked': 1})
+                    continue
+                # Look up each distinct value once and broadcast the result back with the codes, -1 (NULL) is valid
+                codes, uniques = _factorize(dataframe[column])
+                found = dimension_keys.get_indexer(uniques.astype(str)) >= 0
+                # Only the values not found as written are put in their canonical form and looked up again
+                missing = np.flatnonzero(~found)
+                if len(missing):
+                    canonical = canonical_keys(uniques[missing], DIMENSION_PRIMARY_KEYS[dimension])
+                    found[missing] = dimension_keys.get_indexer(canonical) >= 0
+                column_orphans = ~np.append(found, True)[codes]
+                violations[f'orphan {column}'] = int(column_orphans.sum())
+                orphans |= column_orphans
+
+            facts_df = self._handle_violations(table, dataframe, orphans, violations, record)
+            record['rows_out'] = len(facts_df)
+        return facts_df
+
+    def check_chunks(self, table: str, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Check each chunk of a dimension or of the orders as it is consumed
+
+        Keyword arguments:
+            'table': str -- Name of the table of the chunks;
+            'chunks': Iterable[pd.DataFrame] -- Cleaned chunks;
+
+        Returns:
+            'checked_chunks': Iterator[pd.DataFrame] -- Chunks to upload;
+        """
+        for index, chunk in enumerate(chunks):
+            if table in DIMENSION_PRIMARY_KEYS:
+                yield self.check_dimension(table, chunk, append=index > 0)
+            else:
+                yield self.check_foreign_keys(table, chunk)
+
+    def dimension_keys(self, table: str) -> pd.Index:
+        """
+        Return the keys of a dimension checked in this process, or loaded with 'key_loader', or None
+
+        Keyword arguments:
+            'table': str -- Name of the dimension table;
+
+        Returns:
+            'keys': pd.Index -- Unique keys in their canonical form (see canonical_keys);
+        """
+        if table not in self.keys and self.key_loader is not None:
+            key = DIMENSION_PRIMARY_KEYS[table]
+            keys = self.key_loader(table, key)
+            self.keys[table] = pd.Index(pd.unique(canonical_keys(pd.Index(keys.dropna()), key)))
+        return self.keys.get(table)
+
+    def _handle_violations(self, table: str, dataframe: pd.DataFrame, mask: np.ndarray, violations: dict[str, int],
+                           record: dict) -> pd.DataFrame:
+        """
+        Record the violations, in 'self.violations' and in the stage metrics, and move the flagged rows
+        to the quarantine in 'quarantine' mode
+        """
+        violations = {rule: rows for rule, rows in violations.items() if rows}
+        with self.lock:
+            for rule, rows in violations.items():
+                self.violations[f'{table}.{rule}'] = self.violations.get(f'{table}.{rule}', 0) + rows
+        instrumentation.add_metrics(**violations)
+        if self.mode != 'quarantine' or not mask.any():
+            return dataframe
+
+        record['dropped_rows'] = violations
+        with self.lock:
+            self.quarantine.setdefault(table, []).append(dataframe.loc[mask])
+        return dataframe.loc[~mask]
+
+
+def _factorize(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """
+    Return the codes and unique values of a column, reusing the codes of categoricals (see DtypePlanner)
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def canonical_keys(keys: pd.Index, column: str) -> pd.Index:
+    """
+    Return distinct key values as the strings they are compared as: UUID keys (see UUID_KEY_COLUMNS) lowercase with
+    dashes, as a native UUID column returns them while other dialects may store them as dashless hex, other keys as str.
+    UUIDs are rewritten on arrays of character codes, one vectorised pass per way of writing them (see UUID_LAYOUTS).
+    Values that are not UUIDs are kept as they are, so they remain orphans.
+
+    Keyword arguments:
+        'keys': pd.Index -- Distinct non-NULL key values;
+        'column': str -- Name of the key column;
+
+    Returns:
+        'keys': pd.Index -- Keys as strings, in the same order;
+    """
+    keys = keys.astype(str)
+    if column not in UUID_KEY_COLUMNS or len(keys) == 0:
+        return keys
+    strings = keys.to_numpy(dtype=object)
+    canonical = strings.copy()
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    for length, (digit_positions, separators) in UUID_LAYOUTS.items():
+        selected = np.flatnonzero(lengths == length)
+        if len(selected) == 0:
+            continue
+        # One row of character codes per key, non-ASCII characters are clipped to DEL, which no UUID holds
+        characters = np.minimum(strings[selected].astype(f'U{length}').view(np.uint32), 127).astype(np.uint8)
+        characters = characters.reshape(-1, length)
+        digits = characters[:, digit_positions]
+        valid = HEX_DIGIT_CODES[digits].all(axis=1)
+        for position, separator in separators.items():
+            valid &= characters[:, position] == ord(separator)
+        if length == 36:
+            # Keys already canonical keep their string
+            valid &= UPPERCASE_HEX_DIGIT_CODES[digits].any(axis=1)
+
+        dashed = np.full((int(valid.sum()), 36), ord('-'), dtype=np.uint8)
+        dashed[:, UUID_DIGIT_POSITIONS] = LOWERCASE_CODES[digits[valid]]
+        canonical[selected[valid]] = dashed.view('S36').ravel().astype('U36').astype(object)
+    return pd.Index(canonical, dtype=keys.dtype)
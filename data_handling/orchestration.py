@@ -0,0 +1,148 @@
+import multiprocessing
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from data_handling.instrumentation import instrumentation
+
+
+class PipelineOrchestrator:
+    def __init__(self, max_workers: int = 5, use_processes: bool = False, keep_going: bool = False,
+                 initializer: Callable[..., None] = None, initargs: tuple = (), start_method: str = None) -> None:
+        """
+        This class runs pipelines declared with their dependencies, running independent pipelines concurrently.
+        With use_processes, the stage records of each pipeline are sent back and emitted by this process.
+
+        Keyword arguments:
+            'max_workers': int -- Maximum number of pipelines running at the same time;
+            'use_processes': bool -- Run pipelines on a process pool instead of a thread pool;
+            'keep_going': bool -- Keep running independent pipelines after a failure instead of stopping;
+            'initializer': Callable -- Function applying the run settings in each worker process, which does not
+                                       see the changes this process made after import unless it was forked;
+            'initargs': tuple -- Arguments of the initializer;
+            'start_method': str -- Start method of the worker processes ('fork', 'spawn' or 'forkserver'),
+                                   the platform default when None;
+        """
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.keep_going = keep_going
+        self.initializer = initializer
+        self.initargs = initargs
+        self.start_method = start_method
+        self.pipelines = {}
+
+    def add_pipeline(self, name: str, function: Callable[[], None], depends_on: tuple[str] = ()) -> None:
+        """
+        Declare a pipeline and the pipelines that must succeed before it starts
+
+        Keyword arguments:
+            'name': str -- Name of the pipeline;
+            'function': Callable -- Function running the pipeline (must be picklable with use_processes);
+            'depends_on': tuple[str] -- Names of the pipelines it depends on;
+        """
+        unknown = set(depends_on) - set(self.pipelines)
+        if unknown:
+            raise ValueError(f"Pipeline '{name}' depends on undeclared pipelines: {sorted(unknown)}")
+        self.pipelines[name] = (function, tuple(depends_on))
+
+    def run(self, names: list[str] = None) -> dict[str, dict]:
+        """
+        Run the selected pipelines (all when None). Dependencies outside the selection are considered done.
+
+        Keyword arguments:
+            'names': list[str] -- Names of the pipelines to run;
+
+        Returns:
+            'results': dict[str, dict] -- 'status' ('success', 'failed' or 'skipped'), 'seconds' and 'error' per pipeline;
+        """
+        names = list(self.pipelines) if names is None else names
+        unknown = set(names) - set(self.pipelines)
+        if unknown:
+            raise ValueError(f"Unknown pipelines: {sorted(unknown)}")
+
+        waiting = {name: {dependency for dependency in self.pipelines[name][1] if dependency in names} for name in names}
+        results = {}
+        running = {}
+        stop = False
+        if self.use_processes:
+            executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer, initargs=self.initargs,
+                                           mp_context=multiprocessing.get_context(self.start_method))
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        with executor:
+            while waiting or running:
+                # Submit pipelines whose dependencies are done while workers are free, skip those with a failed dependency
+                for name, dependencies in list(waiting.items()):
+                    if stop or any(results.get(dependency, {}).get('status') in ('failed', 'skipped') for dependency in dependencies):
+                        results[name] = {'status': 'skipped', 'seconds': 0.0, 'error': None}
+                        del waiting[name]
+                    elif len(running) < self.max_workers and all(dependency in results for dependency in dependencies):
+                        running[executor.submit(_timed_call, self.pipelines[name][0], self.use_processes)] = name
+                        del waiting[name]
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        seconds, error, records = future.result()
+                    except Exception as exception:  # e.g. the worker process died
+                        seconds, error, records = 0.0, exception, []
+                    for record in records:
+                        instrumentation.emit(record)
+                    results[name] = {'status': 'failed' if error else 'success', 'seconds': seconds, 'error': error}
+                    if error:
+                        print(f"Pipeline {name} failed: {error!r}")
+                        stop = stop or not self.keep_going
+
+        self.print_summary(results, names)
+        return results
+
+    @staticmethod
+    def print_summary(results: dict[str, dict], names: list[str]) -> None:
+        """
+        Print the status and time taken by each pipeline
+
+        Keyword arguments:
+            'results': dict[str, dict] -- Results returned by run();
+            'names': list[str] -- Names of the pipelines, in the order to print;
+        """
+        width = max([len('pipeline')] + [len(name) for name in names])
+        print(f"{'pipeline'.ljust(width)}  {'status':<8}  seconds")
+        for name in names:
+            print(f"{name.ljust(width)}  {results[name]['status']:<8}  {results[name]['seconds']:7.2f}")
+
+
+def _timed_call(function: Callable[[], None], collect_records: bool = False) -> tuple[float, Exception, list[dict]]:
+    """
+    Run a pipeline function and return the time taken, the exception raised, if any, and its stage records
+
+    Keyword arguments:
+        'function': Callable -- Function running the pipeline;
+        'collect_records': bool -- Return the stage records instead of emitting them (pipelines run in a worker process);
+
+    Returns:
+        'result': tuple[float, Exception, list[dict]] -- Seconds taken, exception raised (None on success)
+                                                        and stage records (empty unless collected);
+    """
+    if collect_records:
+        # The parent process emits the records to its sinks, each record is written once
+        instrumentation.sinks = []
+    first_record = len(instrumentation.records)
+    start = time.perf_counter()
+    try:
+        function()
+        error = None
+    except Exception as exception:
+        error = exception
+    seconds = time.perf_counter() - start
+
+    records = []
+    if collect_records:
+        instrumentation.collect()
+        # Worker processes run one pipeline at a time, the records past 'first_record' are this pipeline's
+        with instrumentation.lock:
+            records = instrumentation.records[first_record:]
+            del instrumentation.records[first_record:]
+    return seconds, error, records
@@ -0,0 +1,113 @@
+import time
+import pandas as pd
+from data_handling.database_utils import DatabaseConnector
+from data_handling.instrumentation import instrumentation, instrumented
+
+
+# SQL file creating and incrementally refreshing the sales fact rollup
+ROLLUP_SQL_FILE = 'data_querying/sales_rollup.sql'
+
+# SQL file of the reports, each one preceded by a comment line naming it
+REPORTS_SQL_FILE = 'data_querying/data_metrics.sql'
+
+# Tables of the rollup, dropped on a full refresh
+ROLLUP_TABLES = ('sales_rollup', 'sales_rollup_watermark', 'sales_rollup_pending')
+
+
+class SalesMetrics:
+    def __init__(self, filename: str = 'postgres_link.yaml', rollup_sql_file: str = ROLLUP_SQL_FILE,
+                 reports_sql_file: str = REPORTS_SQL_FILE) -> None:
+        """
+        This class keeps the sales rollup (year, month, store_code, product_code) up to date with the loaded orders
+        and runs the reports of data_metrics.sql against it, recording the latency of each report.
+
+        Keyword arguments:
+            'filename': str -- yaml file with the 'url' of the star-schema database;
+            'rollup_sql_file': str -- SQL file creating and refreshing the rollup;
+            'reports_sql_file': str -- SQL file of the reports;
+        """
+        self.connector = DatabaseConnector(filename=filename)
+        self.rollup_sql_file = rollup_sql_file
+        self.reports_sql_file = reports_sql_file
+        self.latencies = {}
+
+    @instrumented
+    def refresh_rollup(self, full_refresh: bool = False) -> int:
+        """
+        Add the orders loaded since the last refresh to the rollup, inside a single transaction
+
+        Keyword arguments:
+            'full_refresh': bool -- Rebuild the rollup from the whole orders_table (e.g. after --full-refresh);
+
+        Returns:
+            'rollup_rows': int -- Number of rows of the rollup;
+        """
+        with open(self.rollup_sql_file, 'r', encoding='utf-8') as file:
+            sql = file.read()
+        engine = self.connector.init_link_engine()
+        with engine.begin() as connection:
+            if full_refresh:
+                connection.exec_driver_sql(f"DROP TABLE IF EXISTS {', '.join(ROLLUP_TABLES)}")
+            connection.exec_driver_sql(sql)
+            rollup_rows = connection.exec_driver_sql('SELECT COUNT(*) FROM sales_rollup').scalar()
+        return rollup_rows
+
+    def run_reports(self) -> dict[str, pd.DataFrame]:
+        """
+        Run every report, recording its latency in 'self.latencies' and as an instrumentation stage
+
+        Returns:
+            'reports': dict[str, pd.DataFrame] -- Result of each report, keyed by its name;
+        """
+        engine = self.connector.init_link_engine()
+        reports = {}
+        for name, sql in read_reports(self.reports_sql_file):
+            with instrumentation.span(f'report: {name}') as record, engine.connect() as connection:
+                start = time.perf_counter()
+                # Driver-level execution, so time formats such as 'HH24:MI:SS' are not read as bind parameters
+                result = connection.exec_driver_sql(sql)
+                reports[name] = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+                self.latencies[name] = time.perf_counter() - start
+                record['rows_out'] = len(reports[name])
+        self.print_latencies()
+        return reports
+
+    def print_latencies(self) -> None:
+        """
+        Print the latency in milliseconds of each report run
+        """
+        if not self.latencies:
+            return
+        width = max(len(name) for name in self.latencies)
+        print(f"{'report'.ljust(width)}  {'ms':>9}")
+        for name, seconds in self.latencies.items():
+            print(f"{name.ljust(width)}  {seconds * 1000:9.1f}")
+
+
+def read_reports(sql_filename: str) -> list[tuple[str, str]]:
+    """
+    Split a SQL file into its statements, named after the comment line preceding each one
+
+    Keyword arguments:
+        'sql_filename': str -- Path of the SQL file;
+
+    Returns:
+        'reports': list[tuple[str, str]] -- Name and SQL of each statement, in the file order;
+    """
+    reports = []
+    name, lines = None, []
+    with open(sql_filename, 'r', encoding='utf-8') as file:
+        for line in file:
+            stripped = line.strip()
+            if not lines and (not stripped or stripped.startswith('--')):
+                # Comment lines before a statement name it, the first one is kept
+                if stripped and name is None:
+                    name = stripped.lstrip('-').strip()
+                continue
+            lines.append(line)
+            if stripped.endswith(';'):
+                reports.append((name or f'report_{len(reports) + 1}', ''.join(lines).strip()))
+                name, lines = None, []
+    if any(line.strip() for line in lines):
+        reports.append((name or f'report_{len(reports) + 1}', ''.join(lines).strip()))
+    return reports
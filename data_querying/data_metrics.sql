@@ -13,42 +13,37 @@ GROUP BY locality
 ORDER BY total_no_stores DESC;
 
 -- Display which months produced the largest amount of sales
-SELECT ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales, month
-FROM dim_date_times
-JOIN orders_table ON dim_date_times.date_uuid = orders_table.date_uuid
-JOIN dim_products ON orders_table.product_code = dim_products.product_code
+SELECT ROUND(SUM(total_sales), 2) AS total_sales, month
+FROM sales_rollup
 GROUP BY month
 ORDER BY total_sales DESC
 LIMIT 6;
 
 -- Display how many sales are made online and offline
 SELECT
-  COUNT(product_code) AS number_of_sales,
+  SUM(number_of_sales) AS number_of_sales,
   SUM(product_quantity) AS product_quantity_count,
   CASE WHEN store_code = 'WEB-1388012W' THEN 'Web' ELSE 'Offline' END AS location
-FROM orders_table
+FROM sales_rollup
 GROUP BY CASE WHEN store_code = 'WEB-1388012W' THEN 'Web' ELSE 'Offline' END
 ORDER BY number_of_sales;
 
 -- Display the value and percentage of sales in each type of store
 SELECT 
 	dim_store_details.store_type, 
-	ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales,
-	ROUND(COUNT(orders_table.product_code) * 100.0 / (SELECT COUNT(*) FROM orders_table), 2) AS percentage_of_sales
-FROM orders_table
-JOIN dim_products ON orders_table.product_code = dim_products.product_code
-JOIN dim_store_details ON orders_table.store_code = dim_store_details.store_code
+	ROUND(SUM(total_sales), 2) AS total_sales,
+	ROUND(SUM(number_of_sales) * 100.0 / (SELECT SUM(number_of_sales) FROM sales_rollup), 2) AS percentage_of_sales
+FROM sales_rollup
+JOIN dim_store_details ON sales_rollup.store_code = dim_store_details.store_code
 GROUP BY store_type
 ORDER BY total_sales DESC;
 
 -- Display the month of each year with the highest sales
 SELECT 
-	ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales,
-	dim_date_times.year,
-	dim_date_times.month
-FROM orders_table
-JOIN dim_products ON orders_table.product_code = dim_products.product_code
-JOIN dim_date_times ON orders_table.date_uuid = dim_date_times.date_uuid
+	ROUND(SUM(total_sales), 2) AS total_sales,
+	year,
+	month
+FROM sales_rollup
 GROUP BY year,month
 ORDER BY total_sales DESC
 LIMIT 10;
@@ -63,26 +58,16 @@ ORDER BY total_staff_numbers DESC;
 
 -- Display the type of stores in Germany and their total sales
 SELECT 
-	ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales,
+	ROUND(SUM(total_sales), 2) AS total_sales,
 	store_type,
 	country_code
-FROM orders_table
-JOIN dim_store_details ON orders_table.store_code = dim_store_details.store_code
-JOIN dim_products ON orders_table.product_code = dim_products.product_code
+FROM sales_rollup
+JOIN dim_store_details ON sales_rollup.store_code = dim_store_details.store_code
 WHERE country_code = 'DE'
 GROUP BY store_type, country_code
 ORDER BY total_sales;
 
 -- Display how quickly, per year, a sale is being made
-
-ALTER TABLE dim_date_times -- Create a new column with timestamp format from year, month, day, timestamp columns
-ADD initial_timestamp TIMESTAMP;
-
-UPDATE dim_date_times
-SET initial_timestamp = to_timestamp(CONCAT(year, '-', LPAD(month, 2, '0'), '-', LPAD(day, 2, '0'), ' ', "timestamp"), 'YYYY-MM-DD HH24:MI:SS');
-
-
-
 SELECT 
 	year,
 	'"hours": ' || TO_CHAR(interval_time_taken,'HH')::integer || ',' || 
@@ -99,7 +84,12 @@ FROM(
 				year,
 				initial_timestamp,
 				LEAD(initial_timestamp) OVER (ORDER BY initial_timestamp DESC) AS next_timestamp
-			  FROM dim_date_times
+			  FROM (
+					SELECT -- Timestamp from year, month, day, timestamp columns (the table is not altered so reports can be rerun)
+						year,
+						to_timestamp(CONCAT(year, '-', LPAD(month, 2, '0'), '-', LPAD(day, 2, '0'), ' ', "timestamp"), 'YYYY-MM-DD HH24:MI:SS') AS initial_timestamp
+					FROM dim_date_times
+			  )
 		)
 		GROUP BY year
 		ORDER BY interval_time_taken DESC
@@ -1,8 +1,30 @@
-import pandas as pd
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+from collections.abc import Callable
+from functools import partial
+from typing import TYPE_CHECKING
 import yaml
-from data_handling.database_utils import DatabaseConnector
-from data_handling.data_cleaning import DataCleaning
-from data_handling.data_extraction import DataExtractor
+from data_handling.instrumentation import JsonLinesSink, instrumentation
+from data_handling.orchestration import PipelineOrchestrator
+
+if TYPE_CHECKING:
+    # Annotations only, the pipelines load pandas and the modules using it when they run, so importing main
+    # (also done by each spawned --processes worker) stays fast
+    import pandas as pd
+    from data_handling.dtype_planner import DtypePlanner
+    from data_handling.extract_cache import ExtractCache
+    from data_handling.integrity import IntegrityChecker
+
+
+# Seconds the cached store API extract is reused: its fingerprint (the number of stores) misses changes to existing stores
+STORE_DATA_MAX_AGE = 3600
+
+# Objects shared by the pipelines of a process, created on first use (see shared_object)
+SHARED_OBJECTS = {}
+SHARED_OBJECTS_LOCK = threading.Lock()
 
 
 def read_yaml_data(filename: str) -> dict[str, str]:
@@ -10,38 +32,117 @@ def read_yaml_data(filename: str) -> dict[str, str]:
         yaml_data = yaml.safe_load(file)
     return yaml_data
 
-def clean_user() -> None:
+def shared_object(name: str, factory: Callable[[], object]) -> object:
+    # Pipelines run on threads, the first one asking for an object creates it and the others reuse it
+    with SHARED_OBJECTS_LOCK:
+        if name not in SHARED_OBJECTS:
+            SHARED_OBJECTS[name] = factory()
+        return SHARED_OBJECTS[name]
+
+def get_extract_cache() -> ExtractCache:
+    # Local cache of raw extracts, disabled with --no-cache
+    from data_handling.extract_cache import ExtractCache
+    return shared_object('extract_cache', ExtractCache)
+
+def get_dtype_planner() -> DtypePlanner:
+    # Compact dtypes applied to every extracted frame before cleaning
+    from data_handling.dtype_planner import DtypePlanner
+    return shared_object('dtype_planner', DtypePlanner)
+
+def read_dimension_keys(table_name: str, key_column: str) -> pd.Series:
+    # Keys of a dimension loaded by another run or process
+    from data_handling.database_utils import DatabaseConnector
+    return DatabaseConnector(filename='postgres_link.yaml', table_name=table_name).read_distinct(key_column)
+
+def get_integrity_checker() -> IntegrityChecker:
+    # Primary and foreign key checks between cleaning and upload, violations are quarantined unless --integrity report
+    from data_handling.integrity import IntegrityChecker
+    return shared_object('integrity_checker', partial(IntegrityChecker, key_loader=read_dimension_keys))
+
+def upload_quarantine(table_name: str, append: bool = False) -> None:
+    # Keep the rows removed by the integrity checks in '<table>_quarantine' for inspection, replaced on a full load
+    # and appended to by an incremental load, so the rows quarantined by earlier runs are kept
+    import pandas as pd
+    from data_handling.database_utils import DatabaseConnector
+
+    quarantined = get_integrity_checker().quarantine.pop(table_name, [])
+    if quarantined:
+        postgres_conn_quarantine = DatabaseConnector(filename='postgres_link.yaml', dataframe=pd.concat(quarantined),
+                                                     table_name=f'{table_name}_quarantine')
+        postgres_conn_quarantine.upload_to_db(replace=not append)
+
+def clean_user(chunksize: int = None) -> None:
+    from data_handling.data_cleaning import DataCleaning
+    from data_handling.data_extraction import DataExtractor
+    from data_handling.database_utils import DatabaseConnector
+
     # Read the credentials
     rds_connector = DatabaseConnector(filename='db_creds.yaml')
     engine = rds_connector.init_db_engine()
 
+    # Stream the table chunk by chunk when a chunk size is given
+    if chunksize:
+        rds_extractor = DataExtractor(engine=engine, table_name='legacy_users')
+        users_chunks = DataCleaning().clean_chunks(rds_extractor.read_rds_table_chunks(chunksize), 'clean_user_data')
+        users_chunks = get_integrity_checker().check_chunks('dim_users', users_chunks)
+        postgres_conn_users = DatabaseConnector(filename='postgres_link.yaml', table_name='dim_users')
+        postgres_conn_users.upload_chunks_to_db(users_chunks)
+        upload_quarantine('dim_users')
+        return
+
     # Extract RDS table to dataframe
     rds_extractor = DataExtractor(engine=engine, table_name='legacy_users')
-    users_df = rds_extractor.read_rds_table()
+    users_df = get_extract_cache().cached('legacy_users', rds_extractor.rds_fingerprint(), rds_extractor.read_rds_table)
+    users_df = get_dtype_planner().apply(users_df, 'legacy_users')
 
     # Perform the cleaning of the user data
     clean_users_obj = DataCleaning(users_df)
     clean_user_df = clean_users_obj.clean_user_data()
-    print(clean_user_df)
+    clean_user_df = get_integrity_checker().check_dimension('dim_users', clean_user_df)
     # Upload of dataframe
     postgres_conn_users = DatabaseConnector(filename='postgres_link.yaml', dataframe=clean_user_df, table_name='dim_users')
     postgres_conn_users.upload_to_db()
+    upload_quarantine('dim_users')
+
+def clean_card(pdf_workers: int = None) -> None:
+    import pandas as pd
+    from data_handling.data_cleaning import DataCleaning
+    from data_handling.data_extraction import DataExtractor
+    from data_handling.database_utils import DatabaseConnector
 
-def clean_card() -> None:
     # Extract PDF pages from document
     urls = read_yaml_data('links.yaml')
     pdf_extractor = DataExtractor()
-    card_df = pdf_extractor.retrieve_pdf_data(urls['s3_pdf_url'])
+    pdf_url = urls['s3_pdf_url']
+
+    # Extract pages on a process pool and clean and upload them as they finish, when a number of workers is given
+    if pdf_workers:
+        card_pages = ([page_df] for page_df in pdf_extractor.retrieve_pdf_pages(pdf_url, max_workers=pdf_workers))
+        clean_card_chunks = DataCleaning().clean_chunks(card_pages, 'clean_card_data')
+        clean_card_chunks = get_integrity_checker().check_chunks('dim_card_details', clean_card_chunks)
+        postgres_conn_cards = DatabaseConnector(filename='postgres_link.yaml', table_name='dim_card_details')
+        postgres_conn_cards.upload_chunks_to_db(clean_card_chunks)
+        upload_quarantine('dim_card_details')
+        return
+    card_df = [get_extract_cache().cached(pdf_url, pdf_extractor.source_fingerprint(pdf_url),
+                                          lambda: pd.concat(pdf_extractor.retrieve_pdf_data(pdf_url)))]
+    card_df = [get_dtype_planner().apply(card_df[0], 'card_details')]
 
     # Perform the cleaning of the card data
     clean_card_obj = DataCleaning(card_df)
     clean_card_df = clean_card_obj.clean_card_data()
+    clean_card_df = get_integrity_checker().check_dimension('dim_card_details', clean_card_df)
 
     # Send to database
     postgres_conn_cards = DatabaseConnector(filename='postgres_link.yaml', dataframe=clean_card_df, table_name='dim_card_details')
     postgres_conn_cards.upload_to_db()
+    upload_quarantine('dim_card_details')
 
 def clean_stores() -> None:
+    from data_handling.data_cleaning import DataCleaning
+    from data_handling.data_extraction import DataExtractor
+    from data_handling.database_utils import DatabaseConnector
+
     # Return the number of stores to extract
     api_data = read_yaml_data('API.yaml')
     api_header = {'x-api-key': api_data['api_key']}
@@ -49,75 +150,216 @@ def clean_stores() -> None:
     list_stores_obj = DataExtractor(header=api_header)
     number_of_stores = list_stores_obj.list_number_of_stores(endpoint=api_data['number_stores_url'])
 
-    # Create empty store DataFrame and collect data from retrieve_stores_data() for each store number
-    store_data_df = pd.DataFrame()
+    # Collect data from every store concurrently
     store_data_obj = DataExtractor(header=api_header)
-    for store in range(number_of_stores['number_stores']):
-        store_data = store_data_obj.retrieve_stores_data(endpoint=api_data['store_data'].format(store))
-        store_data_df = pd.concat([store_data_df, pd.DataFrame([store_data])],ignore_index=True)
+    # The API has no content fingerprint, the number of stores is used instead and the extract expires after STORE_DATA_MAX_AGE
+    store_data_df = get_extract_cache().cached(api_data['store_data'], str(number_of_stores['number_stores']),
+                                               lambda: store_data_obj.retrieve_all_stores_data(endpoint=api_data['store_data'],
+                                                                                               number_of_stores=number_of_stores['number_stores']),
+                                               max_age=STORE_DATA_MAX_AGE)
+    store_data_df = get_dtype_planner().apply(store_data_df, 'store_details')
 
     # Perform the cleaning of the stores data
     clean_stores_obj = DataCleaning(dataframe=store_data_df)
     clean_stores_df = clean_stores_obj.clean_store_data()
+    clean_stores_df = get_integrity_checker().check_dimension('dim_store_details', clean_stores_df)
 
     # Send to database
     postgres_conn_stores = DatabaseConnector(filename='postgres_link.yaml', dataframe=clean_stores_df, table_name='dim_store_details')
     postgres_conn_stores.upload_to_db()
+    upload_quarantine('dim_store_details')
 
 def clean_products() -> None:
+    from data_handling.data_cleaning import DataCleaning
+    from data_handling.data_extraction import DataExtractor
+    from data_handling.database_utils import DatabaseConnector
+
     # Extract data
     urls = read_yaml_data('links.yaml')
     product_data_extractor = DataExtractor()
-    products_df = product_data_extractor.extract_from_s3(urls['s3_products_url']) 
+    products_url = urls['s3_products_url']
+    products_df = get_extract_cache().cached(products_url, product_data_extractor.source_fingerprint(products_url),
+                                             lambda: product_data_extractor.extract_from_s3(products_url))
+    products_df = get_dtype_planner().apply(products_df, 'products')
     
     # Convert all weights to kg (1 decimal) and clean data
     product_data_cleaner = DataCleaning(products_df)
     products_df = product_data_cleaner.convert_product_weights()  
     clean_products_df = product_data_cleaner.clean_products_data(products_df) 
+    clean_products_df = get_integrity_checker().check_dimension('dim_products', clean_products_df)
     
     # Upload of dataframe
     postgres_conn_products = DatabaseConnector(filename='postgres_link.yaml', dataframe=clean_products_df, table_name='dim_products')
     postgres_conn_products.upload_to_db()
+    upload_quarantine('dim_products')
+
+def clean_orders(chunksize: int = None, full_refresh: bool = False, key_column: str = 'index') -> None:
+    from data_handling.data_cleaning import DataCleaning
+    from data_handling.data_extraction import DataExtractor
+    from data_handling.database_utils import DatabaseConnector
 
-def clean_orders() -> None:
     # Read the credentials
     rds_connector = DatabaseConnector(filename='db_creds.yaml')
     engine = rds_connector.init_db_engine()
 
+    # Load only the orders past the high-water mark, unless a full refresh is required
+    postgres_conn_orders = DatabaseConnector(filename='postgres_link.yaml', table_name='orders_table')
+    watermark = None if full_refresh else postgres_conn_orders.read_watermark(key_column)
+    if watermark is not None:
+        rds_extractor = DataExtractor(engine=engine, table_name='orders_table')
+        # Stream the new orders chunk by chunk when a chunk size is given, all of them are upserted in one transaction
+        if chunksize:
+            orders_chunks = DataCleaning().clean_chunks(rds_extractor.read_rds_table_chunks(chunksize, key_column, watermark),
+                                                        'clean_orders_data')
+            orders_chunks = get_integrity_checker().check_chunks('orders_table', orders_chunks)
+            postgres_conn_orders.upsert_chunks_to_db(orders_chunks, key_column)
+            upload_quarantine('orders_table', append=True)
+            return
+        orders_df = rds_extractor.read_rds_table_since(key_column, watermark)
+        orders_df = DataCleaning(orders_df).clean_orders_data()
+        postgres_conn_orders.dataframe = get_integrity_checker().check_foreign_keys('orders_table', orders_df)
+        postgres_conn_orders.upsert_to_db(key_column)
+        upload_quarantine('orders_table', append=True)
+        return
+
+    # Stream the table chunk by chunk when a chunk size is given
+    if chunksize:
+        rds_extractor = DataExtractor(engine=engine, table_name='orders_table')
+        orders_chunks = DataCleaning().clean_chunks(rds_extractor.read_rds_table_chunks(chunksize), 'clean_orders_data')
+        orders_chunks = get_integrity_checker().check_chunks('orders_table', orders_chunks)
+        postgres_conn_orders.upload_chunks_to_db(orders_chunks)
+        upload_quarantine('orders_table')
+        return
+
     # Extract RDS table to dataframe
     rds_extractor = DataExtractor(engine=engine, table_name='orders_table')
-    orders_df = rds_extractor.read_rds_table()
+    orders_df = get_extract_cache().cached('orders_table', rds_extractor.rds_fingerprint(key_column), rds_extractor.read_rds_table)
+    orders_df = get_dtype_planner().apply(orders_df, 'orders_table')
 
     # Perform the cleaning of the orders data
     orders_data_cleaner = DataCleaning(orders_df)
     orders_df = orders_data_cleaner.clean_orders_data()
+    orders_df = get_integrity_checker().check_foreign_keys('orders_table', orders_df)
 
     # Upload of dataframe
     postgres_conn_products = DatabaseConnector(filename='postgres_link.yaml', dataframe=orders_df, table_name='orders_table')
     postgres_conn_products.upload_to_db()
+    upload_quarantine('orders_table')
+
+def clean_date_events(chunksize: int = None) -> None:
+    import pandas as pd
+    from data_handling.data_cleaning import DataCleaning
+    from data_handling.data_extraction import DataExtractor
+    from data_handling.database_utils import DatabaseConnector
 
-def clean_date_events() -> None:
     # Download JSON
     data = read_yaml_data('user_cred.yaml')
-    key = data['key']
-    secret = data['secret']
+    credentials = {'key': data['key'], 'secret': data['secret']}
     urls = read_yaml_data('links.yaml')
     json_url = urls['date_events_url']
-    sales_df = pd.read_json(json_url, storage_options={'key':key, 'secret':secret})
+    date_events_extractor = DataExtractor(credentials=credentials)
+
+    # Stream the JSON chunk by chunk when a chunk size is given
+    if chunksize:
+        sales_chunks = DataCleaning().clean_chunks(date_events_extractor.extract_date_events(json_url, chunksize), 'clean_date_events_data')
+        sales_chunks = get_integrity_checker().check_chunks('dim_date_times', sales_chunks)
+        postgres_conn_events = DatabaseConnector(filename='postgres_link.yaml', table_name='dim_date_times')
+        postgres_conn_events.upload_chunks_to_db(sales_chunks)
+        upload_quarantine('dim_date_times')
+        return
+
+    # Values are kept as read, like the chunked path does (no type inference, 'timestamp' stays text)
+    sales_df = get_extract_cache().cached(json_url, date_events_extractor.source_fingerprint(json_url),
+                                          lambda: pd.read_json(json_url, storage_options=credentials, dtype=False, convert_dates=False))
+    sales_df = get_dtype_planner().apply(sales_df, 'date_events')
 
-    # Clean NULL and gibberish by length of month values
-    sales_df = sales_df[sales_df['month'].str.len()<=2] # Values longer than 2 characters will be deleted from dataframe
+    # Clean NULL and gibberish month, year, day and time_period values
+    sales_df = DataCleaning(sales_df).clean_date_events_data()
+    sales_df = get_integrity_checker().check_dimension('dim_date_times', sales_df)
     # Upload dataframe to database
     postgres_conn_events = DatabaseConnector(filename='postgres_link.yaml', dataframe=sales_df, table_name='dim_date_times')
     postgres_conn_events.upload_to_db()
+    upload_quarantine('dim_date_times')
+
+
+
+def star_schema() -> None:
+    from data_handling.database_utils import DatabaseConnector
+
+    # Cast the uploaded tables and add the primary and foreign keys
+    postgres_conn_schema = DatabaseConnector(filename='postgres_link.yaml')
+    postgres_conn_schema.run_sql_file('SQL_database_schema/star_based_schema.sql')
+
+def sales_rollup(full_refresh: bool = False) -> None:
+    from data_handling.sales_metrics import SalesMetrics
 
+    # Add the newly loaded orders to the sales rollup the reports read from
+    SalesMetrics().refresh_rollup(full_refresh=full_refresh)
+
+def data_metrics() -> None:
+    from data_handling.sales_metrics import SalesMetrics
+
+    # Run the reports of data_metrics.sql and print their results and latency
+    reports = SalesMetrics().run_reports()
+    for name, report_df in reports.items():
+        print(f"\n{name}\n{report_df.to_string(index=False)}")
+
+# Dimension pipelines are independent, orders, the schema and the metrics run after all of them
+DIMENSION_PIPELINES = ('clean_user', 'clean_card', 'clean_stores', 'clean_products', 'clean_date_events')
+
+
+def apply_settings(no_cache: bool = False, integrity_mode: str = 'quarantine', metrics_file: str = None,
+                   profile_stages: list[str] = ()) -> None:
+    # Apply the run-wide options to the shared cache, checker and instrumentation, in this process
+    # and in each --processes worker, which re-imports main unless it is forked
+    get_extract_cache().enabled = not no_cache
+    get_integrity_checker().mode = integrity_mode
+    if metrics_file:
+        instrumentation.sinks.append(JsonLinesSink(metrics_file))
+    instrumentation.profile_stages.update(profile_stages)
+
+
+def build_orchestrator(args: argparse.Namespace) -> PipelineOrchestrator:
+    # Worker processes send their records back, this process writes them to the metrics file
+    worker_settings = (args.no_cache, args.integrity, None, args.profile_stage)
+    orchestrator = PipelineOrchestrator(max_workers=args.workers, use_processes=args.processes, keep_going=args.keep_going,
+                                        initializer=apply_settings, initargs=worker_settings)
+    orchestrator.add_pipeline('clean_user', partial(clean_user, chunksize=args.chunksize))
+    orchestrator.add_pipeline('clean_card', partial(clean_card, pdf_workers=args.pdf_workers))
+    orchestrator.add_pipeline('clean_stores', clean_stores)
+    orchestrator.add_pipeline('clean_products', clean_products)
+    orchestrator.add_pipeline('clean_date_events', partial(clean_date_events, chunksize=args.chunksize))
+    orchestrator.add_pipeline('clean_orders', partial(clean_orders, chunksize=args.chunksize, full_refresh=args.full_refresh),
+                              depends_on=DIMENSION_PIPELINES)
+    orchestrator.add_pipeline('star_schema', star_schema, depends_on=DIMENSION_PIPELINES + ('clean_orders',))
+    orchestrator.add_pipeline('sales_rollup', partial(sales_rollup, full_refresh=args.full_refresh), depends_on=('star_schema',))
+    orchestrator.add_pipeline('data_metrics', data_metrics, depends_on=('sales_rollup',))
+    return orchestrator
 
 
 if __name__ == '__main__':
-    # clean_user()
-    # clean_card()
-    # clean_stores()
-    # clean_products()
-    # clean_orders()
-    # clean_date_events()
-    pass
+    from data_handling.integrity import INTEGRITY_MODES
+
+    parser = argparse.ArgumentParser(description='Extract, clean and upload the retail data sources')
+    parser.add_argument('pipelines', nargs='*', metavar='pipeline',
+                        help='Pipelines to run (all when none given): ' + ', '.join(DIMENSION_PIPELINES + ('clean_orders', 'star_schema', 'sales_rollup', 'data_metrics')))
+    parser.add_argument('--workers', type=int, default=len(DIMENSION_PIPELINES), help='Maximum number of pipelines running at the same time')
+    parser.add_argument('--processes', action='store_true', help='Run pipelines on a process pool instead of a thread pool')
+    parser.add_argument('--keep-going', action='store_true', help='Keep running independent pipelines after a failure')
+    parser.add_argument('--chunksize', type=int, default=None, help='Stream the RDS tables (also the new orders of an incremental load) and the date events JSON in chunks of this many rows')
+    parser.add_argument('--pdf-workers', type=int, default=None, help='Extract the card details PDF on this many processes, page by page')
+    parser.add_argument('--full-refresh', action='store_true', help='Reload the whole orders_table and rebuild the sales rollup instead of adding the new orders')
+    parser.add_argument('--integrity', choices=INTEGRITY_MODES, default='quarantine',
+                        help="Move rows with duplicate primary keys or orphaned foreign keys to '<table>_quarantine', or only report them")
+    parser.add_argument('--no-cache', action='store_true', help='Extract every source again, bypassing the local cache')
+    parser.add_argument('--metrics-file', help='Append the metrics of every stage to this JSON-lines file')
+    parser.add_argument('--profile-stage', action='append', default=[], metavar='STAGE',
+                        help='Run a stage (e.g. DataCleaning.clean_user_data) under cProfile, stats go to <STAGE>.prof')
+    args = parser.parse_args()
+    apply_settings(args.no_cache, args.integrity, args.metrics_file, args.profile_stage)
+
+    results = build_orchestrator(args).run(args.pipelines or None)
+    # Pool metrics of the engines of this process, those of worker processes came back with their records
+    instrumentation.collect()
+    instrumentation.print_summary()
+    sys.exit(0 if all(result['status'] == 'success' for result in results.values()) else 1)
@@ -0,0 +1,30 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_handling.database_utils import DatabaseConnector  # noqa: E402 -- After the repository is on sys.path
+
+
+# PostgreSQL database the PostgreSQL tests run against (its public schema is dropped), skipped when not set
+TEST_POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+
+
+@pytest.fixture
+def postgres_link(tmp_path):
+    if not TEST_POSTGRES_URL:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    link_file = tmp_path / 'postgres_link.yaml'
+    link_file.write_text(f'url: {TEST_POSTGRES_URL}\n')
+    engine = DatabaseConnector(filename=str(link_file)).init_link_engine()
+    with engine.begin() as connection:
+        connection.exec_driver_sql('DROP SCHEMA public CASCADE; CREATE SCHEMA public')
+    return str(link_file)
+
+
+@pytest.fixture
+def sqlite_link(tmp_path):
+    link_file = tmp_path / 'sqlite_link.yaml'
+    link_file.write_text(f"url: sqlite:///{tmp_path / 'star_schema.db'}\n")
+    return str(link_file)
@@ -0,0 +1,146 @@
+import pandas as pd
+import pytest
+from data_handling.data_cleaning import DATE_CACHE_SIZE, DATE_FORMATS, DataCleaning, _parse_date
+
+
+@pytest.mark.parametrize('weight, weight_kg', [
+    ('1.95kg', 1.9),
+    ('7.45kg', 7.5),
+    ('0.45kg', 0.5),
+    ('1 x 1950g', 1.9),
+    ('12 x 100g', 1.2),
+    ('500ml', 0.5),
+    ('1160kg', 1.2),
+    ('16oz', 0.5),
+    ('0.25', 0.25),
+])
+def test_convert_product_weights_rounds_like_python_round(weight, weight_kg):
+    products_df = pd.DataFrame({'weight': [weight]})
+
+    converted_df = DataCleaning(products_df).convert_product_weights()
+
+    assert converted_df['weight'].tolist() == [weight_kg]
+
+
+def test_convert_product_weights_drops_gibberish_and_keeps_repeated_values():
+    products_df = pd.DataFrame({'weight': ['1.95kg', None, 'abc', '1.95kg', '7.45kg']})
+    cleaner = DataCleaning(products_df)
+
+    converted_df = cleaner.convert_product_weights()
+
+    assert converted_df['weight'].tolist() == [1.9, 1.9, 7.5]
+    assert converted_df.index.tolist() == [0, 3, 4]
+    assert cleaner.dropped_rows['weight'] == 2
+
+
+def test_weight_class_of_rounded_weight():
+    products_df = pd.DataFrame({
+        'weight': ['1.95kg', '39.94kg'],
+        'EAN': ['123', '4567890123456'],
+        'date_added': ['2020-01-01', '2021-02-03'],
+        'product_price': ['£1.50', '£10.00'],
+        'removed': ['Still_avaliable', 'Removed'],
+    })
+    cleaner = DataCleaning(products_df)
+
+    clean_df = cleaner.clean_products_data(cleaner.convert_product_weights())
+
+    assert clean_df['weight_class'].tolist() == ['Light', 'Mid_Sized']
+    assert clean_df['still_available'].tolist() == [True, False]
+
+
+@pytest.mark.parametrize('value, date_format', [
+    ('2021-03-04', '%Y-%m-%d'),
+    ('2021/03/04', '%Y/%m/%d'),
+    ('2021 March 04', '%Y %B %d'),
+    ('March 2021 04', '%B %Y %d'),
+    ('2021-03-04 00:00:00', '%Y-%m-%d %H:%M:%S'),
+])
+def test_convert_to_datetime_fast_paths(value, date_format):
+    cleaner = DataCleaning()
+
+    converted_df = cleaner.convert_to_datetime(pd.DataFrame({'date': [value, None]}), 'date')
+
+    assert converted_df['date'].tolist()[0] == pd.Timestamp('2021-03-04')
+    assert pd.isna(converted_df['date'].tolist()[1])
+    stats = cleaner.date_parse_stats['date']
+    assert stats[date_format] == 1
+    assert sum(stats.get(other, 0) for other in DATE_FORMATS if other != date_format) == 0
+    assert stats['dateutil'] == stats['unparsed'] == 0
+
+
+def test_convert_to_datetime_falls_back_to_dateutil_once_per_value():
+    dates_df = pd.DataFrame({'date': ['2021-03-04', '04 March 2021', '04 March 2021', 'not a date', None]},
+                            index=[0, 1, 1, 2, 3])
+    cleaner = DataCleaning()
+    _parse_date.cache_clear()
+
+    converted_df = cleaner.convert_to_datetime(dates_df, 'date')
+
+    assert converted_df['date'].tolist()[:3] == [pd.Timestamp('2021-03-04')] * 3
+    assert converted_df['date'].iloc[3:].isna().all()
+    assert cleaner.date_parse_stats['date'] == {'%Y-%m-%d': 1, '%Y/%m/%d': 0, '%Y %B %d': 0, '%B %Y %d': 0,
+                                                '%Y-%m-%d %H:%M:%S': 0, 'dateutil': 2, 'unparsed': 1}
+    # dateutil runs once per unique value left, behind a bounded cache
+    cache_info = _parse_date.cache_info()
+    assert (cache_info.misses, cache_info.maxsize) == (2, DATE_CACHE_SIZE)
+
+
+
+def row_loop_phone_numbers(users_df: pd.DataFrame) -> list[str]:
+    # The regex replaces and row loop normalise_phone_numbers replaced, its output is the reference
+    users_df = users_df.copy()
+    users_df['phone_number'] = users_df['phone_number'].replace({r'\+': '', r'\(': '', r'\)': '', r'-': '', r' ': '', r'\.': ''}, regex=True)
+    users_df['phone_number'] = users_df['phone_number'].str.split('x').str[0]
+    for index in users_df.index:
+        users_df.at[index, 'phone_number'] = users_df['phone_number'][index][-10:]
+        if users_df['country_code'][index] == 'GB':
+            users_df.loc[users_df['phone_number'] == users_df['phone_number'][index][-10:], 'phone_number'] = '0' + users_df['phone_number'][index]
+    return users_df['phone_number'].tolist()
+
+
+@pytest.mark.parametrize('country_code, phone_numbers, normalised', [
+    ('GB', ['+44(0)20 7946 0018', '020 7946 0958', '(01632) 960 001'], ['02079460018', '02079460958', '01632960001']),
+    ('DE', ['+49 (0) 30 901820', '030 901820 77'], ['9030901820', '3090182077']),
+    ('US', ['001-555-867-5309x1234', '(555).867.5309', '+1-555-867-5309'], ['5558675309'] * 3),
+    ('FR', ['+33 1 23 45 67 89'], ['3123456789']),
+])
+def test_normalise_phone_numbers_per_country(country_code, phone_numbers, normalised):
+    users_df = pd.DataFrame({'country_code': country_code, 'phone_number': phone_numbers})
+    reference = row_loop_phone_numbers(users_df)
+
+    users_df = DataCleaning().normalise_phone_numbers(users_df)
+
+    assert users_df['phone_number'].tolist() == normalised == reference
+
+
+def test_store_data_rules_count_the_rows_dropped_by_each_rule():
+    stores_df = pd.DataFrame({'continent': ['Europe', 'eeEurope', 'America', 'eeAmerica', 'NULL', 'QMAFUQ2DL9', 'Europe'],
+                              'staff_numbers': ['13', 'J78', '30', '3n9', None, 'A97', '12'],
+                              'longitude': ['-0.12', 'N/A', '13.4', '-74.0', None, '1.0', '2.35'],
+                              'latitude': ['51.5', '52.5', None, '40.7', None, '3.0', '48.85'],
+                              'opening_date': ['2010-06-12', '2005-03-01', '1996-10-25', '2012-08-04', None,
+                                               '2001-01-01', 'October 2012 08']})
+    cleaner = DataCleaning(stores_df)
+
+    clean_df = cleaner.clean_store_data()
+
+    assert cleaner.dropped_rows == {'continent': 2}
+    assert clean_df['continent'].tolist() == ['Europe', 'Europe', 'America', 'America', 'Europe']
+    assert clean_df['staff_numbers'].tolist() == [13, 78, 30, 39, 12]
+    assert clean_df['staff_numbers'].dtype == 'Int64'
+    assert clean_df['longitude'].isna().tolist() == [False, True, False, False, False]
+
+
+def test_apply_rules_counts_each_dropped_row_once_under_its_first_failing_rule():
+    rules = {'scrub': {'code': {'-': ''}}, 'pattern': {'code': r'\d{3}', 'year': r'\d{4}'},
+             'allowed': {'kind': ('a', 'b')}}
+    dataframe = pd.DataFrame({'code': ['1-23', 'x12', '456', '789', 'bad'], 'year': ['2020', '20', '1999', '2001', 'nope'],
+                              'kind': ['a', 'c', 'c', 'b', 'z']})
+    cleaner = DataCleaning()
+
+    clean_df = cleaner.apply_rules(dataframe, rules)
+
+    assert cleaner.dropped_rows == {'code': 2, 'year': 0, 'kind': 1}
+    assert clean_df['code'].tolist() == ['123', '789']
+    assert dataframe['code'].tolist()[0] == '1-23'
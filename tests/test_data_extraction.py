@@ -0,0 +1,223 @@
+import gzip
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import pytest
+import sqlalchemy
+from data_handling.data_extraction import DataExtractor
+
+
+# Latency of every response of the stub store API, in seconds
+STORE_API_LATENCY = 0.1
+
+# Frame stored as every supported S3 object format
+PRODUCTS_DF = pd.DataFrame({'product_name': ['Mug', 'Kettle', 'Lamp', 'Chair', 'Rug'],
+                            'product_price': ['£1.99', '£24.50', '£9.00', '£45.00', '£12.75'],
+                            'weight': ['0.3kg', '1.2kg', '800g', '7kg', '2kg']})
+
+
+class StubStoreApi(BaseHTTPRequestHandler):
+    """
+    Store API answering /store_details/<number> after STORE_API_LATENCY, with scripted failures per store:
+    a list of status codes (or 'drop' to close the connection) returned before the store succeeds
+    """
+    failures = {}
+    requests = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        store = int(self.path.rsplit('/', 1)[-1])
+        with self.lock:
+            attempt = self.requests[store]
+            self.requests[store] += 1
+        time.sleep(STORE_API_LATENCY)
+        failures = self.failures.get(store, [])
+        outcome = failures[attempt] if attempt < len(failures) else 200
+        if outcome == 'drop':
+            self.close_connection = True
+            return
+        body = b'{"message": "failure"}' if outcome != 200 else (
+            f'{{"index": {store}, "store_code": "ST-{store}", "api_key": "{self.headers.get("x-api-key")}"}}'.encode())
+        self.send_response(outcome)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def store_api():
+    StubStoreApi.failures = {}
+    StubStoreApi.requests = Counter()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubStoreApi)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/store_details/{{}}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_retrieve_all_stores_data_runs_concurrently(store_api):
+    extractor = DataExtractor(header={'x-api-key': 'secret'})
+
+    start = time.perf_counter()
+    stores_df = extractor.retrieve_all_stores_data(store_api, number_of_stores=16, max_workers=8)
+    elapsed = time.perf_counter() - start
+
+    assert sorted(stores_df['index']) == list(range(16))
+    assert set(stores_df['api_key']) == {'secret'}
+    # Sequential requests take 16 x the latency, 8 workers about 2 x
+    assert elapsed < 8 * STORE_API_LATENCY
+
+
+def test_retrieve_all_stores_data_retries_transient_failures(store_api):
+    StubStoreApi.failures = {2: [503], 3: [429, 502], 4: ['drop']}
+    extractor = DataExtractor()
+
+    stores_df = extractor.retrieve_all_stores_data(store_api, number_of_stores=6, backoff=0.01)
+
+    assert sorted(stores_df['index']) == list(range(6))
+    assert StubStoreApi.requests[2] == 2
+    assert StubStoreApi.requests[3] == 3
+    assert StubStoreApi.requests[4] == 2
+
+
+def test_retrieve_all_stores_data_does_not_retry_client_errors(store_api):
+    StubStoreApi.failures = {1: [404] * 4, 2: [403] * 4, 3: [500] * 4}
+    extractor = DataExtractor()
+
+    stores_df = extractor.retrieve_all_stores_data(store_api, number_of_stores=5, retries=3, backoff=0.01)
+
+    assert sorted(stores_df['index']) == [0, 4]
+    assert StubStoreApi.requests[1] == 1
+    assert StubStoreApi.requests[2] == 1
+    # Server errors are retried until the retries run out
+    assert StubStoreApi.requests[3] == 4
+
+
+def test_read_rds_table_chunks_past_watermark(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'rds.db'}")
+    pd.DataFrame({'index': [4, 0, 3, 1, 2, 5], 'product_code': list('eadbcf')}).to_sql('orders_table', engine, index=False)
+    extractor = DataExtractor(engine=engine, table_name='orders_table')
+
+    chunks = list(extractor.read_rds_table_chunks(2, key_column='index', watermark=1))
+
+    assert [chunk['index'].tolist() for chunk in chunks] == [[2, 3], [4, 5]]
+    assert pd.concat(chunks, ignore_index=True).equals(extractor.read_rds_table_since('index', 1))
+
+
+def test_date_events_read_whole_or_in_chunks_keep_the_same_values(tmp_path):
+    json_path = tmp_path / 'date_details.json'
+    pd.DataFrame({'timestamp': ['22:00:06', '09:51:29', '23:04:18'], 'month': ['09', '2', 'NULL'],
+                  'year': ['2012', '1997', '1994'], 'day': ['19', '10', 'NULL'], 'time_period': ['Evening'] * 3,
+                  'date_uuid': ['3b7ca996-37f9-433f-b6d0-ce8391b615ad'] * 3,
+                  'note': ['late', 'early', None]}).to_json(json_path)
+
+    whole_df = pd.read_json(json_path, dtype=False, convert_dates=False)
+    chunks = list(DataExtractor().extract_date_events(str(json_path), chunksize=2))
+    chunked_df = pd.concat(chunks)
+
+    # Each chunk has the dtypes of the whole read, also the last one whose only 'note' is NULL
+    assert all(chunk.dtypes.equals(whole_df.dtypes) for chunk in chunks)
+    pd.testing.assert_frame_equal(whole_df, chunked_df, check_index_type=False)
+    assert whole_df['timestamp'].tolist() == ['22:00:06', '09:51:29', '23:04:18']
+    assert whole_df['month'].tolist() == ['09', '2', 'NULL']
+
+
+def test_s3_clients_are_shared_per_credentials():
+    first = DataExtractor.get_s3_client({'key': 'first', 'secret': 'one'})
+
+    assert DataExtractor.get_s3_client({'key': 'first', 'secret': 'one'}) is first
+    assert DataExtractor.get_s3_client({'key': 'second', 'secret': 'two'}) is not first
+    assert first._request_signer._credentials.access_key == 'first'
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+class FileBackedS3:
+    """
+    S3 client serving the objects of a local directory, keeping every Body it returned so tests can check it was closed
+    """
+    def __init__(self, directory) -> None:
+        self.directory = directory
+        self.bodies = []
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        path = self.directory / Bucket / Key
+        self.bodies.append(open(path, 'rb'))
+        return {'Body': self.bodies[-1], 'ContentLength': path.stat().st_size}
+
+
+@pytest.fixture
+def s3(tmp_path, monkeypatch):
+    bucket = tmp_path / 'data-bucket'
+    bucket.mkdir()
+    csv = PRODUCTS_DF.to_csv(index=False).encode()
+    (bucket / 'products.csv').write_bytes(csv)
+    (bucket / 'products.csv.gz').write_bytes(gzip.compress(csv))
+    if _installed('zstandard'):
+        import zstandard
+        (bucket / 'products.csv.zst').write_bytes(zstandard.ZstdCompressor().compress(csv))
+    if _installed('pyarrow'):
+        PRODUCTS_DF.to_parquet(bucket / 'products.parquet', index=False)
+    client = FileBackedS3(tmp_path)
+    monkeypatch.setattr(DataExtractor, 'get_s3_client', staticmethod(lambda credentials=None: client))
+    return client
+
+
+S3_OBJECTS = ['products.csv', 'products.csv.gz',
+              pytest.param('products.csv.zst', marks=pytest.mark.skipif(not _installed('zstandard'), reason='zstandard is not installed')),
+              pytest.param('products.parquet', marks=pytest.mark.skipif(not _installed('pyarrow'), reason='pyarrow is not installed'))]
+
+
+@pytest.mark.parametrize('key', S3_OBJECTS)
+def test_extract_from_s3_reads_every_format_and_closes_the_body(s3, key):
+    products_df = DataExtractor().extract_from_s3(f's3://data-bucket/{key}')
+
+    pd.testing.assert_frame_equal(products_df, PRODUCTS_DF, check_dtype=False)
+    assert products_df.astype(object).equals(PRODUCTS_DF.astype(object))
+    assert [body.closed for body in s3.bodies] == [True]
+
+
+@pytest.mark.parametrize('key', S3_OBJECTS)
+def test_extract_from_s3_in_chunks_closes_the_body_once_consumed(s3, key):
+    chunks = DataExtractor().extract_from_s3(f's3://data-bucket/{key}', chunksize=2)
+
+    # The object is only opened when the first chunk is read
+    assert s3.bodies == []
+    chunks = list(chunks)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), PRODUCTS_DF, check_dtype=False)
+    assert [body.closed for body in s3.bodies] == [True]
+
+
+def test_extract_from_s3_in_chunks_closes_the_body_when_stopped_early(s3):
+    chunks = DataExtractor().extract_from_s3('s3://data-bucket/products.csv.gz', chunksize=2)
+
+    assert len(next(chunks)) == 2
+    assert [body.closed for body in s3.bodies] == [False]
+    chunks.close()
+    assert [body.closed for body in s3.bodies] == [True]
+
+
+@pytest.mark.parametrize('key', S3_OBJECTS)
+def test_open_stream_decompresses_local_files(s3, key):
+    path = s3.directory / 'data-bucket' / key
+
+    with DataExtractor().open_stream(str(path)) as (stream, extension):
+        content = stream.read()
+    assert stream.closed
+    assert extension == ('.parquet' if key.endswith('.parquet') else '.csv')
+    if extension == '.csv':
+        assert content == PRODUCTS_DF.to_csv(index=False).encode()
@@ -0,0 +1,189 @@
+import os
+import uuid
+import pandas as pd
+import pytest
+import sqlalchemy
+from data_handling.database_utils import DatabaseConnector
+
+
+SCHEMA_SQL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'SQL_database_schema', 'star_based_schema.sql')
+
+
+def read_column(link_file: str, table_name: str, column: str) -> list:
+    engine = DatabaseConnector(filename=link_file).init_link_engine()
+    with engine.connect() as connection:
+        return connection.execute(sqlalchemy.text(f'SELECT CAST("{column}" AS TEXT) FROM "{table_name}" ORDER BY "index"')).scalars().all()
+
+
+def star_schema_tables() -> dict[str, pd.DataFrame]:
+    user_uuids = [str(uuid.uuid4()) for _ in range(3)]
+    date_uuids = [str(uuid.uuid4()) for _ in range(3)]
+    return {
+        'dim_users': pd.DataFrame({'user_uuid': user_uuids, 'join_date': pd.to_datetime(['2020-01-01'] * 3)}),
+        'dim_date_times': pd.DataFrame({'date_uuid': date_uuids, 'month': ['1', '2', '3'], 'year': ['2020'] * 3}),
+        'dim_card_details': pd.DataFrame({'card_number': ['4111', '4222', '4333']}),
+        'dim_store_details': pd.DataFrame({'store_code': ['ST-1', 'ST-2', 'ST-3']}),
+        'dim_products': pd.DataFrame({'product_code': ['P1', 'P2', 'P3'], 'product_price': [1.0, 2.0, 3.0]}),
+        'orders_table': pd.DataFrame({'index': [0, 1, 2], 'user_uuid': user_uuids, 'date_uuid': date_uuids,
+                                      'card_number': ['4111', '4222', '4333'], 'store_code': ['ST-1', 'ST-2', 'ST-3'],
+                                      'product_code': ['P1', 'P2', 'P3'], 'product_quantity': [1, 2, 3]}),
+    }
+
+
+def star_schema_constraints(link_file: str) -> list[tuple[str, str]]:
+    engine = DatabaseConnector(filename=link_file).init_link_engine()
+    with engine.connect() as connection:
+        return connection.execute(sqlalchemy.text(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE contype IN ('p', 'f') AND connamespace = 'public'::regnamespace ORDER BY 1, 2"
+        )).all()
+
+
+def test_star_schema_survives_reloads(postgres_link):
+    tables = star_schema_tables()
+    constraints = None
+    for _ in range(2):
+        # Every table is replaced while the keys of the previous run exist, then the schema script runs again
+        for table_name, dataframe in tables.items():
+            DatabaseConnector(filename=postgres_link, dataframe=dataframe, table_name=table_name).upload_to_db()
+        DatabaseConnector(filename=postgres_link).run_sql_file(SCHEMA_SQL_FILE)
+        DatabaseConnector(filename=postgres_link).run_sql_file(SCHEMA_SQL_FILE)
+        assert constraints is None or star_schema_constraints(postgres_link) == constraints
+        constraints = star_schema_constraints(postgres_link)
+
+    assert len(constraints) == 10
+    assert ('orders_table', 'fk_order_user_uuid') in constraints
+
+
+def upload_then_upsert_orders(link_file: str) -> list[str]:
+    orders_df = star_schema_tables()['orders_table']
+    DatabaseConnector(filename=link_file, dataframe=orders_df, table_name='orders_table').upload_to_db()
+    new_orders_df = star_schema_tables()['orders_table'].assign(index=[3, 4, 5])
+    DatabaseConnector(filename=link_file, dataframe=new_orders_df, table_name='orders_table').upsert_to_db('index')
+    return orders_df['date_uuid'].tolist() + new_orders_df['date_uuid'].tolist()
+
+
+def test_uuid_columns_store_the_same_text_through_load_and_upsert(sqlite_link):
+    date_uuids = upload_then_upsert_orders(sqlite_link)
+
+    assert read_column(sqlite_link, 'orders_table', 'date_uuid') == date_uuids
+
+
+def test_uuid_columns_are_native_uuid_on_postgres(postgres_link):
+    date_uuids = upload_then_upsert_orders(postgres_link)
+
+    assert read_column(postgres_link, 'orders_table', 'date_uuid') == date_uuids
+    columns = sqlalchemy.inspect(DatabaseConnector(filename=postgres_link).init_link_engine()).get_columns('orders_table')
+    assert {column['name']: str(column['type']) for column in columns}['date_uuid'] == 'UUID'
+
+
+def test_upsert_chunks_updates_existing_keys_and_adds_new_ones(sqlite_link):
+    orders_df = star_schema_tables()['orders_table']
+    DatabaseConnector(filename=sqlite_link, dataframe=orders_df, table_name='orders_table').upload_to_db()
+    changed_df = orders_df.iloc[2:].assign(product_quantity=[9])
+    new_df = star_schema_tables()['orders_table'].assign(index=[3, 4, 5])
+
+    connector = DatabaseConnector(filename=sqlite_link, table_name='orders_table')
+    rows = connector.upsert_chunks_to_db(iter([changed_df, new_df.iloc[:2], new_df.iloc[2:]]), 'index', batch_size=2)
+
+    assert rows == 4
+    assert connector.read_watermark('index') == 5
+    assert read_column(sqlite_link, 'orders_table', 'product_quantity') == ['1', '2', '9', '1', '2', '3']
+
+
+def mixed_frame(rows: int = 7) -> pd.DataFrame:
+    return pd.DataFrame({'index': range(rows), 'quantity': [row * 3 for row in range(rows)],
+                         'price': [row + 0.25 for row in range(rows)], 'name': [f'item {row}' for row in range(rows)],
+                         'available': [row % 2 == 0 for row in range(rows)],
+                         'added': pd.to_datetime(['2021-05-01'] * rows) + pd.to_timedelta(range(rows), unit='D')})
+
+
+def read_table(link_file: str, table_name: str) -> tuple[pd.DataFrame, dict[str, str]]:
+    engine = DatabaseConnector(filename=link_file).init_link_engine()
+    columns = sqlalchemy.inspect(engine).get_columns(table_name)
+    return pd.read_sql_table(table_name, engine), {column['name']: str(column['type']) for column in columns}
+
+
+def test_chunked_sqlite_upload_matches_to_sql(sqlite_link):
+    dataframe = mixed_frame()
+    engine = DatabaseConnector(filename=sqlite_link).init_link_engine()
+    dataframe.to_sql('expected_table', engine, index=False)
+
+    connector = DatabaseConnector(filename=sqlite_link, table_name='mixed_table')
+    rows = connector.upload_chunks_to_db(iter([dataframe.iloc[:3], dataframe.iloc[3:5], dataframe.iloc[5:]]), batch_size=2)
+
+    uploaded_df, uploaded_types = read_table(sqlite_link, 'mixed_table')
+    expected_df, expected_types = read_table(sqlite_link, 'expected_table')
+    assert rows == len(dataframe)
+    assert connector.rows_per_second > 0
+    assert uploaded_types == expected_types
+    pd.testing.assert_frame_equal(uploaded_df, expected_df)
+
+
+def test_postgres_reload_swaps_the_table_in_only_once_every_chunk_loaded(postgres_link):
+    dataframe = mixed_frame()
+    connector = DatabaseConnector(filename=postgres_link, dataframe=dataframe, table_name='mixed_table')
+    connector.upload_to_db()
+
+    def failing_chunks():
+        yield dataframe.iloc[:3].assign(quantity=0)
+        raise RuntimeError('source lost')
+
+    with pytest.raises(RuntimeError):
+        connector.upload_chunks_to_db(failing_chunks())
+    # The failed reload leaves the table and no staging table behind
+    uploaded_df, _ = read_table(postgres_link, 'mixed_table')
+    pd.testing.assert_frame_equal(uploaded_df, dataframe, check_dtype=False)
+    assert not sqlalchemy.inspect(connector.init_link_engine()).has_table('mixed_table_staging')
+
+    rows = connector.upload_chunks_to_db(iter([dataframe.iloc[4:], dataframe.iloc[:2]]), batch_size=2)
+    uploaded_df, _ = read_table(postgres_link, 'mixed_table')
+    assert rows == 5
+    assert uploaded_df['index'].tolist() == [4, 5, 6, 0, 1]
+
+
+def test_empty_reload_leaves_an_empty_table_with_the_same_columns(sqlite_link):
+    connector = DatabaseConnector(filename=sqlite_link, dataframe=mixed_frame(), table_name='mixed_table')
+    connector.upload_to_db()
+    _, types = read_table(sqlite_link, 'mixed_table')
+
+    assert connector.upload_chunks_to_db(iter([])) == 0
+
+    uploaded_df, uploaded_types = read_table(sqlite_link, 'mixed_table')
+    assert uploaded_df.empty
+    assert uploaded_types == types
+
+
+def test_empty_load_creates_a_star_schema_table_from_its_types(postgres_link):
+    DatabaseConnector(filename=postgres_link, table_name='dim_date_times').upload_chunks_to_db(iter([]))
+
+    uploaded_df, uploaded_types = read_table(postgres_link, 'dim_date_times')
+    assert uploaded_df.empty
+    assert uploaded_types == {'month': 'VARCHAR(2)', 'year': 'VARCHAR(4)', 'day': 'VARCHAR(2)',
+                              'time_period': 'VARCHAR(10)', 'date_uuid': 'UUID'}
+
+
+def test_star_schema_checks_only_the_orders_loaded_since_the_last_run(postgres_link):
+    tables = star_schema_tables()
+    for table_name, dataframe in tables.items():
+        DatabaseConnector(filename=postgres_link, dataframe=dataframe, table_name=table_name).upload_to_db()
+    DatabaseConnector(filename=postgres_link).run_sql_file(SCHEMA_SQL_FILE)
+    users_df, orders_df = tables['dim_users'], tables['orders_table']
+
+    def reload_users_and_add_order(index: int, user_uuid: str) -> None:
+        # The first user is left out of the reload, orphaning the first order loaded before
+        DatabaseConnector(filename=postgres_link, dataframe=users_df.iloc[1:], table_name='dim_users').upload_to_db()
+        new_order_df = orders_df.iloc[1:2].assign(index=index, user_uuid=user_uuid)
+        DatabaseConnector(filename=postgres_link, dataframe=new_order_df, table_name='orders_table').upsert_to_db('index')
+        DatabaseConnector(filename=postgres_link).run_sql_file(SCHEMA_SQL_FILE)
+
+    reload_users_and_add_order(3, users_df['user_uuid'].iloc[1])
+    assert ('orders_table', 'fk_order_user_uuid') in star_schema_constraints(postgres_link)
+    with pytest.raises(sqlalchemy.exc.IntegrityError, match='1 new orders'):
+        reload_users_and_add_order(4, users_df['user_uuid'].iloc[0])
+
+    # A reloaded orders_table is validated whole
+    DatabaseConnector(filename=postgres_link, dataframe=orders_df, table_name='orders_table').upload_to_db()
+    with pytest.raises(sqlalchemy.exc.IntegrityError, match='fk_order_user_uuid'):
+        DatabaseConnector(filename=postgres_link).run_sql_file(SCHEMA_SQL_FILE)
@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_handling.dtype_planner import DtypePlanner
+
+
+@pytest.mark.parametrize('values, expected', [
+    ([0, 200], 'uint8'),
+    ([0, 70000], 'uint32'),
+    ([-1, 200], 'int16'),
+    ([0, 2 ** 40], None),
+    (np.array([0, 2 ** 40], dtype='uint64'), 'int64'),
+])
+def test_integers_are_never_planned_as_uint64(values, expected):
+    dtypes = DtypePlanner().plan(pd.DataFrame({'index': values}))
+    assert dtypes.get('index') == expected
@@ -0,0 +1,61 @@
+import os
+import time
+import pandas as pd
+from data_handling.extract_cache import ExtractCache
+
+
+def test_cached_extract_expires_after_max_age(tmp_path):
+    cache = ExtractCache(cache_dir=str(tmp_path))
+    calls = []
+
+    def extract():
+        calls.append(1)
+        return pd.DataFrame({'store_code': [f'ST-{len(calls)}']})
+
+    assert cache.cached('stores', '451', extract, max_age=60)['store_code'].tolist() == ['ST-1']
+    assert cache.cached('stores', '451', extract, max_age=60)['store_code'].tolist() == ['ST-1']
+    # Written two minutes ago, reading it must not make it fresh again
+    path = cache.path('stores', '451')
+    os.utime(path, (time.time(), time.time() - 120))
+    assert cache.cached('stores', '451', extract, max_age=60)['store_code'].tolist() == ['ST-2']
+    assert len(calls) == 2
+    # Sources without max_age are reused whatever their age
+    os.utime(path, (time.time(), time.time() - 120))
+    assert cache.cached('stores', '451', extract)['store_code'].tolist() == ['ST-2']
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    cache = ExtractCache(cache_dir=str(tmp_path))
+    for source in ('a', 'b', 'c'):
+        cache.put(source, '1', pd.DataFrame({'value': range(1000)}))
+    sizes = {source: os.path.getsize(cache.path(source, '1')) for source in ('a', 'b', 'c')}
+    now = time.time()
+    for age, source in enumerate(('b', 'a', 'c')):
+        os.utime(cache.path(source, '1'), (now - 100 + age, now))
+
+    cache.max_bytes = sizes['a'] + sizes['c']
+    cache.evict()
+
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(cache.path(source, '1')) for source in ('a', 'c'))
+
+
+def test_evict_skips_entries_removed_meanwhile(tmp_path, monkeypatch):
+    cache = ExtractCache(cache_dir=str(tmp_path))
+    for source in ('a', 'b', 'c'):
+        cache.put(source, '1', pd.DataFrame({'value': [1]}))
+    os.remove(cache.path('a', '1'))
+    # Another pipeline removes 'a' between the directory listing and its stat, and 'b' before this one removes it
+    listdir, remove = os.listdir, os.remove
+    monkeypatch.setattr(os, 'listdir', lambda path: listdir(path) + [os.path.basename(cache.path('a', '1'))])
+
+    def concurrent_remove(path):
+        if path == cache.path('b', '1'):
+            remove(path)
+        remove(path)
+    monkeypatch.setattr(os, 'remove', concurrent_remove)
+
+    cache.max_bytes = 0
+    cache.evict()
+
+    assert listdir(tmp_path) == []
+    assert cache.get('b', '1') is None
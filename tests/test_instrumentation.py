@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+from data_handling.data_cleaning import DataCleaning
+from data_handling.instrumentation import instrumentation
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    received = []
+    monkeypatch.setattr(instrumentation, 'records', [])
+    monkeypatch.setattr(instrumentation, 'sinks', [received.append])
+    return received
+
+
+def date_events_chunk(start: int) -> pd.DataFrame:
+    # One row per chunk fails the month pattern
+    return pd.DataFrame({'month': ['1', 'NULL', '3'], 'year': ['2020'] * 3, 'day': ['1'] * 3,
+                         'time_period': ['Morning'] * 3}, index=range(start, start + 3))
+
+
+def test_rows_dropped_by_every_chunk_are_counted(sink, capsys):
+    cleaner = DataCleaning()
+
+    clean_chunks = list(cleaner.clean_chunks((date_events_chunk(start) for start in (0, 3, 6)), 'clean_date_events_data'))
+
+    assert [len(chunk) for chunk in clean_chunks] == [2, 2, 2]
+    assert [record['dropped_rows'] for record in sink] == [{'month': 1}] * 3
+    assert cleaner.dropped_rows == {'month': 3}
+    instrumentation.print_summary()
+    columns = capsys.readouterr().out.splitlines()[1].split()
+    assert columns[:2] == ['DataCleaning.clean_date_events_data', '3']
+    assert columns[3:5] == ['9', '6']
+    assert columns[6] == '3'
+
+
+def test_stage_metrics_are_recorded_and_summed(sink, capsys):
+    from data_handling.dtype_planner import DtypePlanner
+    from data_handling.integrity import IntegrityChecker
+    checker = IntegrityChecker(mode='report')
+    checker.check_dimension('dim_store_details', pd.DataFrame({'store_code': ['ST-1', 'ST-1', None]}))
+    for orders in (['ST-1', 'ST-9'], ['ST-8']):
+        checker.check_foreign_keys('orders_table', pd.DataFrame({'store_code': orders}), {'store_code': 'dim_store_details'})
+    DtypePlanner().apply(pd.DataFrame({'continent': pd.Series(['Europe'] * 100, dtype=object)}), 'stores')
+
+    metrics = {record['stage']: record['metrics'] for record in sink}
+    assert metrics['IntegrityChecker.check_dimension[dim_store_details]'] == {'store_code duplicated': 1, 'store_code NULL': 1}
+    assert metrics['DtypePlanner.apply[stores]']['memory_after_bytes'] < metrics['DtypePlanner.apply[stores]']['memory_before_bytes']
+    instrumentation.print_summary()
+    summary = capsys.readouterr().out.splitlines()
+    assert [line for line in summary if line.startswith('IntegrityChecker.check_foreign_keys')][0].endswith('orphan store_code=2')
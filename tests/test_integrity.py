@@ -0,0 +1,74 @@
+import uuid
+import pandas as pd
+import pytest
+from data_handling.database_utils import DatabaseConnector
+from data_handling.integrity import IntegrityChecker, canonical_keys
+
+
+@pytest.fixture(params=['sqlite_link', 'postgres_link'])
+def link_file(request):
+    return request.getfixturevalue(request.param)
+
+
+def key_loader(link_file: str):
+    def read_dimension_keys(table_name: str, key_column: str) -> pd.Series:
+        return DatabaseConnector(filename=link_file, table_name=table_name).read_distinct(key_column)
+    return read_dimension_keys
+
+
+def test_orders_checked_against_loaded_dimension(link_file):
+    user_uuids = [str(uuid.uuid4()) for _ in range(3)]
+    users_df = pd.DataFrame({'user_uuid': user_uuids, 'first_name': ['a', 'b', 'c']})
+    DatabaseConnector(filename=link_file, dataframe=users_df, table_name='dim_users').upload_to_db()
+    orphan_uuid = str(uuid.uuid4())
+    orders_df = pd.DataFrame({'index': range(5), 'user_uuid': user_uuids + [orphan_uuid, None]})
+    checker = IntegrityChecker(key_loader=key_loader(link_file))
+
+    facts_df = checker.check_foreign_keys('orders_table', orders_df, foreign_keys={'user_uuid': 'dim_users'})
+
+    assert facts_df['index'].tolist() == [0, 1, 2, 4]
+    assert checker.quarantine['orders_table'][0]['user_uuid'].tolist() == [orphan_uuid]
+
+
+def test_uuid_keys_match_whatever_form_the_database_stored(sqlite_link):
+    # Dimension loaded as dashless hex (sqlalchemy.Uuid without a native type) and orders written in upper case
+    date_uuids = [uuid.uuid4() for _ in range(3)]
+    engine = DatabaseConnector(filename=sqlite_link).init_link_engine()
+    pd.DataFrame({'date_uuid': [date_uuid.hex for date_uuid in date_uuids]}).to_sql('dim_date_times', engine, index=False)
+    orders_df = pd.DataFrame({'date_uuid': [str(date_uuid).upper() for date_uuid in date_uuids] + ['not-a-uuid']})
+    checker = IntegrityChecker(key_loader=key_loader(sqlite_link))
+
+    facts_df = checker.check_foreign_keys('orders_table', orders_df, foreign_keys={'date_uuid': 'dim_date_times'})
+
+    assert len(facts_df) == 3
+    assert checker.violations == {'orders_table.orphan date_uuid': 1}
+
+
+def test_dimension_keys_written_differently_are_duplicates():
+    user_uuid = uuid.uuid4()
+    checker = IntegrityChecker()
+    first_chunk = pd.DataFrame({'user_uuid': [str(user_uuid), None]})
+    second_chunk = pd.DataFrame({'user_uuid': [str(user_uuid).upper(), user_uuid.hex, str(uuid.uuid4())]})
+
+    checked = [checker.check_dimension('dim_users', chunk, append=index > 0)
+               for index, chunk in enumerate([first_chunk, second_chunk])]
+
+    assert [len(chunk) for chunk in checked] == [1, 1]
+    assert checker.violations == {'dim_users.user_uuid NULL': 1, 'dim_users.user_uuid duplicated': 2}
+    assert len(checker.dimension_keys('dim_users')) == 2
+
+
+@pytest.mark.parametrize('key, canonical', [
+    ('93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8', '93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8'),
+    ('93CAF182-E4E9-4C6E-BEBB-60A1A9DCF9B8', '93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8'),
+    ('93caf182e4e94c6ebebb60a1a9dcf9b8', '93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8'),
+    ('{93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8}', '93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8'),
+    (uuid.UUID('93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8'), '93caf182-e4e9-4c6e-bebb-60a1a9dcf9b8'),
+    ('93caf182-e4e9-4c6e-bebb-60a1a9dcf9bg', '93caf182-e4e9-4c6e-bebb-60a1a9dcf9bg'),
+    ('93caf182_e4e9_4c6e_bebb_60a1a9dcf9b8', '93caf182_e4e9_4c6e_bebb_60a1a9dcf9b8'),
+    ('93caf182-e4e9-4c6e-bebb-60a1a9dcf9bé', '93caf182-e4e9-4c6e-bebb-60a1a9dcf9bé'),
+    ('NULL', 'NULL'),
+])
+def test_canonical_uuid_keys(key, canonical):
+    assert canonical_keys(pd.Index([key, 'a3b1c2d4e5f60718293a4b5c6d7e8f90']), 'user_uuid').tolist() == [
+        canonical, 'a3b1c2d4-e5f6-0718-293a-4b5c6d7e8f90']
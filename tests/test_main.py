@@ -0,0 +1,86 @@
+import shutil
+import pandas as pd
+import pytest
+import sqlalchemy
+import main
+from data_handling.database_utils import DatabaseConnector
+
+
+@pytest.fixture(params=['sqlite_link', 'postgres_link'])
+def run_dir(request, tmp_path, monkeypatch):
+    # main.py reads postgres_link.yaml from the working directory
+    link_file = request.getfixturevalue(request.param)
+    run_dir = tmp_path / 'run'
+    run_dir.mkdir()
+    shutil.copy(link_file, run_dir / 'postgres_link.yaml')
+    monkeypatch.chdir(run_dir)
+    monkeypatch.setattr(main.get_integrity_checker(), 'quarantine', {})
+    return run_dir
+
+
+def read_quarantine(table_name: str) -> list:
+    engine = DatabaseConnector(filename='postgres_link.yaml').init_link_engine()
+    return pd.read_sql_table(f'{table_name}_quarantine', engine)['index'].tolist()
+
+
+def test_incremental_loads_keep_the_rows_quarantined_earlier(run_dir):
+    for orders in ([0, 1], [5]):
+        main.get_integrity_checker().quarantine['orders_table'] = [pd.DataFrame({'index': orders, 'user_uuid': ['orphan'] * len(orders)})]
+        main.upload_quarantine('orders_table', append=True)
+    assert sorted(read_quarantine('orders_table')) == [0, 1, 5]
+
+    # A full load replaces them
+    main.get_integrity_checker().quarantine['orders_table'] = [pd.DataFrame({'index': [7], 'user_uuid': ['orphan']})]
+    main.upload_quarantine('orders_table')
+    assert read_quarantine('orders_table') == [7]
+
+
+def assert_run_settings() -> None:
+    assert main.get_extract_cache().enabled is False
+    assert main.get_integrity_checker().mode == 'report'
+    assert 'DataCleaning.clean_user_data' in main.instrumentation.profile_stages
+
+
+def test_spawned_workers_apply_the_run_settings():
+    # Spawned workers re-import main, they only see the settings through the initializer
+    settings = (True, 'report', None, ['DataCleaning.clean_user_data'])
+    orchestrator = main.PipelineOrchestrator(use_processes=True, initializer=main.apply_settings, initargs=settings,
+                                             start_method='spawn')
+    orchestrator.add_pipeline('settings', assert_run_settings)
+    assert orchestrator.run()['settings']['status'] == 'success'
+
+
+def legacy_users(rows: int = 8) -> pd.DataFrame:
+    user_uuids = [f'{row:08d}-1e2b-4c3d-8e4f-5a6b7c8d9e0f' for row in range(rows)]
+    user_uuids[3] = 'NULL'
+    user_uuids[5] = 'I7G4DMDZOZ'
+    return pd.DataFrame({'index': range(rows), 'first_name': [f'Name {row}' for row in range(rows)],
+                         'last_name': ['Smith'] * rows, 'company': ['Acme'] * rows,
+                         'email_address': [f'user{row}@@example.com' if row % 2 else f'user{row}@example.com' for row in range(rows)],
+                         'address': ['1 High Street'] * rows, 'country': ['United Kingdom', 'Germany'] * (rows // 2),
+                         'country_code': ['GGB', 'DE'] * (rows // 2),
+                         'phone_number': ['+44(0)20 7946 0018', '+49 (0) 30 901820'] * (rows // 2),
+                         'date_of_birth': ['1968-10-16', '1971 October 23', '1995/03/12', '2001-11-05'] * (rows // 4),
+                         'join_date': ['2018-10-10', '2015 March 02', '2020/06/01', '2019-01-21'] * (rows // 4),
+                         'user_uuid': user_uuids})
+
+
+def read_table(table_name: str) -> pd.DataFrame:
+    engine = DatabaseConnector(filename='postgres_link.yaml').init_link_engine()
+    return pd.read_sql_table(table_name, engine)
+
+
+def test_chunked_user_load_matches_the_whole_frame_load(run_dir, monkeypatch):
+    rds_engine = sqlalchemy.create_engine(f"sqlite:///{run_dir / 'rds.db'}")
+    legacy_users().to_sql('legacy_users', rds_engine, index=False)
+    monkeypatch.setattr(DatabaseConnector, 'init_db_engine', lambda self: rds_engine)
+    monkeypatch.setattr(main.get_extract_cache(), 'enabled', False)
+
+    main.clean_user()
+    whole_df = read_table('dim_users')
+    main.clean_user(chunksize=3)
+    chunked_df = read_table('dim_users')
+
+    assert len(whole_df) == 6
+    assert whole_df['phone_number'].tolist() == ['02079460018', '9030901820', '02079460018', '02079460018', '02079460018', '9030901820']
+    pd.testing.assert_frame_equal(chunked_df, whole_df)
@@ -0,0 +1,80 @@
+from functools import partial
+import pytest
+from data_handling.instrumentation import instrumentation, instrumented
+from data_handling.orchestration import PipelineOrchestrator
+
+
+class Stage:
+    def __init__(self, rows: int) -> None:
+        self.rows = rows
+
+    @instrumented
+    def extract(self) -> int:
+        return self.rows
+
+
+def extract_users() -> None:
+    Stage(10).extract()
+    Stage(5).extract()
+
+
+def extract_orders() -> None:
+    Stage(7).extract()
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    received = []
+    monkeypatch.setattr(instrumentation, 'records', [])
+    monkeypatch.setattr(instrumentation, 'sinks', [received.append])
+    return received
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_stage_records_reach_the_parent_once(sink, use_processes):
+    orchestrator = PipelineOrchestrator(max_workers=2, use_processes=use_processes)
+    orchestrator.add_pipeline('extract_users', extract_users)
+    orchestrator.add_pipeline('extract_orders', extract_orders, depends_on=('extract_users',))
+
+    results = orchestrator.run()
+
+    assert {result['status'] for result in results.values()} == {'success'}
+    assert sorted(record['rows_out'] for record in instrumentation.records if 'stage' in record) == [5, 7, 10]
+    assert sorted(record['rows_out'] for record in sink if 'stage' in record) == [5, 7, 10]
+
+
+def test_summary_is_aggregated_per_stage(sink, capsys):
+    extract_users()
+    extract_orders()
+    instrumentation.print_summary()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert lines[1].split()[:2] == ['Stage.extract', '3']
+    assert lines[1].split()[3:5] == ['-', '22']
+
+
+def query_database(url: str) -> None:
+    from data_handling.database_utils import engine_registry
+    engine = engine_registry.get_engine(url)
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.exec_driver_sql('SELECT 1')
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_pool_metrics_are_in_the_summary(sink, tmp_path, capsys, use_processes):
+    from data_handling.database_utils import engine_registry
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    orchestrator = PipelineOrchestrator(max_workers=2, use_processes=use_processes)
+    orchestrator.add_pipeline('first', partial(query_database, url))
+    orchestrator.add_pipeline('second', partial(query_database, url), depends_on=('first',))
+
+    orchestrator.run()
+    instrumentation.collect()
+    instrumentation.print_summary()
+    engine_registry.dispose_all()
+
+    pool_records = [record for record in sink if record.get('kind') == 'pool' and record['engine'] == url]
+    assert sum(record['checkouts'] for record in pool_records) == 6
+    assert [line.split()[:2] for line in capsys.readouterr().out.splitlines() if line.startswith(url)] == [[url, '6']]
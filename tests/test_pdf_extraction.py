@@ -0,0 +1,104 @@
+import json
+import pytest
+from data_handling.data_extraction import TABULA_JAVA_OPTIONS, DataExtractor, count_pdf_pages
+
+
+# tabula stub: each page holds a one-row table naming the page, the JVM options of each worker are recorded
+STUB_TABULA = {
+    '__init__.py': '''
+import pandas as pd
+
+
+def read_pdf(input_path, pages):
+    return [pd.DataFrame({'card_number': [f'card-{pages}'], 'page': [pages]})]
+''',
+    'backend.py': '''
+import json
+import os
+
+
+class TabulaVm:
+    def __init__(self, java_options, silent):
+        with open(os.path.join(os.path.dirname(__file__), f'java_options_{os.getpid()}.json'), 'w') as file:
+            json.dump(java_options, file)
+''',
+}
+
+
+def write_pdf(path, number_of_pages: int, trailer: bytes = b'') -> None:
+    """
+    Write an uncompressed PDF file of blank pages
+    """
+    page_ids = [3 + page for page in range(number_of_pages)]
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>',
+               b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+               + b'] /Count %d >>' % number_of_pages]
+    objects += [b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>'] * number_of_pages
+    content, offsets = b'%PDF-1.4\n', []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(content)
+    content += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    content += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    content += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    path.write_bytes(content + trailer)
+
+
+@pytest.fixture
+def stub_tabula(tmp_path, monkeypatch):
+    package = tmp_path / 'stub' / 'tabula'
+    package.mkdir(parents=True)
+    for name, source in STUB_TABULA.items():
+        (package / name).write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path / 'stub'))
+    return package
+
+
+def test_every_page_is_extracted_once(stub_tabula, tmp_path):
+    pdf_path = tmp_path / 'card_details.pdf'
+    write_pdf(pdf_path, 23)
+
+    page_dfs = list(DataExtractor.retrieve_pdf_pages(str(pdf_path), max_workers=3, pages_per_task=5,
+                                                     cache_dir=str(tmp_path / 'cache')))
+
+    assert sorted(int(page_df['page'].iloc[0]) for page_df in page_dfs) == list(range(1, 24))
+    worker_options = [json.loads(path.read_text()) for path in stub_tabula.glob('java_options_*.json')]
+    assert worker_options and all(options == list(TABULA_JAVA_OPTIONS) for options in worker_options)
+
+
+def test_cached_pages_are_not_extracted_again(stub_tabula, tmp_path):
+    pdf_path = tmp_path / 'card_details.pdf'
+    write_pdf(pdf_path, 4)
+    cache_dir = str(tmp_path / 'cache')
+    list(DataExtractor.retrieve_pdf_pages(str(pdf_path), max_workers=2, pages_per_task=2, cache_dir=cache_dir))
+
+    (stub_tabula / '__init__.py').write_text('def read_pdf(input_path, pages):\n    raise AssertionError(pages)\n')
+    page_dfs = list(DataExtractor.retrieve_pdf_pages(str(pdf_path), max_workers=2, pages_per_task=2, cache_dir=cache_dir))
+
+    assert sorted(page_df['card_number'].iloc[0] for page_df in page_dfs) == [f'card-{page}' for page in range(1, 5)]
+
+
+def test_page_count(tmp_path):
+    pdf_path = tmp_path / 'document.pdf'
+    write_pdf(pdf_path, 12)
+    assert count_pdf_pages(str(pdf_path)) == 12
+
+
+@pytest.mark.parametrize('number_of_pages, trailer', [
+    (0, b''),
+    (3, b'4 0 obj\n<< /Type /ObjStm /N 2 /First 10 >>\nendobj\n%%EOF\n'),
+    (3, b'6 0 obj\n<< /Type /Page /Parent 2 0 R >>\nendobj\n%%EOF\n'),
+])
+def test_unreliable_page_count_raises(tmp_path, number_of_pages, trailer):
+    pdf_path = tmp_path / 'document.pdf'
+    write_pdf(pdf_path, number_of_pages, trailer)
+    with pytest.raises(ValueError):
+        count_pdf_pages(str(pdf_path))
+
+
+def test_unreliable_page_count_without_jvm_raises(stub_tabula, tmp_path):
+    pdf_path = tmp_path / 'document.pdf'
+    write_pdf(pdf_path, 3, b'4 0 obj\n<< /Type /ObjStm /N 2 /First 10 >>\nendobj\n%%EOF\n')
+    with pytest.raises(ValueError):
+        list(DataExtractor.retrieve_pdf_pages(str(pdf_path), max_workers=1, cache_dir=None))
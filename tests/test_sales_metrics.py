@@ -0,0 +1,164 @@
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from data_handling.database_utils import DatabaseConnector
+from data_handling.sales_metrics import ROLLUP_SQL_FILE, REPORTS_SQL_FILE, SalesMetrics
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sales reports as they were written against orders_table, before they read the rollup
+ORIGINAL_SALES_REPORTS = {
+    'Display which months produced the largest amount of sales': """
+        SELECT ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales, month
+        FROM dim_date_times
+        JOIN orders_table ON dim_date_times.date_uuid = orders_table.date_uuid
+        JOIN dim_products ON orders_table.product_code = dim_products.product_code
+        GROUP BY month
+        ORDER BY total_sales DESC
+        LIMIT 6""",
+    'Display how many sales are made online and offline': """
+        SELECT
+          COUNT(product_code) AS number_of_sales,
+          SUM(product_quantity) AS product_quantity_count,
+          CASE WHEN store_code = 'WEB-1388012W' THEN 'Web' ELSE 'Offline' END AS location
+        FROM orders_table
+        GROUP BY CASE WHEN store_code = 'WEB-1388012W' THEN 'Web' ELSE 'Offline' END
+        ORDER BY number_of_sales""",
+    'Display the value and percentage of sales in each type of store': """
+        SELECT
+            dim_store_details.store_type,
+            ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales,
+            ROUND(COUNT(orders_table.product_code) * 100.0 / (SELECT COUNT(*) FROM orders_table), 2) AS percentage_of_sales
+        FROM orders_table
+        JOIN dim_products ON orders_table.product_code = dim_products.product_code
+        JOIN dim_store_details ON orders_table.store_code = dim_store_details.store_code
+        GROUP BY store_type
+        ORDER BY total_sales DESC""",
+    'Display the month of each year with the highest sales': """
+        SELECT
+            ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales,
+            dim_date_times.year,
+            dim_date_times.month
+        FROM orders_table
+        JOIN dim_products ON orders_table.product_code = dim_products.product_code
+        JOIN dim_date_times ON orders_table.date_uuid = dim_date_times.date_uuid
+        GROUP BY year,month
+        ORDER BY total_sales DESC
+        LIMIT 10""",
+    'Display the type of stores in Germany and their total sales': """
+        SELECT
+            ROUND(SUM(product_price * product_quantity)::numeric, 2) AS total_sales,
+            store_type,
+            country_code
+        FROM orders_table
+        JOIN dim_store_details ON orders_table.store_code = dim_store_details.store_code
+        JOIN dim_products ON orders_table.product_code = dim_products.product_code
+        WHERE country_code = 'DE'
+        GROUP BY store_type, country_code
+        ORDER BY total_sales""",
+}
+
+
+def sales_tables(orders: int = 40) -> dict[str, pd.DataFrame]:
+    random = np.random.RandomState(0)
+    date_uuids = [str(uuid.UUID(int=number)) for number in range(1, 9)]
+    store_codes = ['WEB-1388012W', 'DE-A1B2C3D4', 'GB-E5F6G7H8', 'DE-I9J0K1L2']
+    product_codes = ['A1-1234567', 'B2-2345678', 'C3-3456789', 'D4-4567890', 'E5-5678901']
+    return {
+        'dim_date_times': pd.DataFrame({'date_uuid': date_uuids, 'year': ['2021'] * 4 + ['2022'] * 4,
+                                        'month': ['1', '4', '7', '11', '2', '4', '9', '12'],
+                                        'day': [str(day) for day in range(3, 11)],
+                                        'timestamp': [f'{hour:02d}:15:30' for hour in range(8, 16)],
+                                        'time_period': ['Morning'] * 8}),
+        'dim_store_details': pd.DataFrame({'store_code': store_codes, 'store_type': ['Web Portal', 'Local', 'Super Store', 'Mall Kiosk'],
+                                           'country_code': ['GB', 'DE', 'GB', 'DE'], 'locality': ['N/A', 'Berlin', 'Exeter', 'Munich'],
+                                           'staff_numbers': [300, 12, 45, 7]}),
+        'dim_products': pd.DataFrame({'product_code': product_codes, 'product_price': [1.25, 4.5, 10.0, 7.75, 23.99]}),
+        'orders_table': pd.DataFrame({'index': np.arange(orders),
+                                      'date_uuid': random.choice(date_uuids, orders),
+                                      'store_code': random.choice(store_codes, orders),
+                                      'product_code': random.choice(product_codes, orders),
+                                      'product_quantity': random.randint(1, 10, orders)}),
+    }
+
+
+def upload(link_file: str, table_name: str, dataframe: pd.DataFrame, replace: bool = True) -> None:
+    DatabaseConnector(filename=link_file, dataframe=dataframe, table_name=table_name).upload_to_db(replace=replace)
+
+
+def sales_metrics(link_file: str) -> SalesMetrics:
+    return SalesMetrics(filename=link_file, rollup_sql_file=os.path.join(REPO_DIR, ROLLUP_SQL_FILE),
+                        reports_sql_file=os.path.join(REPO_DIR, REPORTS_SQL_FILE))
+
+
+def read_table(link_file: str, sql: str) -> pd.DataFrame:
+    engine = DatabaseConnector(filename=link_file).init_link_engine()
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(sql)
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def read_rollup(link_file: str) -> pd.DataFrame:
+    return read_table(link_file, 'SELECT * FROM sales_rollup ORDER BY "year", "month", store_code, product_code')
+
+
+def test_delta_refresh_adds_new_orders_once(postgres_link):
+    tables = sales_tables()
+    orders_df = tables.pop('orders_table')
+    for table_name, dataframe in tables.items():
+        upload(postgres_link, table_name, dataframe)
+    metrics = sales_metrics(postgres_link)
+
+    upload(postgres_link, 'orders_table', orders_df.iloc[:25])
+    metrics.refresh_rollup(full_refresh=True)
+    DatabaseConnector(filename=postgres_link, dataframe=orders_df.iloc[25:], table_name='orders_table').upsert_to_db('index')
+    metrics.refresh_rollup()
+    # A refresh without new orders leaves the rollup as it is
+    metrics.refresh_rollup()
+    delta_rollup = read_rollup(postgres_link)
+
+    metrics.refresh_rollup(full_refresh=True)
+    pd.testing.assert_frame_equal(delta_rollup, read_rollup(postgres_link))
+    assert delta_rollup['number_of_sales'].sum() == len(orders_df)
+    assert delta_rollup['product_quantity'].sum() == orders_df['product_quantity'].sum()
+
+
+def test_reports_read_from_the_rollup_match_the_original_queries(postgres_link):
+    for table_name, dataframe in sales_tables().items():
+        upload(postgres_link, table_name, dataframe)
+    metrics = sales_metrics(postgres_link)
+    metrics.refresh_rollup(full_refresh=True)
+
+    reports = metrics.run_reports()
+
+    for name, sql in ORIGINAL_SALES_REPORTS.items():
+        pd.testing.assert_frame_equal(reports[name], read_table(postgres_link, sql), check_dtype=False)
+
+
+def test_orders_missing_a_dimension_row_are_added_once_it_is_loaded(postgres_link):
+    tables = sales_tables()
+    dates_df = tables['dim_date_times']
+    missing_date = dates_df['date_uuid'].iloc[-1]
+    tables['dim_date_times'] = dates_df.iloc[:-1]
+    for table_name, dataframe in tables.items():
+        upload(postgres_link, table_name, dataframe)
+    metrics = sales_metrics(postgres_link)
+    orders_df = tables['orders_table']
+    late_orders = orders_df.loc[orders_df['date_uuid'] == missing_date, 'index'].tolist()
+    assert late_orders
+
+    # The watermark moves past the orders without their date, they are kept pending
+    metrics.refresh_rollup(full_refresh=True)
+    assert read_rollup(postgres_link)['number_of_sales'].sum() == len(orders_df) - len(late_orders)
+    assert sorted(read_table(postgres_link, 'SELECT order_index FROM sales_rollup_pending')['order_index']) == late_orders
+
+    upload(postgres_link, 'dim_date_times', dates_df.iloc[-1:], replace=False)
+    metrics.refresh_rollup()
+    delta_rollup = read_rollup(postgres_link)
+    assert read_table(postgres_link, 'SELECT order_index FROM sales_rollup_pending').empty
+
+    metrics.refresh_rollup(full_refresh=True)
+    pd.testing.assert_frame_equal(delta_rollup, read_rollup(postgres_link))
+    assert delta_rollup['number_of_sales'].sum() == len(orders_df)